@@ -46,6 +46,21 @@ if "%function%"=="export" (
         )
     )
 )
+if "%function%"=="batch" (
+    if "%arg1%"=="class" (
+        python export_sikuli_batch.py class
+        call :setup
+    ) else (
+        python export_sikuli_batch.py script
+    )
+)
+if "%function%"=="trace" (
+    if "%arg1%"=="" (
+        echo Please provide the exported script to trace as second argument
+    ) else (
+        python trace_sikuli_script.py %arg1% %arg2%
+    )
+)
 if "%function%"=="test" (
     python %FOLDER_PYBOT%/Pybot.py
 )
@@ -14,37 +14,48 @@ Pybot
       methods and variables.
 """
 import locale
+import platform
 import re
-import sqlite3
-import subprocess
-# Import unittest in case of test automation
-from datetime import datetime
+import shlex
+import sys
+from concurrent.futures import ThreadPoolExecutor
 # To start program of command
-from os import path, makedirs, remove, listdir, system
-from shutil import copy, rmtree, move
-from time import sleep
+from os import path, makedirs, listdir, system
+from shutil import copy, rmtree
+from threading import RLock
+from time import sleep, monotonic, perf_counter
 
-import easygui
-import pytesseract
-from PIL import Image
-from lackey import *
+import numpy
+
+from Pybot.android import DeviceRegistry, AndroidScreen, AndroidInput
+from Pybot.backend import LackeyBackend, Key
+from Pybot.database import CacheDatabase
+from Pybot.metrics import Metrics
+from Pybot.ocr_cache import OcrCache, ocr_key
+from Pybot.plan import ActionPlan, PlanPrefetcher, PLAN_EXT, prefetch_lackey
+from Pybot.preprocess import Preprocess, tesseract_config
+from Pybot.process import ProcessTable
+from Pybot.program import ProgramHandle, START_TIMEOUT
+from Pybot.runner import DeviceContext, run_devices, RUNNER_WORKERS
+from Pybot.screenshot_store import ScreenshotStore
+from Pybot.sikuli_export import export_projects
+from Pybot.tile_ocr import TileOcr, Word
+from Pybot.template import TemplateIndex, LocationHints, TEMPLATE_SIMILARITY, grayscale, match_template, \
+    match_templates
+from Pybot.trace import traced
+from Pybot.wait import wait_until, settle_poll, signature, difference, CHANGE_THRESHOLD, SETTLE_SEC, WAIT_TIMEOUT
 
 IMG_FOLDER = "img/"
+SCREENSHOT_FOLDER = "screenshots/"
 IMAGE_EXT = ".png"
 SQLITE3_EXT = "sqlite3"
 SQLITE3_DATABASE = "pybot.sqlite3"
 SCRCPY_FOLDER = "scrcpy-windows-v1.1"
 SCRCPY_EXE = "scrcpy.exe"
 TESSERACT_CMD = "tesseract"
+START_WEB_TIMEOUT = 5
+OCR_WORKERS = None  # Default of ThreadPoolExecutor, depending on the number of CPU
 ADB_CMD = "adb.exe"
-COMMANDS = {
-    "kill_process": {"Windows": "taskkill /im {0} /f",
-                     "Darwin": "pkill {0}",  # TODO be tested
-                     "Linux": "pkill {0}"},  # TODO add linux compatibility and test
-    "check_process": {"Windows": 'tasklist /FI "IMAGENAME eq {0}" 2>NUL | find /I /N "{0}">NUL',
-                      "Darwin": "pkill {0}",  # TODO be tested
-                      "Linux": "pkill {0}"},  # TODO be tested
-}
 # TODO all the tesseract languages available
 TESSERACT_LANG = {
     "fr": "fra",
@@ -67,37 +78,142 @@ class Pybot:
     Something to automate on a computer a task, a test, etc..."
     """
 
-    def __init__(self, cache=True):
+    def __init__(self, cache=True, backend=None, metrics=False):
         """
         Constructor of the Pybot class.
            :param cache: Call a caching method if True, which is the default value.
+           :param backend: Screen and input backend, default is None for the desktop through lackey on Windows. A
+              HeadlessBackend object runs Pybot on any platform without display.
+           :param metrics: If True, time the capture, screenshot, tesseract, matching, adb and SQLite stages into the
+              latency histograms of self.metrics. Default is False, it can be switched with self.metrics.enabled.
            :raise PybotException: in case of platform compatibility.
-           :raise TypeError: TypeError if kwarg cache is not a boolean.
+           :raise TypeError: TypeError if kwarg cache or metrics is not a boolean.
+           :example:
+              .. code-block:: python
+
+                 headless = HeadlessBackend(frame=numpy.asarray(Image.open("img/1529851880929.png")))
+                 test_automaton = Pybot(cache=False, backend=headless)
+                 test_automaton.check_click("img/1529851881012.png")
+                 print(headless.events)
         """
         if isinstance(cache, bool) is True:
             self.cache = cache
         else:
             raise TypeError("Kwarg cache must be a boolean type, True or False.")
-        if platform.system() == "Windows":
+        self.metrics = Metrics(enabled=metrics)
+        if backend is not None or platform.system() == "Windows":
             self.python_version = sys.version
             self.os_type = platform.system()
             self.os_version = platform.platform()
             self.machine = platform.machine()
             self.uname = platform.uname()
             self.computer = platform.node()
-            self.screen = Screen()
-            self.screen_width = self.screen.getBounds()[2]
-            self.screen_height = self.screen.getBounds()[3]
-            self.screen_bounds = self.screen.getBounds()
-            self.num_screen = self.screen.getNumberScreens()
+            self._screen = backend
+            self._screen_bounds = None
+            self._num_screen = None
             self.database_directory = SQLITE3_EXT
             self.database = SQLITE3_DATABASE
             self.cache = cache
-            self._cache_automaton_screen()
+            self.templates = TemplateIndex(IMG_FOLDER)
+            self.devices = DeviceRegistry(path.join(SCRCPY_FOLDER, ADB_CMD))
+            self.android_screens = {}
+            self.android_inputs = {}
+            self.processes = ProcessTable(os_type=self.os_type)
+            self._db = None
+            self._ocr_cache = None
+            self._hints = None
+            self._screenshots = None
+            self._setup_lock = RLock()
+            self.prefetcher = None
+            self.lackey_loader = None
+            self.android_gui = None
+            self.preprocess = None
+            self.tile_readers = {}
             self.locale_lang = locale.getdefaultlocale()[0]
         else:
             raise PybotException(
-                "Pybot class only for Windows platform at the moment.")
+                "Pybot class only for Windows platform at the moment, unless a headless backend is given.")
+
+    @property
+    def screen(self):
+        """Screen and input backend, the lackey one is created on first use."""
+        if self._screen is None:
+            self._screen = LackeyBackend()
+        return self._screen
+
+    @property
+    def screen_bounds(self):
+        """Bounds of the screen (x, y, width, height), probed on first use."""
+        if self._screen_bounds is None:
+            self._screen_bounds = tuple(self.screen.getBounds())
+        return self._screen_bounds
+
+    @property
+    def screen_width(self):
+        """Width of the screen."""
+        return self.screen_bounds[2]
+
+    @property
+    def screen_height(self):
+        """Height of the screen."""
+        return self.screen_bounds[3]
+
+    @property
+    def num_screen(self):
+        """Number of screens, probed on first use."""
+        if self._num_screen is None:
+            self._num_screen = self.screen.getNumberScreens()
+        return self._num_screen
+
+    @property
+    def db(self):
+        """
+        Cache database, opened on first use if the cache is enabled. The computer and the screen are cached when it is
+        opened. None if the cache is disabled. The lazy attributes are set up once, even from the worker threads of
+        texts(), find_any() or AsyncPybot.
+        """
+        if self._db is None and self.cache is True:
+            with self._setup_lock:
+                if self._db is None and self.cache is True:
+                    makedirs(self.database_directory, exist_ok=True)
+                    self._db = CacheDatabase(path.join(self.database_directory, self.database), metrics=self.metrics)
+                    self._cache_automaton_screen()
+        return self._db
+
+    @property
+    def ocr_cache(self):
+        """OCR cache, created on first use, None if the cache is disabled."""
+        if self._ocr_cache is None and self.cache is True:
+            with self._setup_lock:
+                if self._ocr_cache is None and self.db is not None:
+                    self._ocr_cache = OcrCache(self.db)
+        return self._ocr_cache
+
+    @property
+    def hints(self):
+        """Last locations of the templates, created on first use."""
+        if self._hints is None:
+            with self._setup_lock:
+                if self._hints is None:
+                    self._hints = LocationHints(self.db, self.computer, self.screen_width, self.screen_height)
+        return self._hints
+
+    @property
+    def screenshots(self):
+        """
+        Store of the screenshots kept, in SCREENSHOT_FOLDER, created on first use. Assign a ScreenshotStore object to
+        change its encoding or retention policy.
+        """
+        if self._screenshots is None:
+            with self._setup_lock:
+                if self._screenshots is None:
+                    self._screenshots = ScreenshotStore(SCREENSHOT_FOLDER, database=self.db, node=self.computer)
+        return self._screenshots
+
+    @screenshots.setter
+    def screenshots(self, store):
+        """Replace the store of the screenshots."""
+        self._screenshots = store
 
     def __repr__(self):
         """
@@ -108,23 +224,65 @@ class Pybot:
 
     def __del__(self):
         """
-        On Pybot object deletion or end of execution or garbage collecting.
+        On Pybot object deletion or end of execution or garbage collecting. Only the scrcpy started by
+        start_android_gui() is stopped, and nothing is raised when the interpreter is shutting down.
         """
-        self.stop_android_gui()
+        try:
+            if getattr(self, "android_gui", None) is not None:
+                self.android_gui.kill()
+            self.close()
+        except Exception:
+            if sys.is_finalizing() is False:
+                raise
+
+    def close(self):
+        """
+        Stop the Android device tracking, capture and input sessions, commit the cache writes still queued and close
+        the cache database. The cache is disabled afterwards.
+        """
+        if getattr(self, "devices", None) is not None:
+            self.devices.stop()
+            for android_screen in self.android_screens.values():
+                android_screen.stop()
+            for android_input in self.android_inputs.values():
+                android_input.stop()
+        if getattr(self, "prefetcher", None) is not None:
+            self.prefetcher.stop()
+        if getattr(self, "lackey_loader", None) is not None:
+            self.lackey_loader.stop()
+            self.lackey_loader = None
+        if getattr(self, "_db", None) is not None:
+            self._db.close()
+        self.cache = False
+        self._db = None
+        self._ocr_cache = None
+        self._hints = None
+        self._screenshots = None
+        self.tile_readers = {}
 
     def purge_cache(self):
         """
-        Deleting cache database.
+        Deleting cache database, the cache is disabled until a new Pybot object is created.
            :return: True if cache is clear, False on contrary.
         """
-        rmtree(self.database_directory)
+        self.close()
+        if path.isdir(self.database_directory) is True:
+            rmtree(self.database_directory)
         return path.isdir(self.database_directory) is False
 
-    def text(self, bounds=None, lang=None):
+    @traced
+    def text(self, bounds=None, lang=None, keep=False, config="", preprocess=None, incremental=False):
         """
         Retrieve the text on the screen, default is all the screen.
            :param bounds: The bounds of the image to take, default is None, to get the all screen.
            :param lang: Specify a lang for the image text by tesseract.
+           :param keep: If True, the screenshot is saved and cached like screenshot() does. Default is False, the
+              captured buffer is passed straight to tesseract without any image file written.
+           :param config: Tesseract configuration, as returned by tesseract_config() of the Pybot.preprocess module.
+           :param preprocess: Preprocess object, default is None for self.preprocess, False for the raw capture.
+           :param incremental: If True, only the tiles of the region changed since the previous incremental read of
+              the same region are read by tesseract, the words of the other tiles being kept. The text is assembled
+              from the blocks, paragraphs and lines of the words like tesseract does. Useful to poll a dashboard.
            :return: The string decrypted from the screen.
            :raise TypeError: If wrong bounds kwarg type. Default is None.
            :raise PybotException: If wrong tesseract lang kwarg (tesseract language). Default is None.
@@ -133,24 +291,95 @@ class Pybot:
 
                  test_automaton = Pybot()
                  test_automaton.text(lang='eng') # get text of the full screen with english text description
+                 test_automaton.text((10, 10, 80, 20), config=tesseract_config(psm=7, whitelist="0123456789"),
+                                     preprocess=Preprocess(scale=2))
+                 while "Done" not in test_automaton.text(incremental=True):
+                     sleep(1)
         """
         if lang in TESSERACT_LANG.values() or lang is None:
             if isinstance(bounds, tuple) and len(bounds) == 4 * self.num_screen or bounds is None:
-                _, _, text = self.screenshot(bounds=bounds, text=True, lang=lang)
-                remove(path.join(IMG_FOLDER + text))
+                data = self.capture(bounds=bounds)
+                if incremental is True:
+                    text = self._tile_reader(bounds, lang, config, preprocess).read(data)
+                else:
+                    text = self.get_text_data(data, lang=lang, config=config, preprocess=preprocess)
+                if keep is True:
+                    with self.metrics.stage("screenshot_save"):
+                        self.screenshots.put(data, text=text)
                 return text
             else:
                 raise TypeError('Kwarg bounds must be tuple type (of bounds).')
         else:
             raise PybotException("Kwarg lang must be in tesseract language list values or None.")
 
-    def screenshot(self, bounds=None, text=False, lang=None):
+    @traced
+    def texts(self, regions, lang=None, max_workers=OCR_WORKERS):
+        """
+        Retrieve the text of many regions of the screen with a single capture. The regions are cropped from the same
+        captured buffer and read by tesseract in parallel.
+           :param regions: List of bounds (x, y, width, height) or of (bounds, lang) tuples to give a lang per region.
+           :param lang: Tesseract language of the regions given without lang. Default is None.
+           :param max_workers: Maximum number of tesseract running at the same time, default depends on the CPU.
+           :return: List of the strings decrypted, in the order of the regions.
+           :raise TypeError: If regions is not a list or tuple of bounds.
+           :raise PybotException: If wrong tesseract lang (tesseract language).
+           :example:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 test_automaton.texts([(0, 0, 200, 30), ((0, 40, 200, 30), 'fra')], lang='eng')
+        """
+        if isinstance(regions, (list, tuple)) is False:
+            raise TypeError('First argument regions must be a list of bounds.')
+        requests = []
+        for region in regions:
+            if isinstance(region, tuple) and len(region) == 2 and isinstance(region[0], tuple):
+                bounds, region_lang = region
+            else:
+                bounds, region_lang = region, lang
+            if isinstance(bounds, tuple) is False or len(bounds) != 4:
+                raise TypeError('Regions must be tuples of bounds (x, y, width, height).')
+            if region_lang not in TESSERACT_LANG.values() and region_lang is not None:
+                raise PybotException("Region lang must be in tesseract language list values or None.")
+            requests.append((bounds, region_lang))
+        if len(requests) == 0:
+            return []
+        left = min(bounds[0] for bounds, _ in requests)
+        top = min(bounds[1] for bounds, _ in requests)
+        right = max(bounds[0] + bounds[2] for bounds, _ in requests)
+        bottom = max(bounds[1] + bounds[3] for bounds, _ in requests)
+        data = self._capture((left, top, right - left, bottom - top))
+        crops = [data[y - top:y - top + h, x - left:x - left + w] for (x, y, w, h), _ in requests]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.get_text_data, crops, [region_lang for _, region_lang in requests]))
+
+    @traced
+    def capture(self, bounds=None):
+        """
+        Capture the screen in memory, default is all the screen. Nothing is written on the disk.
+           :param bounds: The bounds of the image to take, default is None, to get the all screen.
+           :return: The captured pixels as an RGB array (height, width, 3).
+           :raise TypeError: If wrong bounds kwarg type.
+           :example:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 data = test_automaton.capture()
+                 test_automaton.get_text_data(data, lang='eng')
+        """
+        return self._capture(self._desired_bounds(bounds))
+
+    @traced
+    def screenshot(self, bounds=None, text=False, lang=None, keep=True):
         """
         Taking a screenshot, default is all the screen.
            :param bounds: The bounds of the image to take, default is None, to get the all screen.
            :param text: Boolean True to discover text, False on contrary.
            :param lang: Specify a lang for the image text. Default is None.
-           :return: A tuple made of the boolean integer, image file and thetext discovered in the image.
+           :param keep: Boolean True to save the image in the screenshot store, which is the default. An identical
+              screenshot already stored is not written again. If False, the image stays in memory, is not cached and
+              the returned image file is an empty string.
+           :return: A tuple made of the boolean integer, image file path and the text discovered in the image.
            :raise TypeError: If wrong bounds kwarg type.
            :raise PybotException: If wrong tesseract lang kwarg (tesseract language).
            :example:
@@ -159,41 +388,32 @@ class Pybot:
                  test_automaton = Pybot()
                  test_automaton.screenshot(lang='eng') # Screenshot of the full screen with english text description
         """
-        if bounds is None:
-            desired_bounds = self.screen_bounds
-        elif isinstance(bounds, tuple) is False:
-            raise TypeError('Kwarg bounds must be tuple type (of bounds)')
-        else:
-            if isinstance(bounds, tuple) and len(bounds) == 4 * self.num_screen:
-                desired_bounds = bounds
-            else:
-                raise TypeError(
-                    "Bound kwarg has to be a tuple with length of 4 multiply by the number of screen(s).")
+        desired_bounds = self._desired_bounds(bounds)
         if lang in TESSERACT_LANG.values() or lang is None:
-            if isinstance(text, bool) is True:
-                data = self.screen.capture(desired_bounds)
-                img_file = str(datetime.now().timestamp()).replace('.', '')
-                img_file = "".join([img_file[2:15], IMAGE_EXT])
-                img = Image.fromarray(data)
-                img.save(img_file)
-                move(img_file, IMG_FOLDER)
-                del img
+            if isinstance(text, bool) is True and isinstance(keep, bool) is True:
+                data = self._capture(desired_bounds)
                 if text is True:
-                    text_string = self.get_text_img(img_file, lang=lang)
+                    text_string = self.get_text_data(data, lang=lang)
                 else:
                     text_string = ''
-                self._cache_screenshot(img_file, text=text_string)
-                return int(path.isfile(path.join(IMG_FOLDER + img_file))), img_file, text_string
+                if keep is False:
+                    return 0, '', text_string
+                with self.metrics.stage("screenshot_save"):
+                    img_file = self.screenshots.put(data, text=text_string)
+                return int(path.isfile(img_file)), img_file, text_string
             else:
-                raise TypeError("text kwarg has to be a boolean")
+                raise TypeError("text and keep kwargs have to be booleans")
         else:
             raise PybotException("Kwarg lang must be in tesseract language list values or None")
 
-    def get_text_img(self, img_file, lang=None):
+    @traced
+    def get_text_img(self, img_file, lang=None, config="", preprocess=None):
         """
         Retrieve text from an image.
-           :param img_file: Name of the image file.
+           :param img_file: Path of the image file, as returned by screenshot(), or name of an image of IMG_FOLDER.
            :param lang: None is default, this parameter specify a language to tesseract.
+           :param config: Tesseract configuration, PSM or characters whitelist for instance.
+           :param preprocess: Preprocess object, default is None for self.preprocess, False for the raw image.
            :return: String of the text decrypted
            :raise TypeError: If wrong bounds kwarg type.
            :raise PybotException: If wrong tesseract lang kwarg (tesseract language). Default is None.
@@ -204,22 +424,184 @@ class Pybot:
                  test_automaton.screenshot("1234567891012.png",lang='eng')
         """
         if isinstance(img_file, str) is True:
-            img = Image.open(path.join(IMG_FOLDER + img_file))
-            if lang in TESSERACT_LANG.values() or lang is None:
-                pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
-                if lang is None:
-                    text = pytesseract.pytesseract.image_to_string(img)
-                else:
-                    text = pytesseract.pytesseract.image_to_string(img, lang=lang)
-                return text
-            else:
-                raise PybotException("Kwarg lang must be in tesseract language list values or None")
+            from PIL import Image
+            img = Image.open(img_file if path.isfile(img_file) is True else path.join(IMG_FOLDER + img_file))
+            return self.get_text_data(numpy.asarray(img), lang=lang, config=config, preprocess=preprocess)
         else:
             raise TypeError("First argument img_file has to be a string being the image file name")
 
+    @traced
+    def get_text_data(self, data, lang=None, config="", preprocess=None):
+        """
+        Retrieve text from captured pixels, without any image file. If the cache is enabled, tesseract is only called
+        if the same pixels were not already read with the same language, configuration and preprocessing.
+           :param data: Array of pixels as returned by capture().
+           :param lang: None is default, this parameter specify a language to tesseract.
+           :param config: Tesseract configuration, PSM or characters whitelist for instance.
+           :param preprocess: Preprocess object converting the pixels before tesseract, default is None for
+              self.preprocess, which is None for the raw pixels. False to read the raw pixels anyway.
+           :return: String of the text decrypted, empty if the preprocessing finds no text.
+           :raise TypeError: If config is not a string or preprocess not None, False or a Preprocess object.
+           :raise PybotException: If wrong tesseract lang kwarg (tesseract language). Default is None.
+           :examples:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 test_automaton.get_text_data(test_automaton.capture(), lang='eng')
+                 test_automaton.preprocess = Preprocess(threshold="otsu", scale=2)
+                 test_automaton.get_text_data(test_automaton.capture(), config=tesseract_config(psm=6))
+        """
+        if isinstance(config, str) is False:
+            raise TypeError("Kwarg config must be a string.")
+        if preprocess is None:
+            preprocess = self.preprocess
+        if preprocess is False:
+            preprocess = None
+        elif preprocess is not None and isinstance(preprocess, Preprocess) is False:
+            raise TypeError("Kwarg preprocess must be None, False or a Preprocess object.")
+        if self.ocr_cache is None:
+            return self._read(data, lang, config, preprocess)
+        key_config = config if preprocess is None else "{0}|{1!r}".format(config, preprocess)
+        key = ocr_key(data, lang=lang, config=key_config)
+        text = self.ocr_cache.get(key)
+        if text is None:
+            self.metrics.count("ocr_cache_miss")
+            text = self._read(data, lang, config, preprocess)
+            self.ocr_cache.put(key, text, lang=lang, config=key_config)
+        else:
+            self.metrics.count("ocr_cache_hit")
+        return text
+
+    @traced
+    def find(self, img, bounds=None, similarity=TEMPLATE_SIMILARITY):
+        """
+        Search a template image on the screen with a single capture, the template is decoded once and kept in memory.
+        On the whole screen, a small region around the last location of the template is searched first.
+           :param img: Image path of the template to search.
+           :param bounds: The bounds of the screen to search in, default is None, to search all the screen.
+           :param similarity: Minimum similarity score of the match, between 0 and 1.
+           :return: Match object with the score and screen bounds of the template, None if not found.
+           :raise TypeError: If arg img is not a string type or wrong bounds kwarg type.
+           :raise PybotException: If img file path does not exist.
+           :example:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 match = test_automaton.find("img/1529851880929.png")
+        """
+        if isinstance(img, str) is True:
+            if path.isfile(img) is True:
+                desired_bounds = self._desired_bounds(bounds)
+                if self.prefetcher is not None:
+                    self.prefetcher.advance(img)
+                template = self.templates.get(img)
+                if bounds is None:
+                    region = self.hints.region(img, template.shape, desired_bounds)
+                    if region is not None:
+                        start = perf_counter()
+                        gray = grayscale(self._capture(region))
+                        with self.metrics.stage("match"):
+                            match = match_template(gray, template, similarity=similarity, name=img,
+                                                   offset=region[:2])
+                        self.hints.hint(match is not None, perf_counter() - start)
+                        if match is not None:
+                            self.hints.update(match)
+                            return match
+                start = perf_counter()
+                gray = grayscale(self._capture(desired_bounds))
+                with self.metrics.stage("match"):
+                    match = match_template(gray, template, similarity=similarity, name=img, offset=desired_bounds[:2])
+                if bounds is None:
+                    self.hints.search(match, perf_counter() - start)
+                return match
+            else:
+                raise PybotException('First argument img file path does not exist.')
+        else:
+            raise TypeError('First argument img must be a string.')
+
+    @traced
+    def find_any(self, imgs, bounds=None, similarity=TEMPLATE_SIMILARITY, first=False, max_workers=None):
+        """
+        Search many template images on a single capture of the screen, matched in parallel. Useful to know which
+        dialog is shown with one capture instead of one per image.
+           :param imgs: List of image paths of the templates to search, by priority order.
+           :param bounds: The bounds of the screen to search in, default is None, to search all the screen.
+           :param similarity: Minimum similarity score of the matches, between 0 and 1.
+           :param first: If True, return only the first image found in the priority order.
+           :param max_workers: Maximum number of templates matched at the same time, default depends on the CPU.
+           :return: List of the Match objects of the images found, in the order of imgs. If first is True, the Match
+              object of the first image found or None.
+           :raise TypeError: If imgs is not a list of strings or wrong bounds kwarg type.
+           :raise PybotException: If an image file path does not exist.
+           :example:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 match = test_automaton.find_any(["img/1529851880929.png", "img/1529851890123.png"], first=True)
+        """
+        if isinstance(imgs, (list, tuple)) is False:
+            raise TypeError('First argument imgs must be a list of image paths.')
+        for img in imgs:
+            if isinstance(img, str) is False:
+                raise TypeError('Images must be strings.')
+            if path.isfile(img) is False:
+                raise PybotException('Image file path {0} does not exist.'.format(img))
+        desired_bounds = self._desired_bounds(bounds)
+        if self.prefetcher is not None and len(imgs) != 0:
+            self.prefetcher.advance(imgs[0])
+        templates = [(img, self.templates.get(img)) for img in imgs]
+        gray = grayscale(self._capture(desired_bounds))
+        with self.metrics.stage("match_any"):
+            matches = [match for match in match_templates(gray, templates, similarity=similarity,
+                                                          offset=desired_bounds[:2], max_workers=max_workers)
+                       if match is not None]
+        if bounds is None:
+            for match in matches:
+                self.hints.update(match)
+        if first is True:
+            return matches[0] if len(matches) != 0 else None
+        return matches
+
+    def load_plan(self, plan, wait=False):
+        """
+        Load the action plan of a script, decoding all its templates in background and, while the script runs, the
+        templates of the next actions first. The plan is written next to the script exported by
+        export_sikuli_projects(). If lackey is imported, its functions called by the script are also served the
+        templates from memory, see Pybot.plan.prefetch_lackey().
+           :param plan: Path of the plan (.plan.json) or of a python 3 script to compile, or ActionPlan object.
+           :param wait: If True, return once all the templates are decoded.
+           :return: PlanPrefetcher object, its errors attribute gives the templates that cannot be decoded.
+           :raise TypeError: If plan is not a string or an ActionPlan object.
+           :example:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 test_automaton.load_plan("script/tahomaBee.plan.json")
+                 test_automaton.wait_click("img/1529851880929.png")
+        """
+        if isinstance(plan, str) is True:
+            if plan.endswith(PLAN_EXT) is True:
+                plan = ActionPlan.load(plan)
+            else:
+                with open(plan, mode="r", encoding="utf-8") as script:
+                    plan = ActionPlan.compile(script.read(), name=plan)
+        elif isinstance(plan, ActionPlan) is False:
+            raise TypeError("First argument plan must be a path or an ActionPlan object.")
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+        if self.lackey_loader is not None:
+            self.lackey_loader.stop()
+        self.prefetcher = PlanPrefetcher(plan, self.templates).start()
+        self.lackey_loader = prefetch_lackey(plan, wait=wait)
+        if wait is True:
+            self.prefetcher.wait()
+        return self.prefetcher
+
+    @traced
     def check_click(self, img, sleep_sec=0, after_click=None):
         """
         Method checking if button exist and clicking on it, return True is clicked False on contrary. Eventually sleep.
+        The click is done on the coordinates found by the check, without searching the image again.
            :param img: Image path to work on. Check if exist and click.
            :param sleep_sec: Number of seconds of seconds to eventually sleep after the click.
            :param after_click: Another image to eventually click after the first click and before the sleep.
@@ -227,45 +609,169 @@ class Pybot:
            :raise TypeError: If arg (img) or kwarg (after_click) are not string type.
            :raise PybotException: If img or after_click file path does not exist.
         """
-        if isinstance(img, str) is True:
-            if path.isfile(img) is True:
-                if exists(img) is None:
-                    return False
-                else:
-                    click(img)
-                    if isinstance(after_click, str) is True:
-                        if path.isfile(after_click) is True:
-                            if after_click is not None and exists(after_click) is not None:
-                                click(after_click)
-                            self._check_n_sleep(sleep_sec)
-                            return True
-                        else:
-                            raise PybotException('Kwarg after_click file path does not exist.')
-                    else:
-                        raise TypeError('Kwarg after_click must be a string.')
-            else:
-                raise PybotException('First argument img file path does not exist.')
+        match = self.find(img)
+        if match is None:
+            return False
         else:
-            raise TypeError('First argument img must be a string.')
+            self._click_match(match)
+            if after_click is not None:
+                if isinstance(after_click, str) is True:
+                    if path.isfile(after_click) is True:
+                        after_match = self.find(after_click)
+                        if after_match is not None:
+                            self._click_match(after_match)
+                    else:
+                        raise PybotException('Kwarg after_click file path does not exist.')
+                else:
+                    raise TypeError('Kwarg after_click must be a string.')
+            self._check_n_sleep(sleep_sec)
+            return True
 
-    def wait_click(self, img, sleep_sec=0):
+    @traced
+    def wait_click(self, img, sleep_sec=0, timeout=WAIT_TIMEOUT):
         """
         Method that wait for a button to appear and click on it. Eventually sleep sleep_sec seconds after.
+        The screen is captured once per attempt and the click is done where the image was found.
            :param img: Image to wait for and click.
            :param sleep_sec: Number of seconds of seconds to eventually sleep after the click.
+           :param timeout: Number of seconds to wait for the image.
+           :return: Match object of the image clicked.
            :raise TypeError: If first argument img is not string type.
-           :raise PybotException: If first argument img file path does not exist.
+           :raise PybotException: If first argument img file path does not exist or image not found before timeout.
+        """
+        result = self.wait_template(img, timeout=timeout)
+        if result.ok is False:
+            raise PybotException('Image {0} not found after {1} seconds.'.format(img, timeout))
+        self._click_match(result.value)
+        self._check_n_sleep(sleep_sec)
+        return result.value
+
+    @traced
+    def wait_change(self, bounds=None, timeout=WAIT_TIMEOUT, threshold=CHANGE_THRESHOLD):
+        """
+        Wait for a region of the screen to change, comparing downscaled frames with an adaptive polling.
+           :param bounds: The bounds of the region to watch, default is None, to watch all the screen.
+           :param timeout: Maximum number of seconds to wait.
+           :param threshold: Difference in gray levels (0 to 255) of the most changed block of 4 x 4 pixels considered
+              as a change.
+           :return: WaitResult object, its value is the last frame difference.
+           :raise TypeError: If wrong bounds or timeout kwarg type.
+           :example:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 test_automaton.type_n_time(1, Key.ENTER)
+                 print(test_automaton.wait_change(timeout=10).elapsed)
         """
-        if isinstance(img, str) is True:
-            if path.isfile(img) is True:
-                wait(img)
-                click(img)
-                self._check_n_sleep(sleep_sec)
-            else:
-                raise PybotException('First argument img file path does not exist.')
-        else:
-            raise TypeError('First argument img must be a string.')
+        return wait_until(self._change_probe(bounds, threshold), timeout)
+
+    @traced
+    def wait_settle(self, bounds=None, timeout=WAIT_TIMEOUT, settle_sec=SETTLE_SEC, threshold=CHANGE_THRESHOLD):
+        """
+        Wait for a region of the screen to stop changing during settle_sec seconds.
+           :param bounds: The bounds of the region to watch, default is None, to watch all the screen.
+           :param timeout: Maximum number of seconds to wait.
+           :param settle_sec: Number of seconds without change for the region to be settled.
+           :param threshold: Difference in gray levels (0 to 255) of the most changed block of 4 x 4 pixels considered
+              as a change.
+           :return: WaitResult object, its value is the last frame difference.
+           :raise TypeError: If wrong bounds or timeout kwarg type.
+        """
+        return wait_until(self._settle_probe(bounds, settle_sec, threshold), timeout, poll=settle_poll(settle_sec))
+
+    @traced
+    def wait_template(self, img, bounds=None, timeout=WAIT_TIMEOUT, similarity=TEMPLATE_SIMILARITY):
+        """
+        Wait for a template image to appear on the screen.
+           :param img: Image path of the template to wait for.
+           :param bounds: The bounds of the region to search in, default is None, to search all the screen.
+           :param timeout: Maximum number of seconds to wait.
+           :param similarity: Minimum similarity score of the match, between 0 and 1.
+           :return: WaitResult object, its value is the Match object or None.
+           :raise TypeError: If arg img is not a string type or wrong bounds or timeout kwarg type.
+           :raise PybotException: If img file path does not exist.
+        """
+        return wait_until(self._template_probe(img, bounds, similarity), timeout)
+
+    @traced
+    def wait_text(self, pattern, bounds=None, lang=None, timeout=WAIT_TIMEOUT):
+        """
+        Wait for a text to appear on the screen. Tesseract only reads the frames that changed, to the pixel.
+           :param pattern: Regular expression searched in the text of the screen.
+           :param bounds: The bounds of the region to read, default is None, to read all the screen.
+           :param lang: Specify a lang for the image text by tesseract.
+           :param timeout: Maximum number of seconds to wait.
+           :return: WaitResult object, its value is the text read.
+           :raise TypeError: If wrong bounds or timeout kwarg type.
+           :raise PybotException: If wrong tesseract lang kwarg (tesseract language).
+        """
+        return wait_until(self._text_probe(pattern, bounds, lang), timeout)
+
+    def _change_probe(self, bounds, threshold):
+        """
+        Probe of wait_change(), the reference frame being captured when it is created.
+           :return: Function without argument returning a tuple (done, value, changed) for wait_until().
+        """
+        desired_bounds = self._desired_bounds(bounds)
+        reference = signature(self._capture(desired_bounds))
+
+        def probe():
+            diff = difference(reference, signature(self._capture(desired_bounds)))
+            return diff > threshold, diff, diff > threshold
+
+        return probe
+
+    def _settle_probe(self, bounds, settle_sec, threshold):
+        """
+        Probe of wait_settle(), the first frame being captured when it is created.
+           :return: Function without argument returning a tuple (done, value, changed) for wait_until().
+        """
+        desired_bounds = self._desired_bounds(bounds)
+        state = {"frame": signature(self._capture(desired_bounds)), "since": monotonic()}
+
+        def probe():
+            frame = signature(self._capture(desired_bounds))
+            diff = difference(state["frame"], frame)
+            now = monotonic()
+            if diff > threshold:
+                state["frame"] = frame
+                state["since"] = now
+            return now - state["since"] >= settle_sec, diff, diff > threshold
+
+        return probe
+
+    def _template_probe(self, img, bounds, similarity):
+        """
+        Probe of wait_template().
+           :return: Function without argument returning a tuple (done, value, changed) for wait_until().
+        """
+        def probe():
+            match = self.find(img, bounds=bounds, similarity=similarity)
+            return match is not None, match, False
+
+        return probe
+
+    def _text_probe(self, pattern, bounds, lang):
+        """
+        Probe of wait_text(), tesseract reading only the frames that changed.
+           :return: Function without argument returning a tuple (done, value, changed) for wait_until().
+        """
+        desired_bounds = self._desired_bounds(bounds)
+        regex = re.compile(pattern)
+        state = {"frame": None, "text": ""}
+
+        def probe():
+            data = self._capture(desired_bounds)
+            frame = ocr_key(data)
+            changed = frame != state["frame"]
+            if changed is True:
+                state["frame"] = frame
+                state["text"] = self.get_text_data(data, lang=lang)
+            return regex.search(state["text"]) is not None, state["text"], changed
+
+        return probe
 
+    @traced
     def type_n_time(self, n, key, sleep_sec=0):
         """
         Type n time the desired key. Eventually sleep sleep_sec seconds.
@@ -283,13 +789,14 @@ class Pybot:
         if isinstance(n, (int, float)):
             i = 0
             while i < n:
-                type(key)
+                self.screen.type(key)
                 self._check_n_sleep(sleep_sec)
                 i += 1
         else:
             raise TypeError(
                 "n is the number of time to type the key, therefore must be an int or float.")
 
+    @traced
     def exec_cmd(self, cmd, sleep_sec=0):
         """
         Execute command on Windows OS.
@@ -310,6 +817,7 @@ class Pybot:
         else:
             raise TypeError('First argument cmd must be an str type.')
 
+    @traced
     def start_android_gui(self, sleep_sec=5, fullscreen=True):
         """
         Start Android mirroring with SCRCPY_EXE if connected and full screen it.
@@ -320,8 +828,8 @@ class Pybot:
         """
         if isinstance(fullscreen, bool) is True:
             if self.android_number() == 1:
-                return_code = self.start_pgm(
-                    SCRCPY_EXE, working_directory=SCRCPY_FOLDER, sleep_sec=sleep_sec)
+                self.android_gui = self.start_pgm(SCRCPY_EXE, working_directory=SCRCPY_FOLDER, sleep_sec=sleep_sec)
+                return_code = bool(self.android_gui)
             else:
                 return_code = False
             if fullscreen is True:
@@ -348,47 +856,71 @@ class Pybot:
         """
         self.ctrl_shorcut('x')
 
-    def android_home(self):
+    @traced
+    def android_home(self, serial=None):
         """
         click on HOME.
+           :param serial: Serial number of the device to send the key event to through adb, default is None to type
+              the scrcpy shortcut in the focused window.
         """
-        self.ctrl_shorcut('h')
+        self._android_key('h', 'home', serial)
 
-    def android_back(self):
+    @traced
+    def android_back(self, serial=None):
         """
         click on BACK.
+           :param serial: Serial number of the device to send the key event to through adb, default is None to type
+              the scrcpy shortcut in the focused window.
         """
-        self.ctrl_shorcut('b')
+        self._android_key('b', 'back', serial)
 
-    def android_app_switch(self):
+    @traced
+    def android_app_switch(self, serial=None):
         """
         click on APP_SWITCH.
+           :param serial: Serial number of the device to send the key event to through adb, default is None to type
+              the scrcpy shortcut in the focused window.
         """
-        self.ctrl_shorcut('m')
+        self._android_key('m', 'app_switch', serial)
 
-    def android_volume_up(self):
+    @traced
+    def android_volume_up(self, serial=None):
         """
         click on VOLUME_UP.
+           :param serial: Serial number of the device to send the key event to through adb, default is None to type
+              the scrcpy shortcut in the focused window.
         """
-        self.ctrl_shorcut('+')
+        self._android_key('+', 'volume_up', serial)
 
-    def android_volume_down(self):
+    @traced
+    def android_volume_down(self, serial=None):
         """
         click on VOLUME_DOWN.
+           :param serial: Serial number of the device to send the key event to through adb, default is None to type
+              the scrcpy shortcut in the focused window.
         """
-        self.ctrl_shorcut('-')
+        self._android_key('-', 'volume_down', serial)
 
-    def turn_screen_on(self):
+    @traced
+    def turn_screen_on(self, serial=None):
         """
         turn screen on.
+           :param serial: Serial number of the device to send the key event to through adb, default is None to right
+              click in the scrcpy window.
         """
-        rightClick()
+        if serial is None:
+            self.screen.rightClick()
+        else:
+            self.android_input(serial).keyevent('wakeup')
 
-    def android_power(self):
+    @traced
+    def android_power(self, serial=None):
         """
         click on POWER.
+           :param serial: Serial number of the device to send the key event to through adb, default is None to type
+              the scrcpy shortcut in the focused window.
         """
-        self.ctrl_shorcut('p')
+        self._android_key('p', 'power', serial)
 
     def android_paste_clipboard(self):
         """paste computer clipboard to device2
@@ -401,12 +933,47 @@ class Pybot:
         """
         self.ctrl_shorcut('i')
 
+    @traced
     def ctrl_shorcut(self, key):
         """
         Type a key with the key modifier CTRL.
            :param key: The key to type with the CTRL modifier.
         """
-        type(key, Key.CTRL)
+        self.screen.type(key, Key.CTRL)
+
+    def android_input(self, serial):
+        """
+        Input backend of an Android device, sending key events, taps, swipes and texts through a persistent adb shell
+        session. It works without the scrcpy window and with many devices.
+           :param serial: Serial number of the device.
+           :return: AndroidInput object, the same for a given serial number.
+           :raise TypeError: If serial is not a string.
+           :example:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 android_input = test_automaton.android_input("R58M123ABC")
+                 android_input.tap(540, 960)
+                 android_input.text("hello world")
+                 print(android_input.sync())
+        """
+        if isinstance(serial, str) is False:
+            raise TypeError('First argument serial must be a string.')
+        if serial not in self.android_inputs:
+            self.android_inputs[serial] = AndroidInput(path.join(SCRCPY_FOLDER, ADB_CMD), serial)
+        return self.android_inputs[serial]
+
+    def _android_key(self, shortcut, key, serial):
+        """
+        Internal method pressing an Android key, with the scrcpy shortcut or through adb.
+           :param shortcut: The scrcpy shortcut, typed with the CTRL modifier.
+           :param key: Name of the key in KEYCODES.
+           :param serial: Serial number of the device, None to use the scrcpy shortcut.
+        """
+        if serial is None:
+            self.ctrl_shorcut(shortcut)
+        else:
+            self.android_input(serial).keyevent(key)
 
     def check_android_gui(self):
         """
@@ -417,27 +984,48 @@ class Pybot:
 
     def stop_android_gui(self):
         """
-        Stop SCRCPY_EXE processes.
+        Stop SCRCPY_EXE processes, the ones started by start_android_gui() or not.
            :return: Boolean True if command executed correctly, False on contrary.
         """
+        self.android_gui = None
         return self.kill_pgm(SCRCPY_EXE)
 
+    @traced
     def android(self):
         """
-        Access connected Android device via adb.exe.
+        Access connected Android device via adb.exe. The device list is kept by the device registry, adb is polled
+        only when the list is older than DEVICE_TTL, or not at all if self.devices.track() was called.
            :return: Tuple containing the Android Serial number and device type.
         """
-        adb_output = subprocess.check_output(
-            [path.join(SCRCPY_FOLDER, ADB_CMD), "devices"]).decode()
-        tup = re.findall("\n([\w]*)\t([\w]*)\r", adb_output)
-        android_arr = []
-        if tup is not None:
-            l = len(tup)
-            i = 0
-            while i < l:
-                android_arr.append({"type": tup[i][1], "num": tup[i][0]})
-                i += 1
-        return android_arr
+        with self.metrics.stage("android_devices"):
+            return self.devices.devices()
+
+    def android_screen(self, serial=None, stream=False):
+        """
+        Capture source of an Android screen, reading the device framebuffer through adb instead of the scrcpy window.
+        Its capture() method returns the same array format as Pybot.capture(), to be read with get_text_data() for
+        instance.
+           :param serial: Serial number of the device, default is None for the only device connected.
+           :param stream: If True, start a persistent adb session used by the following captures.
+           :return: AndroidScreen object, the same for a given serial number.
+           :raise PybotException: If serial is None and the number of Android device connected is not 1.
+           :example:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 android_screen = test_automaton.android_screen(stream=True)
+                 test_automaton.get_text_data(android_screen.capture(), lang='eng')
+        """
+        if serial is None:
+            devices = self.android()
+            if len(devices) != 1:
+                raise PybotException("Kwarg serial is required unless exactly one Android device is connected.")
+            serial = devices[0]["num"]
+        if serial not in self.android_screens:
+            self.android_screens[serial] = AndroidScreen(path.join(SCRCPY_FOLDER, ADB_CMD), serial)
+        if stream is True:
+            self.android_screens[serial].start()
+        return self.android_screens[serial]
 
     def android_connected(self):
         """
@@ -453,45 +1041,110 @@ class Pybot:
         """
         return len(self.android())
 
-    def start_pgm(self, pgm, working_directory=None, pgm_arg=None, sleep_sec=0):
+    def run_devices(self, task, serials=None, max_workers=RUNNER_WORKERS):
+        """
+        Run a task against many Android devices in parallel, each worker with its own device context. A failing device
+        does not stop the others.
+           :param task: Callable taking a DeviceContext object (serial, screen, input). The scripts exported by
+              export_sikuli_script() drive the desktop through lackey and not the devices, they are not accepted.
+           :param serials: List of the serial numbers, default is None for all the devices connected and authorized.
+           :param max_workers: Maximum number of devices driven at the same time.
+           :return: Dictionary of the serial numbers and the DeviceResult objects (serial, ok, value, error, elapsed).
+           :raise TypeError: If task is not a callable or serials is not None or a list of strings.
+           :example:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+
+                 def home(device):
+                     device.input.keyevent("home")
+                     return test_automaton.get_text_data(device.screen.capture(), lang='eng')
+
+                 for serial, result in test_automaton.run_devices(home).items():
+                     print(serial, result.ok, result.elapsed)
+        """
+        if callable(task) is False:
+            raise TypeError("First argument task must be a callable taking a DeviceContext object.")
+        if serials is None:
+            serials = [device["num"] for device in self.android() if device["type"] == "device"]
+        elif isinstance(serials, (list, tuple)) is False or any(isinstance(serial, str) is False for serial in serials):
+            raise TypeError('Kwarg serials must be a list of strings.')
+        contexts = [DeviceContext(serial, self.android_screen(serial), self.android_input(serial))
+                    for serial in serials]
+        return run_devices(task, contexts, max_workers=max_workers)
+
+    @traced
+    def start_pgm(self, pgm, working_directory=None, pgm_arg=None, sleep_sec=0, ready=None, timeout=START_TIMEOUT):
         """
-        Start a program in background in a given directory on Windows OS.
-           :param pgm: Program to start.
-           :param working_directory: Working directory to start the program, with the .exe extension.
+        Start a program in background in a given directory. Instead of sleeping, wait for readiness probes like
+        port_open(), log_line(), file_exists() or template_found() of the Pybot.program module.
+           :param pgm: Program to start, with the .exe extension.
+           :param working_directory: Working directory to start the program.
            :param pgm_arg: Eventual argument of the program to start.
-           :param sleep_sec: Number of seconds of seconds to eventually sleep after the click.
-           :return: True if return code of the command is 0, false on contrary.
+           :param sleep_sec: Number of seconds of seconds to eventually sleep after the start.
+           :param ready: Probe callable, or list of probe callables, the program is ready when they all pass.
+           :param timeout: Maximum number of seconds to wait for the readiness probes.
+           :return: ProgramHandle object with the pid, the output and exit status of the program. Its ready attribute
+              is the WaitResult of the probes. It is False if the program ended with an error.
            :raise TypeError: If kwarg pgm_arg or working_direcory kwarg are not None or string type.
+           :raise PybotException: If the program cannot be started.
            :examples:
               .. code-block:: python
-              
+
                  test_automaton = Pybot()
-                 test_automaton.start_pgm('node.exe', working_directory='server', sleep_sec=5)
+                 handle = test_automaton.start_pgm('node.exe', working_directory='server', pgm_arg='index.js',
+                                                   ready=port_open(8080))
+                 print(handle.pid, handle.ready.elapsed)
         """
         if isinstance(pgm_arg, str) is True or pgm_arg is None:
-            if isinstance(working_directory, str) is True or pgm_arg is None:
-                if working_directory is None:
-                    prefix = ""
-                else:
-                    prefix = "cd {0} && ".format(working_directory)
-
-                if pgm_arg is None:
-                    suffix = ""
-                else:
-                    suffix = " {0}".format(pgm_arg)
-
-                cmd = "{0}START CMD /C {1}{2}".format(prefix, pgm, suffix)
-                rt = self.exec_cmd(cmd)
+            if isinstance(working_directory, str) is True or working_directory is None:
+                args = [pgm]
+                if working_directory is not None and path.isfile(path.join(working_directory, pgm)) is True:
+                    args = [path.abspath(path.join(working_directory, pgm))]
+                if pgm_arg is not None:
+                    args += shlex.split(pgm_arg, posix=self.os_type != "Windows")
+                try:
+                    handle = ProgramHandle(args, cwd=working_directory)
+                except OSError as error:
+                    raise PybotException("Program {0} cannot be started: {1}".format(pgm, error))
+                if ready is not None:
+                    handle.wait_ready(ready, timeout=timeout)
                 self._check_n_sleep(sleep_sec)
-                return rt
+                return handle
             else:
                 raise TypeError('Kwarg working_directory must a string type.')
         else:
             raise TypeError('Kwarg pgm_arg must a string type.')
 
+    @traced
+    def start_pgms(self, pgms, timeout=START_TIMEOUT):
+        """
+        Start many programs at once, their readiness probes being waited for concurrently.
+           :param pgms: List of dictionaries of the start_pgm() arguments (pgm, working_directory, pgm_arg, ready).
+           :param timeout: Maximum number of seconds to wait for the readiness probes.
+           :return: List of ProgramHandle objects, in the order of pgms.
+           :raise TypeError: If pgms is not a list of dictionaries.
+           :raise PybotException: If a program cannot be started.
+           :examples:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 test_automaton.start_pgms([{"pgm": "node.exe", "pgm_arg": "api.js", "ready": port_open(8080)},
+                                            {"pgm": "node.exe", "pgm_arg": "web.js", "ready": port_open(3000)}])
+        """
+        if isinstance(pgms, (list, tuple)) is False or any(isinstance(pgm, dict) is False for pgm in pgms):
+            raise TypeError('First argument pgms must be a list of dictionaries.')
+        handles = [self.start_pgm(**dict(pgm, ready=None)) for pgm in pgms]
+        waits = [(handle, pgm["ready"]) for handle, pgm in zip(handles, pgms) if pgm.get("ready") is not None]
+        if len(waits) != 0:
+            with ThreadPoolExecutor(max_workers=len(waits)) as executor:
+                list(executor.map(lambda wait: wait[0].wait_ready(wait[1], timeout=timeout), waits))
+        return handles
+
+    @traced
     def check_pgm(self, pgm):
         """
-        Check if a program is running.
+        Check if a program is running, from a snapshot of the process table read at most every PROCESS_TTL seconds.
            :param pgm: Program to check, with the .exe extension.
            :return: True if program running, false on contrary.
            :raise TypeError: If only argument pgm is not a string.
@@ -503,32 +1156,62 @@ class Pybot:
                  test_automaton.check_pgm("Firefox.exe")
         """
         if isinstance(pgm, str) is True:
-            cmd = COMMANDS["check_process"][self.os_type].format(pgm)
-            #cmd = 'tasklist /FI "IMAGENAME eq {0}" 2>NUL | find /I /N "{0}">NUL'.format(
-            #    pgm)
-            return self.exec_cmd(cmd, sleep_sec=0)
+            return self.processes.running(pgm)
         else:
             raise TypeError('First argument pgm must be a string type.')
 
+    @traced
+    def check_pgms(self, pgms):
+        """
+        Check if many programs are running, from the same snapshot of the process table.
+           :param pgms: List of the programs to check, with the .exe extension.
+           :return: Dictionary of the programs and True if running, False on contrary.
+           :raise TypeError: If only argument pgms is not a list of strings.
+
+           :examples:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 test_automaton.check_pgms(["Firefox.exe", "node.exe"])
+        """
+        self._check_pgms(pgms)
+        return self.processes.running_all(pgms)
+
+    @traced
     def kill_pgm(self, pgm, sleep_sec=0):
         """
-        Kill a program
+        Kill a program, its processes are signaled directly without any shell.
            :param pgm: Program to kill, with the .exe extension.
            :param sleep_sec: Number of seconds of seconds to eventually sleep after the click.
-           :return: True if return code of the command is 0, false on contrary.
-           :raise TypeError: If kwarg pgm_arg or working_direcory kwarg are not None or string type.
+           :return: True if processes of the program were killed, false on contrary.
+           :raise TypeError: If only argument pgm is not a string type.
         """
         if isinstance(pgm, str) is True:
-            cmd = COMMANDS["kill_process"][self.os_type].format(pgm)
-            return_code = self.exec_cmd(cmd, sleep_sec=0)
+            return_code = self.processes.kill([pgm])[pgm]
             self._check_n_sleep(sleep_sec)
             return return_code
         else:
             raise TypeError('First argument pgm must a string type.')
 
+    @traced
+    def kill_pgms(self, pgms, sleep_sec=0):
+        """
+        Kill many programs, from the same snapshot of the process table.
+           :param pgms: List of the programs to kill, with the .exe extension.
+           :param sleep_sec: Number of seconds of seconds to eventually sleep after the kills.
+           :return: Dictionary of the programs and True if processes of the program were killed, False on contrary.
+           :raise TypeError: If only argument pgms is not a list of strings.
+        """
+        self._check_pgms(pgms)
+        result = self.processes.kill(pgms)
+        self._check_n_sleep(sleep_sec)
+        return result
+
+    @traced
     def start_web(self, url, sleep_sec=0):
         """
-        Start a website on the default browser, wait 5 seconds for it to open and full screen it on Windows OS.
+        Start a website on the default browser, wait up to START_WEB_TIMEOUT seconds for the screen to change and
+        settle, then full screen it on Windows OS.
            :param url: URL of the website.
            :param sleep_sec: Number of seconds of seconds to eventually sleep after the click.
            :return: True if return code of the command is 0, false on contrary.
@@ -541,9 +1224,11 @@ class Pybot:
         """
         if isinstance(url, str) is True:
             cmd = "START {0}".format(url)
-            return_code = self.exec_cmd(cmd, sleep_sec=5)
-            sleep(sleep_sec)
-            type(Key.F11)
+            return_code = self.exec_cmd(cmd)
+            self.wait_change(timeout=START_WEB_TIMEOUT)
+            self.wait_settle(timeout=START_WEB_TIMEOUT)
+            self._check_n_sleep(sleep_sec)
+            self.screen.type(Key.F11)
             return return_code
 
         else:
@@ -575,6 +1260,23 @@ class Pybot:
         """
         return self._export_sikuli(project_name, "script")
 
+    def export_sikuli_projects(self, projects=None, directory="script", max_workers=None):
+        """
+        Export many sikuli projects in parallel, converted to python 3. The projects and images unchanged since the
+        previous export are skipped.
+           :param projects: List of the project names, default is None for all the projects of sikuli_project/.
+           :param directory: Export directory, script for the script library or Pybot for the Pybot package.
+           :param max_workers: Maximum number of projects exported at the same time, default depends on the CPU.
+           :return: Dictionary of the project names and ExportResult objects (project, exported, images, error).
+           :raise TypeError: If projects is not None or a list of strings.
+           :examples:
+              .. code-block:: python
+
+                 test_automaton = Pybot()
+                 test_automaton.export_sikuli_projects(["tahomaBee", "papit"])
+        """
+        return export_projects(projects, directory=directory, img_folder=IMG_FOLDER, max_workers=max_workers)
+
     def _export_sikuli(self, project_name, directory):
         """
         Export a sikuli project class to the Pybot package on Windows OS.
@@ -617,29 +1319,149 @@ class Pybot:
             raise TypeError(
                 "sleep_sec kwarg is a time in to sleep after click, therefore must be an int or float.")
 
+    def _check_pgms(self, pgms):
+        """
+        Internal method checking pgms is a list of program names.
+           :param pgms: List of the programs.
+           :raise TypeError: If pgms is not a list of strings.
+        """
+        if isinstance(pgms, (list, tuple)) is False or any(isinstance(pgm, str) is False for pgm in pgms):
+            raise TypeError('First argument pgms must be a list of strings.')
+
+    def _desired_bounds(self, bounds):
+        """
+        Internal method validating the bounds of a capture.
+           :param bounds: The bounds of the image to take, None meaning all the screen.
+           :return: The bounds to capture.
+           :raise TypeError: If bounds is not None or a tuple of the right length.
+        """
+        if bounds is None:
+            return self.screen_bounds
+        elif isinstance(bounds, tuple) is False:
+            raise TypeError('Kwarg bounds must be tuple type (of bounds)')
+        elif len(bounds) == 4 * self.num_screen:
+            return bounds
+        else:
+            raise TypeError(
+                "Bound kwarg has to be a tuple with length of 4 multiply by the number of screen(s).")
+
+    def _capture(self, bounds):
+        """
+        Internal method capturing a region of the screen, timed as the capture stage.
+           :param bounds: Tuple (x, y, width, height) of the region.
+           :return: The captured pixels as an array (height, width, channels).
+        """
+        with self.metrics.stage("capture"):
+            return self.screen.capture(bounds)
+
+    def _click_match(self, match):
+        """
+        Internal method clicking on the center of a match.
+           :param match: Match object returned by find().
+        """
+        self.screen.click(*match.center)
+
+    def _read(self, data, lang, config, preprocess):
+        """
+        Internal method preprocessing captured pixels and reading them with tesseract.
+           :param data: Array of pixels.
+           :param lang: Tesseract language or None.
+           :param config: Tesseract configuration.
+           :param preprocess: Preprocess object or None for the raw pixels.
+           :return: String of the text decrypted, empty if the preprocessing finds no text.
+        """
+        from PIL import Image
+        if preprocess is not None:
+            with self.metrics.stage("preprocess"):
+                data = preprocess.apply(data)
+            if data is None:
+                self.metrics.count("ocr_blank")
+                return ""
+        return self._ocr(Image.fromarray(data), lang=lang, config=config)
+
+    def _tile_reader(self, bounds, lang, config, preprocess):
+        """
+        Internal method giving the incremental reader of a region, created on first use.
+           :param bounds: The bounds of the region, None for all the screen.
+           :param lang: Tesseract language or None.
+           :param config: Tesseract configuration.
+           :param preprocess: Preprocess object, None for self.preprocess, False for the raw pixels.
+           :return: TileOcr object.
+           :raise TypeError: If config is not a string or preprocess not None, False or a Preprocess object.
+        """
+        if isinstance(config, str) is False:
+            raise TypeError("Kwarg config must be a string.")
+        if preprocess is None:
+            preprocess = self.preprocess
+        if preprocess is False:
+            preprocess = None
+        elif preprocess is not None and isinstance(preprocess, Preprocess) is False:
+            raise TypeError("Kwarg preprocess must be None, False or a Preprocess object.")
+        key = (self._desired_bounds(bounds), lang, config, repr(preprocess))
+        if key not in self.tile_readers:
+            self.tile_readers[key] = TileOcr(lambda data: self._read_words(data, lang, config, preprocess))
+        return self.tile_readers[key]
+
+    def _read_words(self, data, lang, config, preprocess):
+        """
+        Internal method reading the words of captured pixels with their location.
+           :param data: Array of pixels.
+           :param lang: Tesseract language or None.
+           :param config: Tesseract configuration.
+           :param preprocess: Preprocess object or None for the raw pixels.
+           :return: List of Word objects, in the coordinates of the pixels.
+        """
+        from PIL import Image
+        x, y, scale = 0, 0, 1
+        if preprocess is not None:
+            with self.metrics.stage("preprocess"):
+                data, x, y = preprocess.transform(data)
+            if data is None:
+                self.metrics.count("ocr_blank")
+                return []
+            scale = preprocess.scale
+        return [Word(word.text, x + word.x // scale, y + word.y // scale, -(-word.width // scale),
+                     -(-word.height // scale), word.line)
+                for word in self._ocr(Image.fromarray(data), lang=lang, config=config, words=True)]
+
+    def _ocr(self, img, lang=None, config="", words=False):
+        """
+        Internal method running tesseract on an in memory image.
+           :param img: PIL image to read.
+           :param lang: None is default, this parameter specify a language to tesseract.
+           :param config: Tesseract configuration.
+           :param words: If True, return the words read with their location instead of the text.
+           :return: String of the text decrypted, or list of Word objects if words is True.
+           :raise PybotException: If wrong tesseract lang kwarg (tesseract language).
+        """
+        if lang in TESSERACT_LANG.values() or lang is None:
+            import pytesseract
+            pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+            kwargs = {"config": config} if lang is None else {"lang": lang, "config": config}
+            with self.metrics.stage("ocr"):
+                if words is False:
+                    return pytesseract.pytesseract.image_to_string(img, **kwargs)
+                data = pytesseract.pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT, **kwargs)
+            return [Word(text.strip(), data["left"][i], data["top"][i], data["width"][i], data["height"][i],
+                         (data["block_num"][i], data["par_num"][i], data["line_num"][i]))
+                    for i, text in enumerate(data["text"]) if text.strip() and float(data["conf"][i]) >= 0]
+        else:
+            raise PybotException("Kwarg lang must be in tesseract language list values or None")
+
     def _cache_automaton_screen(self):
-        """Caching the computer and screen, called if cache kwarg of the constructor is True (default)."""
-        if self.cache is True:
-            makedirs(self.database_directory, exist_ok=True)
-            db = sqlite3.connect(path.join(self.database_directory, self.database))
-            db.execute(
-                '''CREATE TABLE IF NOT EXISTS computer 
-                (node TEXT PRIMARY KEY, os_type TEXT, os_version TEXT, ts TIMESTAMP);''')
+        """Caching the computer and screen, called when the cache database is opened."""
+        if self._db is not None:
+            request = '''SELECT COUNT (*)
+            FROM (SELECT width, height
+                FROM screen
+                WHERE node = ? AND (width != ? OR height != ?) GROUP BY width, height);'''
+            res = self._db.query(request, (self.computer, self.screen_width, self.screen_height,))[0][0]
             request = "INSERT OR REPLACE INTO computer VALUES(?, ?, ?, DATETIME('now', 'localtime'));"
-            db.execute(request, (self.computer, self.os_type, self.os_version,))
-            db.execute(
-                'CREATE TABLE IF NOT EXISTS screen (node TEXT, width INT, height INT, ts TIMESTAMP);')
+            self._db.execute(request, (self.computer, self.os_type, self.os_version,))
             request = "INSERT INTO screen VALUES(?, ?, ?, DATETIME('now', 'localtime'));"
-            db.execute(request, (self.computer, self.screen_width, self.screen_height,))
-            db.commit()
-            request = '''SELECT COUNT (*) 
-            FROM (SELECT node, width, height 
-                FROM screen 
-                WHERE node = ? GROUP BY node, width, height);'''
-            cur = db.cursor()
-            cur.execute(request, (self.computer,))
-            res = cur.fetchone()[0]
-            if res > 1:
+            self._db.execute(request, (self.computer, self.screen_width, self.screen_height,))
+            if res > 0 and self.screen.interactive is True:
+                import easygui
                 if easygui.ynbox(
                         '''Various screens have been used by this computer.\nIt can mess with Sikuli image recognition.
 Shall I continue?''',
@@ -647,24 +1469,3 @@ Shall I continue?''',
                     pass
                 else:
                     sys.exit(0)
-            cur.close()
-            db.close()
-
-    def _cache_screenshot(self, file_name, text=""):
-        """
-        Caching the the name of the screenshot image.
-           :param file_name: Name of the image file to cache.
-           :param text: Text detected in the image by tesseract.
-           :raise TypeError: If first argument file_name is not a string type.
-        """
-        if isinstance(file_name, str) is True:
-            if self.cache is True:
-                db = sqlite3.connect(path.join(self.database_directory, self.database))
-                db.execute('''CREATE TABLE IF NOT EXISTS screenshot 
-                    (image TEXT PRIMARY KEY, node TEXT, text TEXT, ts TIMESTAMP);''')
-                request = "INSERT OR REPLACE INTO screenshot VALUES(?, ?, ?, DATETIME('now', 'localtime'));"
-                db.execute(request, (file_name, self.computer, text,))
-                db.commit()
-                db.close()
-        else:
-            raise TypeError('First argument file_name must be a string type.')
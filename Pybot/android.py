@@ -0,0 +1,452 @@
+"""
+=======
+Android
+=======
+   Registry of the Android devices connected through adb. The device list is kept in memory, updated by polling
+   ``adb devices`` when older than a TTL, or continuously by a single long lived ``adb track-devices`` stream.
+   Callbacks can subscribe to the connection and disconnection of the devices.
+   The screen of a device is captured straight from its framebuffer with ``adb exec-out screencap``, eventually through
+   a persistent session to avoid starting adb on each capture. The input events are sent through a persistent adb shell
+   session per device, without waiting for each command to end.
+"""
+import re
+import shlex
+import struct
+import subprocess
+from itertools import count
+from threading import Thread, Lock, Event
+from time import monotonic, perf_counter
+
+import numpy
+
+DEVICE_TTL = 1.0
+TRACK_TIMEOUT = 5.0
+INPUT_STOP_TIMEOUT = 5.0
+DEVICE_REGEX = re.compile(r"^(\S+)\t(.+?)\r?$", re.MULTILINE)
+SCREENCAP_BYTES = {1: 4, 2: 4, 3: 3}  # Bytes per pixel of RGBA_8888, RGBX_8888 and RGB_888 formats
+KEYCODES = {
+    "home": 3,
+    "back": 4,
+    "volume_up": 24,
+    "volume_down": 25,
+    "power": 26,
+    "app_switch": 187,
+    "wakeup": 224,
+}
+
+
+def adb_command(adb, *args):
+    """
+    Command line of an adb call.
+       :param adb: Path of the adb executable, or list of the command starting adb.
+       :param args: Arguments of adb.
+       :return: List of the command line arguments.
+    """
+    if isinstance(adb, str) is True:
+        return [adb] + list(args)
+    else:
+        return list(adb) + list(args)
+
+
+def parse_devices(output):
+    """
+    Parse the device list printed by ``adb devices`` or sent by ``adb track-devices``.
+       :param output: Text output of adb.
+       :return: List of dictionaries with the serial number (num) and state (type) of the devices.
+    """
+    return [{"type": state, "num": serial} for serial, state in DEVICE_REGEX.findall(output)]
+
+
+def adb_device_command(adb, serial, *args):
+    """
+    Command line of an adb call to a given device.
+       :param adb: Path of the adb executable, or list of the command starting adb.
+       :param serial: Serial number of the device, None for the only device connected.
+       :param args: Arguments of adb.
+       :return: List of the command line arguments.
+    """
+    if serial is None:
+        return adb_command(adb, *args)
+    else:
+        return adb_command(adb, "-s", serial, *args)
+
+
+def parse_screencap_header(header):
+    """
+    Parse the header of a raw screencap frame.
+       :param header: At least the 12 first bytes of the frame.
+       :return: Tuple of the width, height and number of bytes per pixel.
+       :raise ValueError: If the pixel format is not supported.
+    """
+    width, height, pixel_format = struct.unpack_from("<3I", header)
+    if pixel_format not in SCREENCAP_BYTES:
+        raise ValueError("Screencap pixel format {0} not supported.".format(pixel_format))
+    return width, height, SCREENCAP_BYTES[pixel_format]
+
+
+def parse_screencap(raw):
+    """
+    Convert a raw screencap frame to pixels. The header is 12 bytes long, or 16 since Android 9 (color space).
+       :param raw: Bytes printed by ``adb exec-out screencap``.
+       :return: Tuple of the RGB pixels array (height, width, 3) and the header size.
+       :raise ValueError: If the frame is truncated or its pixel format is not supported.
+    """
+    width, height, depth = parse_screencap_header(raw)
+    header_size = len(raw) - width * height * depth
+    if header_size not in (12, 16):
+        raise ValueError("Screencap frame of {0} bytes is not a {1}x{2} frame.".format(len(raw), width, height))
+    return screencap_pixels(raw, header_size, width, height, depth), header_size
+
+
+def screencap_pixels(raw, header_size, width, height, depth):
+    """
+    Pixels of a raw screencap frame, without copy.
+       :param raw: Bytes of the frame.
+       :param header_size: Size of the header of the frame, 0 if raw only contains the pixels.
+       :param width: Width of the frame.
+       :param height: Height of the frame.
+       :param depth: Number of bytes per pixel.
+       :return: RGB pixels array (height, width, 3).
+    """
+    pixels = numpy.frombuffer(raw, dtype=numpy.uint8, count=width * height * depth, offset=header_size)
+    return pixels.reshape(height, width, depth)[:, :, :3]
+
+
+class AndroidScreen:
+    """
+    Capture of an Android screen from its framebuffer, in the array format of Pybot.capture().
+    """
+
+    def __init__(self, adb, serial=None):
+        """
+        Constructor of the AndroidScreen class, no adb process is started before the first capture.
+           :param adb: Path of the adb executable, or list of the command starting adb.
+           :param serial: Serial number of the device, None for the only device connected.
+        """
+        self.adb = adb
+        self.serial = serial
+        self.header_size = None
+        self.size = None
+        self._session = None
+        self._lock = Lock()
+
+    def capture(self, bounds=None):
+        """
+        Capture the screen of the device, through the persistent session if started.
+           :param bounds: The bounds (x, y, width, height) to capture, default is None, to get the all screen.
+           :return: The captured pixels as an array (height, width, 3).
+           :raise ValueError: If the frame is truncated or its pixel format is not supported.
+        """
+        with self._lock:
+            if self._session is None:
+                data, self.header_size = parse_screencap(
+                    subprocess.check_output(adb_device_command(self.adb, self.serial, "exec-out", "screencap")))
+            else:
+                data = self._read_frame()
+        self.size = data.shape[1], data.shape[0]
+        if bounds is None:
+            return data
+        x, y, width, height = bounds
+        return data[y:y + height, x:x + width]
+
+    def getBounds(self):
+        """
+        Bounds of the device screen, like lackey Screen.getBounds(). The screen is captured if its size is unknown.
+           :return: Tuple (0, 0, width, height).
+        """
+        if self.size is None:
+            self.capture()
+        return (0, 0) + self.size
+
+    @property
+    def streaming(self):
+        """True if the persistent session is running."""
+        return self._session is not None and self._session.poll() is None
+
+    def start(self):
+        """
+        Start a persistent ``adb exec-out sh`` session, the following captures are written to it instead of starting a
+        new adb process each time.
+        """
+        if self.header_size is None:
+            self.capture()
+        with self._lock:
+            if self._session is None:
+                self._session = subprocess.Popen(adb_device_command(self.adb, self.serial, "exec-out", "sh"),
+                                                 stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def stop(self):
+        """Stop the persistent session, the following captures start a new adb process each time."""
+        with self._lock:
+            if self._session is not None:
+                self._session.stdin.close()
+                self._session.kill()
+                self._session.wait()
+                self._session.stdout.close()
+                self._session = None
+
+    def _read_frame(self):
+        """
+        Capture a frame through the persistent session.
+           :return: The captured pixels as an array (height, width, 3).
+           :raise ValueError: If the session ended or its pixel format is not supported.
+        """
+        self._session.stdin.write(b"screencap\n")
+        self._session.stdin.flush()
+        header = self._read(self.header_size)
+        width, height, depth = parse_screencap_header(header)
+        return screencap_pixels(self._read(width * height * depth), 0, width, height, depth)
+
+    def _read(self, size):
+        """
+        Read an exact number of bytes from the persistent session.
+           :param size: Number of bytes.
+           :return: The bytes read.
+           :raise ValueError: If the session ended before.
+        """
+        data = self._session.stdout.read(size)
+        if len(data) != size:
+            raise ValueError("Android capture session of device {0} ended.".format(self.serial))
+        return data
+
+
+class AndroidInput:
+    """
+    Input events sent to an Android device through a persistent adb shell session. The commands are pipelined, they
+    are written to the session without waiting for the previous ones to end. Each device has its own session, so many
+    devices can be driven at the same time.
+    """
+
+    def __init__(self, adb, serial=None):
+        """
+        Constructor of the AndroidInput class, the adb shell session is started on the first command.
+           :param adb: Path of the adb executable, or list of the command starting adb.
+           :param serial: Serial number of the device, None for the only device connected.
+        """
+        self.adb = adb
+        self.serial = serial
+        self.sent = 0
+        self._session = None
+        self._markers = count()
+        self._lock = Lock()
+
+    def send(self, command):
+        """
+        Write a shell command to the session, without waiting for it to end.
+           :param command: Shell command.
+           :raise TypeError: If command is not a string.
+        """
+        if isinstance(command, str) is False:
+            raise TypeError("First argument command must be a string.")
+        with self._lock:
+            if self._session is None or self._session.poll() is not None:
+                self._session = subprocess.Popen(adb_device_command(self.adb, self.serial, "shell"),
+                                                 stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                                 stderr=subprocess.DEVNULL)
+            self._session.stdin.write("{0}\n".format(command).encode())
+            self._session.stdin.flush()
+            self.sent += 1
+
+    def keyevent(self, key):
+        """
+        Press a key.
+           :param key: Android key code, or name of KEYCODES.
+        """
+        self.send("input keyevent {0}".format(KEYCODES.get(key, key)))
+
+    def tap(self, x, y):
+        """
+        Tap the screen.
+           :param x: Horizontal coordinate on the device screen.
+           :param y: Vertical coordinate on the device screen.
+        """
+        self.send("input tap {0:d} {1:d}".format(int(x), int(y)))
+
+    def swipe(self, x1, y1, x2, y2, duration_ms=300):
+        """
+        Swipe on the screen.
+           :param x1: Horizontal coordinate of the start.
+           :param y1: Vertical coordinate of the start.
+           :param x2: Horizontal coordinate of the end.
+           :param y2: Vertical coordinate of the end.
+           :param duration_ms: Duration of the swipe in milliseconds.
+        """
+        self.send("input swipe {0:d} {1:d} {2:d} {3:d} {4:d}".format(int(x1), int(y1), int(x2), int(y2),
+                                                                     int(duration_ms)))
+
+    def text(self, text):
+        """
+        Type a text in the focused field.
+           :param text: Text to type.
+        """
+        self.send("input text {0}".format(shlex.quote(text.replace(" ", "%s"))))
+
+    def sync(self):
+        """
+        Wait for all the commands sent to be executed by the device.
+           :return: Number of seconds waited.
+           :raise ValueError: If the session ended.
+        """
+        start = perf_counter()
+        marker = "pybot-sync-{0}".format(next(self._markers))
+        self.send("echo {0}".format(marker))
+        while True:
+            line = self._session.stdout.readline()
+            if len(line) == 0:
+                raise ValueError("Android input session of device {0} ended.".format(self.serial))
+            if line.strip().decode(errors="replace") == marker:
+                return perf_counter() - start
+
+    def stop(self, timeout=INPUT_STOP_TIMEOUT):
+        """
+        Stop the adb shell session once the commands sent are executed.
+           :param timeout: Maximum number of seconds to wait for the commands, the session is killed afterwards.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._session.stdin.close()
+                try:
+                    self._session.wait(timeout)
+                except subprocess.TimeoutExpired:
+                    self._session.kill()
+                    self._session.wait()
+                self._session.stdout.close()
+                self._session = None
+
+
+class DeviceRegistry:
+    """
+    Android devices connected, answered from memory.
+    """
+
+    def __init__(self, adb, ttl=DEVICE_TTL):
+        """
+        Constructor of the DeviceRegistry class, no adb process is started before the first query.
+           :param adb: Path of the adb executable, or list of the command starting adb.
+           :param ttl: Number of seconds the device list is used before polling adb again, when not tracking.
+           :raise TypeError: If ttl is not an integer or a float.
+        """
+        if isinstance(ttl, (int, float)) is False:
+            raise TypeError("Kwarg ttl must be an integer or a float.")
+        self.adb = adb
+        self.ttl = ttl
+        self._devices = {}
+        self._updated = None
+        self._lock = Lock()
+        self._subscribers = []
+        self._process = None
+        self._thread = None
+        self._tracked = Event()
+
+    def devices(self):
+        """
+        Connected devices, polled from adb only if not tracking and the list is older than the TTL.
+           :return: List of dictionaries with the serial number (num) and state (type) of the devices.
+        """
+        if self.tracking is False:
+            with self._lock:
+                expired = self._updated is None or monotonic() - self._updated > self.ttl
+            if expired is True:
+                self.refresh()
+        with self._lock:
+            return [{"type": state, "num": serial} for serial, state in self._devices.items()]
+
+    def refresh(self):
+        """
+        Poll the device list from ``adb devices``.
+           :return: List of dictionaries with the serial number (num) and state (type) of the devices.
+        """
+        output = subprocess.check_output(adb_command(self.adb, "devices")).decode()
+        devices = parse_devices(output)
+        self._update(devices)
+        return devices
+
+    @property
+    def tracking(self):
+        """True if the device list is updated by a running ``adb track-devices``."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def track(self, timeout=TRACK_TIMEOUT):
+        """
+        Start the ``adb track-devices`` stream updating the device list, and wait for the first list.
+           :param timeout: Maximum number of seconds to wait for the first device list.
+           :return: True if the first device list was received, False on contrary.
+        """
+        if self.tracking is False:
+            self._tracked.clear()
+            self._process = subprocess.Popen(adb_command(self.adb, "track-devices"), stdout=subprocess.PIPE,
+                                             stdin=subprocess.DEVNULL)
+            self._thread = Thread(target=self._read, args=(self._process,), name="pybot-adb-track", daemon=True)
+            self._thread.start()
+        return self._tracked.wait(timeout)
+
+    def stop(self):
+        """Stop the ``adb track-devices`` stream, the device list is polled again afterwards."""
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._thread.join()
+            self._process.stdout.close()
+            self._process = None
+            self._thread = None
+
+    def subscribe(self, callback):
+        """
+        Call a function on each connection, disconnection or state change of a device.
+           :param callback: Callable taking the event ("connected", "disconnected" or "changed") and the device
+              dictionary.
+           :raise TypeError: If callback is not callable.
+        """
+        if callable(callback) is False:
+            raise TypeError("First argument callback must be callable.")
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Stop calling a subscribed function.
+           :param callback: Callable given to subscribe().
+        """
+        with self._lock:
+            self._subscribers.remove(callback)
+
+    def _read(self, process):
+        """
+        Thread reading the length prefixed messages of ``adb track-devices``.
+           :param process: The adb process.
+        """
+        stream = process.stdout
+        while True:
+            size = stream.read(4)
+            if len(size) != 4:
+                break
+            try:
+                payload = stream.read(int(size, 16)).decode()
+            except ValueError:
+                break
+            self._update(parse_devices(payload))
+            self._tracked.set()
+
+    def _update(self, devices):
+        """
+        Replace the device list and notify the subscribers of the differences.
+           :param devices: List of dictionaries with the serial number (num) and state (type) of the devices.
+        """
+        new = {device["num"]: device["type"] for device in devices}
+        with self._lock:
+            old = self._devices
+            self._devices = new
+            self._updated = monotonic()
+            subscribers = list(self._subscribers)
+        events = []
+        for serial, state in new.items():
+            if serial not in old:
+                events.append(("connected", {"type": state, "num": serial}))
+            elif old[serial] != state:
+                events.append(("changed", {"type": state, "num": serial}))
+        for serial, state in old.items():
+            if serial not in new:
+                events.append(("disconnected", {"type": state, "num": serial}))
+        for event, device in events:
+            for callback in subscribers:
+                callback(event, device)
@@ -0,0 +1,212 @@
+"""
+===========
+Async Pybot
+===========
+   Asyncio facade over a Pybot object, so one event loop can drive many automation flows at the same time: watching a
+   device, reading a panel and waiting for a program. Commands and sleeps are native asyncio, the waits poll
+   without blocking the loop and the captures, OCR and template matching run in an executor.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from Pybot.program import START_TIMEOUT
+from Pybot.template import TEMPLATE_SIMILARITY
+from Pybot.wait import wait_until_async, settle_poll, CHANGE_THRESHOLD, SETTLE_SEC, WAIT_TIMEOUT
+
+EXECUTOR_WORKERS = None  # Default of ThreadPoolExecutor, depending on the number of CPU
+
+
+class AsyncPybot:
+    """
+    Awaitable version of the Pybot methods. The methods not redefined here are run in the executor, for instance
+    ``await async_pybot.find_any(imgs)``.
+    """
+
+    def __init__(self, pybot=None, executor=None):
+        """
+        Constructor of the AsyncPybot class.
+           :param pybot: Pybot object to drive, a new one if None.
+           :param executor: concurrent.futures executor running the blocking work, default is None for a thread pool
+              of the facade, shut down by close(). An executor given is left to its owner.
+        """
+        if pybot is None:
+            from Pybot.Pybot import Pybot
+            pybot = Pybot()
+        self.pybot = pybot
+        self._own_executor = executor is None
+        self.executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS) if executor is None else executor
+
+    def __getattr__(self, name):
+        """
+        Coroutine function running a Pybot method in the executor.
+           :param name: Name of the Pybot method.
+           :raise AttributeError: If the Pybot object has no such method.
+        """
+        method = getattr(self.pybot, name)
+        if callable(method) is False:
+            return method
+
+        async def run(*args, **kwargs):
+            return await self._run(method, *args, **kwargs)
+
+        run.__name__ = name
+        run.__doc__ = method.__doc__
+        return run
+
+    async def __aenter__(self):
+        """Asynchronous context manager entry."""
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """Asynchronous context manager exit, closing the facade."""
+        await self.close()
+
+    async def close(self):
+        """Close the Pybot object in the executor and stop the executor if it was created by the facade."""
+        await self._run(self.pybot.close)
+        if self._own_executor is True:
+            self.executor.shutdown(wait=False)
+
+    async def sleep(self, second):
+        """
+        Sleep without blocking the event loop.
+           :param second: Number of seconds.
+           :raise TypeError: First argument second must be an integer or a float.
+        """
+        if isinstance(second, (int, float)):
+            await asyncio.sleep(second)
+        else:
+            raise TypeError(
+                "sleep_sec kwarg is a time in to sleep after click, therefore must be an int or float.")
+
+    async def exec_cmd(self, cmd, sleep_sec=0):
+        """
+        Execute command in an asyncio subprocess.
+           :param cmd: Command to execute passed a string.
+           :param sleep_sec: Number of seconds to eventually sleep after the command.
+           :return: True if return code of the command is 0, false on contrary.
+           :raise TypeError: If first argument cmd is not a string type.
+        """
+        if isinstance(cmd, str) is True:
+            process = await asyncio.create_subprocess_shell(cmd)
+            return_code = await process.wait()
+            await self.sleep(sleep_sec)
+            return return_code == 0
+        else:
+            raise TypeError('First argument cmd must be an str type.')
+
+    async def android(self):
+        """
+        Connected Android devices, from the device registry of the Pybot object in the executor, see Pybot.android().
+           :return: List of dictionaries with the serial number (num) and state (type) of the devices.
+        """
+        return await self._run(self.pybot.android)
+
+    async def check_click(self, img, sleep_sec=0, after_click=None):
+        """
+        Check if button exist and click on it, the sleep does not block the event loop.
+           :param img: Image path to work on. Check if exist and click.
+           :param sleep_sec: Number of seconds of seconds to eventually sleep after the click.
+           :param after_click: Another image to eventually click after the first click and before the sleep.
+           :return: True if img was found and clicked, False on contrary.
+        """
+        clicked = await self._run(self.pybot.check_click, img, after_click=after_click)
+        if clicked is True:
+            await self.sleep(sleep_sec)
+        return clicked
+
+    async def wait_click(self, img, sleep_sec=0, timeout=WAIT_TIMEOUT):
+        """
+        Wait for a button to appear and click on it, the waits do not block the event loop.
+           :param img: Image to wait for and click.
+           :param sleep_sec: Number of seconds of seconds to eventually sleep after the click.
+           :param timeout: Number of seconds to wait for the image.
+           :return: Match object of the image clicked.
+           :raise PybotException: If image not found before timeout.
+        """
+        result = await self.wait_template(img, timeout=timeout)
+        if result.ok is False:
+            from Pybot.Pybot import PybotException
+            raise PybotException('Image {0} not found after {1} seconds.'.format(img, timeout))
+        await self._run(self.pybot._click_match, result.value)
+        await self.sleep(sleep_sec)
+        return result.value
+
+    async def wait_change(self, bounds=None, timeout=WAIT_TIMEOUT, threshold=CHANGE_THRESHOLD):
+        """
+        Wait for a region of the screen to change, see Pybot.wait_change().
+           :return: WaitResult object, its value is the last frame difference.
+        """
+        return await self._wait(timeout, self.pybot._change_probe, bounds, threshold)
+
+    async def wait_settle(self, bounds=None, timeout=WAIT_TIMEOUT, settle_sec=SETTLE_SEC, threshold=CHANGE_THRESHOLD):
+        """
+        Wait for a region of the screen to stop changing, see Pybot.wait_settle().
+           :return: WaitResult object, its value is the last frame difference.
+        """
+        return await self._wait(timeout, self.pybot._settle_probe, bounds, settle_sec, threshold,
+                                poll=settle_poll(settle_sec))
+
+    async def wait_template(self, img, bounds=None, timeout=WAIT_TIMEOUT, similarity=TEMPLATE_SIMILARITY):
+        """
+        Wait for a template image to appear on the screen, see Pybot.wait_template().
+           :return: WaitResult object, its value is the Match object or None.
+        """
+        return await self._wait(timeout, self.pybot._template_probe, img, bounds, similarity)
+
+    async def wait_text(self, pattern, bounds=None, lang=None, timeout=WAIT_TIMEOUT):
+        """
+        Wait for a text to appear on the screen, see Pybot.wait_text().
+           :return: WaitResult object, its value is the text read.
+        """
+        return await self._wait(timeout, self.pybot._text_probe, pattern, bounds, lang)
+
+    async def start_pgm(self, pgm, working_directory=None, pgm_arg=None, sleep_sec=0, ready=None,
+                        timeout=START_TIMEOUT):
+        """
+        Start a program and wait for its readiness probes without blocking the event loop, see Pybot.start_pgm().
+           :return: ProgramHandle object, its ready attribute is the WaitResult of the probes.
+        """
+        handle = await self._run(self.pybot.start_pgm, pgm, working_directory=working_directory, pgm_arg=pgm_arg)
+        if ready is not None:
+            probes = [ready] if callable(ready) is True else ready
+
+            async def probe():
+                ok = await self._run(lambda: all(ready_probe(handle) for ready_probe in probes))
+                return ok or handle.running is False, ok, False
+
+            result = await wait_until_async(probe, timeout)
+            handle.ready = result._replace(ok=result.value is True)
+        await self.sleep(sleep_sec)
+        return handle
+
+    async def kill_pgm(self, pgm, sleep_sec=0):
+        """
+        Kill a program, the sleep does not block the event loop.
+           :param pgm: Program to kill, with the .exe extension.
+           :param sleep_sec: Number of seconds of seconds to eventually sleep after the kill.
+           :return: True if processes of the program were killed, false on contrary.
+        """
+        killed = await self._run(self.pybot.kill_pgm, pgm)
+        await self.sleep(sleep_sec)
+        return killed
+
+    async def _wait(self, timeout, build, *args, poll=None):
+        """
+        Poll a probe of the Pybot object, built and called in the executor, until it is met or the timeout is reached.
+           :param timeout: Maximum number of seconds to wait.
+           :param build: Pybot method returning the probe, Pybot._change_probe() for instance.
+           :param poll: AdaptivePoll object, a default one if None.
+           :return: WaitResult object.
+        """
+        probe = await self._run(build, *args)
+        return await wait_until_async(partial(self._run, probe), timeout, poll=poll)
+
+    async def _run(self, function, *args, **kwargs):
+        """
+        Run a blocking function in the executor.
+           :param function: Callable to run.
+           :return: The result of the function.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(function, *args, **kwargs))
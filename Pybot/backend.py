@@ -0,0 +1,251 @@
+"""
+=======
+Backend
+=======
+   Screen and input backends of Pybot. A backend captures the screen in memory and sends the clicks and key events.
+   The lackey backend drives the real desktop, on Windows. The headless backend is a virtual framebuffer held in a
+   numpy array: its frames are scripted and the clicks and key events are recorded, to run Pybot without any display,
+   many instances per core, on Linux for instance.
+"""
+from collections import namedtuple, deque
+from threading import Lock
+
+import numpy
+
+Event = namedtuple("Event", "action x y text modifiers")
+Event.__doc__ = """
+Input event recorded by the headless backend: action is click, right_click or type, x and y the location of the clicks
+and text and modifiers the keys typed.
+"""
+
+
+class Key:
+    """
+    Special keys, with the same values as the lackey Key class, to be typed with type_n_time() for instance.
+    """
+    ENTER = "{ENTER}"
+    ESC = "{ESC}"
+    BACKSPACE = "{BACKSPACE}"
+    DELETE = "{DELETE}"
+    TAB = "{TAB}"
+    SPACE = "{SPACE}"
+    HOME = "{HOME}"
+    END = "{END}"
+    LEFT = "{LEFT}"
+    RIGHT = "{RIGHT}"
+    DOWN = "{DOWN}"
+    UP = "{UP}"
+    PAGE_DOWN = "{PAGE_DOWN}"
+    PAGE_UP = "{PAGE_UP}"
+    F1 = "{F1}"
+    F2 = "{F2}"
+    F3 = "{F3}"
+    F4 = "{F4}"
+    F5 = "{F5}"
+    F6 = "{F6}"
+    F7 = "{F7}"
+    F8 = "{F8}"
+    F9 = "{F9}"
+    F10 = "{F10}"
+    F11 = "{F11}"
+    F12 = "{F12}"
+    ALT = "{ALT}"
+    CMD = "{CMD}"
+    CTRL = "{CTRL}"
+    META = "{META}"
+    SHIFT = "{SHIFT}"
+    WIN = "{WIN}"
+
+
+class ScreenBackend:
+    """
+    Interface of the screen and input backends.
+    """
+    interactive = True  # False if no user can answer a dialog
+
+    def getBounds(self):
+        """
+        Bounds of the screen.
+           :return: Tuple (x, y, width, height).
+        """
+        raise NotImplementedError
+
+    def getNumberScreens(self):
+        """
+        Number of screens.
+           :return: Integer number of screens.
+        """
+        return 1
+
+    def capture(self, bounds):
+        """
+        Capture a region of the screen in memory.
+           :param bounds: Tuple (x, y, width, height) of the region.
+           :return: The captured pixels as an RGB array (height, width, 3) of uint8.
+        """
+        raise NotImplementedError
+
+    def click(self, x, y):
+        """
+        Click on a location of the screen.
+           :param x: Abscissa of the location.
+           :param y: Ordinate of the location.
+        """
+        raise NotImplementedError
+
+    def rightClick(self, x=None, y=None):
+        """
+        Right click on a location of the screen.
+           :param x: Abscissa of the location, default is None for the current mouse location.
+           :param y: Ordinate of the location, default is None for the current mouse location.
+        """
+        raise NotImplementedError
+
+    def type(self, text, modifiers=""):
+        """
+        Type a text or special keys.
+           :param text: Text or Key values to type.
+           :param modifiers: Key values of the modifiers held while typing, CTRL for instance.
+        """
+        raise NotImplementedError
+
+
+class LackeyBackend(ScreenBackend):
+    """
+    Backend of the real desktop through lackey, the Sikuli wrapper, on Windows.
+    """
+
+    def __init__(self, screen_id=0):
+        """
+        Constructor of the LackeyBackend class, importing lackey.
+           :param screen_id: Identifier of the lackey screen.
+        """
+        import lackey
+        self.lackey = lackey
+        self.screen = lackey.Screen(screen_id)
+
+    def getBounds(self):
+        """Bounds of the lackey screen (x, y, width, height)."""
+        return self.screen.getBounds()
+
+    def getNumberScreens(self):
+        """Number of screens connected."""
+        return self.screen.getNumberScreens()
+
+    def capture(self, bounds):
+        """Capture a region of the lackey screen as an RGB array, lackey capturing BGR pixels like OpenCV."""
+        return numpy.ascontiguousarray(self.screen.capture(bounds)[:, :, 2::-1])
+
+    def click(self, x, y):
+        """Click on a location of the lackey screen."""
+        self.screen.click(self.lackey.Location(x, y))
+
+    def rightClick(self, x=None, y=None):
+        """Right click on a location, or where the mouse is, of the lackey screen."""
+        if x is None or y is None:
+            self.screen.rightClick()
+        else:
+            self.screen.rightClick(self.lackey.Location(x, y))
+
+    def type(self, text, modifiers=""):
+        """Type a text or special keys with the lackey keyboard."""
+        self.screen.type(text, modifiers)
+
+
+class HeadlessBackend(ScreenBackend):
+    """
+    Virtual framebuffer held in a numpy array. The frames shown are scripted with show() and queue(), the input events
+    are recorded in events and can trigger a callback, to change the frame when a button is clicked for instance.
+    """
+    interactive = False
+
+    def __init__(self, width=1920, height=1080, frame=None, on_event=None):
+        """
+        Constructor of the HeadlessBackend class.
+           :param width: Width of the virtual screen, ignored if frame is given.
+           :param height: Height of the virtual screen, ignored if frame is given.
+           :param frame: First frame shown, array (height, width, 3) of uint8, default is a black screen.
+           :param on_event: Callable taking the backend and the Event object, called on each input event.
+           :raise TypeError: If width or height is not a positive integer.
+        """
+        if frame is None:
+            if isinstance(width, int) is False or isinstance(height, int) is False or width < 1 or height < 1:
+                raise TypeError("Kwargs width and height must be positive integers.")
+            frame = numpy.zeros((height, width, 3), dtype=numpy.uint8)
+        self.frame = numpy.ascontiguousarray(frame, dtype=numpy.uint8)
+        self.frames = deque()
+        self.events = []
+        self.captures = 0
+        self.on_event = on_event
+        self._lock = Lock()
+
+    def show(self, frame):
+        """
+        Show a frame now, forgetting the frames queued.
+           :param frame: Array (height, width, 3) of uint8, the size of the screen can change.
+        """
+        with self._lock:
+            self.frames.clear()
+            self.frame = numpy.ascontiguousarray(frame, dtype=numpy.uint8)
+
+    def queue(self, *frames):
+        """
+        Queue frames, each capture shows the next frame queued, then the last one stays on the screen.
+           :param frames: Arrays (height, width, 3) of uint8.
+        """
+        with self._lock:
+            self.frames.extend(numpy.ascontiguousarray(frame, dtype=numpy.uint8) for frame in frames)
+
+    def draw(self, img, x, y):
+        """
+        Draw an image on the frame shown, a button to be found for instance.
+           :param img: Array (height, width, 3) or grayscale array (height, width) of uint8, or path of an image file.
+           :param x: Abscissa of the top left corner.
+           :param y: Ordinate of the top left corner.
+        """
+        if isinstance(img, str) is True:
+            from PIL import Image
+            with Image.open(img) as image:
+                img = numpy.asarray(image.convert("RGB"))
+        elif img.ndim == 2:
+            img = numpy.repeat(img[:, :, None], 3, axis=2)
+        with self._lock:
+            frame = self.frame.copy()
+            frame[y:y + img.shape[0], x:x + img.shape[1]] = img[:, :, :3]
+            self.frame = frame
+
+    def getBounds(self):
+        """Bounds of the virtual screen (0, 0, width, height)."""
+        with self._lock:
+            return 0, 0, self.frame.shape[1], self.frame.shape[0]
+
+    def capture(self, bounds):
+        """Copy of a region of the frame shown, the next frame queued is shown first."""
+        x, y, width, height = bounds
+        with self._lock:
+            if len(self.frames) != 0:
+                self.frame = self.frames.popleft()
+            self.captures += 1
+            return self.frame[y:y + height, x:x + width].copy()
+
+    def click(self, x, y):
+        """Record a click."""
+        self._record(Event("click", x, y, None, None))
+
+    def rightClick(self, x=None, y=None):
+        """Record a right click."""
+        self._record(Event("right_click", x, y, None, None))
+
+    def type(self, text, modifiers=""):
+        """Record typed keys."""
+        self._record(Event("type", None, None, text, modifiers))
+
+    def _record(self, event):
+        """
+        Record an input event and call the callback.
+           :param event: Event object.
+        """
+        with self._lock:
+            self.events.append(event)
+        if self.on_event is not None:
+            self.on_event(self, event)
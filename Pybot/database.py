@@ -0,0 +1,139 @@
+"""
+========
+Database
+========
+   Long lived connection to the Pybot SQLite cache database. The schema is created once, the database is in WAL mode
+   and the inserts are queued to a background writer committing them by batches, so the automation never waits for
+   the disk.
+"""
+import atexit
+import sqlite3
+from queue import Queue, Empty
+from threading import Thread, Lock, Event
+from time import monotonic
+
+from Pybot.metrics import Metrics
+
+BATCH_SIZE = 100
+BATCH_SEC = 1.0
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS computer
+    (node TEXT PRIMARY KEY, os_type TEXT, os_version TEXT, ts TIMESTAMP);''',
+    'CREATE TABLE IF NOT EXISTS screen (node TEXT, width INT, height INT, ts TIMESTAMP);',
+    '''CREATE TABLE IF NOT EXISTS screenshot_file
+    (digest TEXT PRIMARY KEY, image TEXT, node TEXT, text TEXT, size INT, ts TIMESTAMP);''',
+    '''CREATE TABLE IF NOT EXISTS ocr
+    (digest TEXT PRIMARY KEY, lang TEXT, config TEXT, text TEXT, ts TIMESTAMP, used TIMESTAMP);''',
+    'CREATE INDEX IF NOT EXISTS ocr_used ON ocr (used);',
+    '''CREATE TABLE IF NOT EXISTS template_hint
+    (node TEXT, width INT, height INT, template TEXT, x INT, y INT, ts TIMESTAMP,
+    PRIMARY KEY (node, width, height, template));''',
+)
+_STOP = object()
+
+
+class CacheDatabase:
+    """
+    SQLite database shared by the caches of a Pybot object, with a background writer.
+    """
+
+    def __init__(self, database, batch_size=BATCH_SIZE, batch_sec=BATCH_SEC, metrics=None):
+        """
+        Constructor of the CacheDatabase class, open the connection, create the schema and start the writer.
+           :param database: Path of the SQLite database file.
+           :param batch_size: Number of queued requests committed together.
+           :param batch_sec: Maximum number of seconds a queued request waits for its commit.
+           :param metrics: Metrics object timing the queries and the commits, default is None for no timing.
+           :raise TypeError: If batch_size is not an integer or batch_sec not an integer or a float.
+        """
+        if isinstance(batch_size, int) is False:
+            raise TypeError("Kwarg batch_size must be an integer.")
+        if isinstance(batch_sec, (int, float)) is False:
+            raise TypeError("Kwarg batch_sec must be an integer or a float.")
+        self.database = database
+        self.batch_size = batch_size
+        self.batch_sec = batch_sec
+        self.metrics = Metrics() if metrics is None else metrics
+        self._lock = Lock()
+        self._queue = Queue()
+        self._error = None
+        self._db = sqlite3.connect(database, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL;')
+        self._db.execute('PRAGMA synchronous=NORMAL;')
+        for request in SCHEMA:
+            self._db.execute(request)
+        self._db.commit()
+        self._thread = Thread(target=self._write, name="pybot-cache-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def execute(self, request, parameters=()):
+        """
+        Queue a writing request, it returns immediately.
+           :param request: SQL request.
+           :param parameters: Parameters of the request.
+        """
+        self._queue.put((request, parameters))
+
+    def query(self, request, parameters=()):
+        """
+        Run a reading request. Queued writes are not necessarily visible, call flush() before if needed.
+           :param request: SQL request.
+           :param parameters: Parameters of the request.
+           :return: List of the rows.
+        """
+        with self.metrics.stage("db_query"), self._lock:
+            return self._db.execute(request, parameters).fetchall()
+
+    def flush(self):
+        """
+        Wait for the queued requests to be committed.
+           :raise sqlite3.Error: If a queued request failed.
+        """
+        if self._thread.is_alive():
+            done = Event()
+            self._queue.put(done)
+            done.wait()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        """Commit the queued requests, stop the writer and close the connection. Can be called many times."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._db.close()
+            atexit.unregister(self.close)
+
+    def _write(self):
+        """Writer thread, executing the queued requests and committing them by batches."""
+        pending = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except Empty:
+                item = None
+            if isinstance(item, tuple):
+                with self._lock:
+                    try:
+                        self._db.execute(*item)
+                    except sqlite3.Error as error:
+                        self._error = error
+                pending += 1
+                if deadline is None:
+                    deadline = monotonic() + self.batch_sec
+                if pending < self.batch_size and monotonic() < deadline:
+                    continue
+            if pending != 0:
+                with self.metrics.stage("db_commit"), self._lock:
+                    self._db.commit()
+                self.metrics.count("db_rows", pending)
+                pending = 0
+                deadline = None
+            if isinstance(item, Event):
+                item.set()
+            elif item is _STOP:
+                break
@@ -0,0 +1,253 @@
+"""
+=======
+Metrics
+=======
+   Latency histograms and counters of the hot paths of a Pybot object: screen capture, screenshot save, tesseract,
+   template matching, adb and SQLite. Each stage is timed into fixed buckets, cheap to update and to merge, and the
+   metrics are exported as JSON or as a Prometheus text file. When disabled, timing a stage costs a method call.
+"""
+import json
+import os
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMETHEUS_PREFIX = "pybot"
+
+
+class Histogram:
+    """
+    Latency histogram with fixed upper bounds in seconds, like a Prometheus histogram.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        """
+        Constructor of the Histogram class.
+           :param buckets: Increasing upper bounds of the buckets in seconds, an infinite bucket is added.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        """
+        Add a latency.
+           :param seconds: Latency in seconds.
+        """
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """
+        Estimate of a quantile, the upper bound of the bucket containing it.
+           :param q: Quantile between 0 and 1, 0.99 for instance.
+           :return: Latency in seconds, None if the histogram is empty.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulated = 0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            cumulated += count
+            if cumulated >= rank and count != 0:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        """
+        Histogram as a dictionary.
+           :return: Dictionary with the count, sum, min, max, mean, p50, p90, p99 and the cumulative buckets.
+        """
+        cumulated = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulated += count
+            buckets["+Inf" if bound == float("inf") else repr(bound)] = cumulated
+        return {"count": self.count, "sum": self.sum, "min": self.min, "max": self.max,
+                "mean": None if self.count == 0 else self.sum / self.count, "p50": self.quantile(0.5),
+                "p90": self.quantile(0.9), "p99": self.quantile(0.99), "buckets": buckets}
+
+
+class _Timer:
+    """
+    Context manager timing a stage into the metrics.
+    """
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    """
+    Context manager doing nothing, used when the metrics are disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Latency histograms per stage and counters per event of a Pybot object.
+    """
+
+    def __init__(self, enabled=False, buckets=BUCKETS):
+        """
+        Constructor of the Metrics class.
+           :param enabled: If True, the stages are timed and the events counted. Can be changed at any time.
+           :param buckets: Upper bounds of the histogram buckets in seconds.
+           :raise TypeError: If enabled is not a boolean.
+        """
+        if isinstance(enabled, bool) is False:
+            raise TypeError("Kwarg enabled must be a boolean type, True or False.")
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self.counters = {}
+        self._lock = Lock()
+
+    def stage(self, name):
+        """
+        Time a stage, to be used as a context manager.
+           :param name: Name of the stage, capture for instance.
+           :return: Context manager timing the with block, doing nothing if the metrics are disabled.
+           :example:
+              .. code-block:: python
+
+                 with test_automaton.metrics.stage("capture"):
+                     data = test_automaton.capture()
+        """
+        if self.enabled is False:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def observe(self, name, seconds):
+        """
+        Add the latency of a stage.
+           :param name: Name of the stage.
+           :param seconds: Latency in seconds.
+        """
+        if self.enabled is True:
+            with self._lock:
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram(self.buckets)
+                histogram.observe(seconds)
+
+    def count(self, name, n=1):
+        """
+        Count an event.
+           :param name: Name of the event, ocr_cache_hit for instance.
+           :param n: Number of events.
+        """
+        if self.enabled is True:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        """Forget all the latencies and events."""
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def to_dict(self):
+        """
+        Metrics as a dictionary.
+           :return: Dictionary with the stages histograms and the events counters.
+        """
+        with self._lock:
+            return {"stages": {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+                    "events": dict(sorted(self.counters.items()))}
+
+    def to_json(self):
+        """
+        Metrics as JSON.
+           :return: JSON text.
+        """
+        return json.dumps(self.to_dict(), indent=1)
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX, labels=None):
+        """
+        Metrics in the Prometheus text exposition format.
+           :param prefix: Prefix of the metric names.
+           :param labels: Dictionary of labels added to every sample, the computer name for instance.
+           :return: Prometheus text.
+        """
+        extra = "".join(',{0}="{1}"'.format(key, _escape(value)) for key, value in sorted((labels or {}).items()))
+        metrics = self.to_dict()
+        lines = ["# HELP {0}_stage_seconds Latency of the Pybot stages.".format(prefix),
+                 "# TYPE {0}_stage_seconds histogram".format(prefix)]
+        for name, histogram in metrics["stages"].items():
+            stage = 'stage="{0}"{1}'.format(_escape(name), extra)
+            for bound, count in histogram["buckets"].items():
+                lines.append('{0}_stage_seconds_bucket{{{1},le="{2}"}} {3}'.format(prefix, stage, bound, count))
+            lines.append("{0}_stage_seconds_sum{{{1}}} {2!r}".format(prefix, stage, histogram["sum"]))
+            lines.append("{0}_stage_seconds_count{{{1}}} {2}".format(prefix, stage, histogram["count"]))
+        lines.append("# HELP {0}_events_total Events of the Pybot stages.".format(prefix))
+        lines.append("# TYPE {0}_events_total counter".format(prefix))
+        for name, count in metrics["events"].items():
+            lines.append('{0}_events_total{{event="{1}"{2}}} {3}'.format(prefix, _escape(name), extra, count))
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, file_path):
+        """
+        Write the metrics as a JSON file, atomically.
+           :param file_path: Path of the file.
+        """
+        _write(file_path, self.to_json())
+
+    def write_prometheus(self, file_path, prefix=PROMETHEUS_PREFIX, labels=None):
+        """
+        Write the metrics as a Prometheus text file, atomically, for the textfile collector of the node exporter.
+           :param file_path: Path of the file, with the .prom extension.
+           :param prefix: Prefix of the metric names.
+           :param labels: Dictionary of labels added to every sample.
+        """
+        _write(file_path, self.to_prometheus(prefix=prefix, labels=labels))
+
+
+def _escape(value):
+    """
+    Escape a Prometheus label value.
+       :param value: Label value.
+       :return: Escaped text.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write(file_path, text):
+    """
+    Write a text file atomically, through a temporary file renamed.
+       :param file_path: Path of the file.
+       :param text: Content of the file.
+    """
+    with open(file_path + ".tmp", mode="w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(file_path + ".tmp", file_path)
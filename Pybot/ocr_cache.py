@@ -0,0 +1,157 @@
+"""
+=========
+OCR cache
+=========
+   Content addressed cache of the tesseract results, stored in the Pybot SQLite database.
+   The key is a hash of the captured pixels, the tesseract language and configuration. A pixel identical capture is
+   then read from the database instead of starting a tesseract process.
+"""
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from time import time
+
+import numpy
+
+OCR_CACHE_SIZE = 10000
+OCR_CACHE_AGE = 7 * 24 * 3600
+OCR_CACHE_EVICT_EVERY = 64
+OCR_CACHE_MEMORY = 1024
+
+
+def frame_key(data, *params):
+    """
+    Hash the pixels of a capture, the key of the OCR results and of the screenshots.
+       :param data: Array of pixels as returned by Pybot.capture().
+       :param params: Parameters hashed with the pixels, the tesseract ones for instance.
+       :return: Hexadecimal digest identifying the frame and the parameters.
+    """
+    data = numpy.ascontiguousarray(data)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update("".join("{0}|".format(value) for value in (data.shape, data.dtype.str) + params).encode())
+    digest.update(memoryview(data).cast("B"))
+    return digest.hexdigest()
+
+
+def ocr_key(data, lang=None, config=""):
+    """
+    Hash the pixels of a capture with the tesseract parameters.
+       :param data: Array of pixels as returned by Pybot.capture().
+       :param lang: Tesseract language, None is default.
+       :param config: Tesseract extra configuration string.
+       :return: Hexadecimal digest identifying the OCR result.
+    """
+    return frame_key(data, lang, config)
+
+
+class OcrCache:
+    """
+    OCR results cached in the ocr table of the cache database, with an eviction by number of entries and by age.
+    The most recent results are also kept in memory, the writes are queued to the database writer.
+    """
+
+    def __init__(self, database, max_entries=OCR_CACHE_SIZE, max_age=OCR_CACHE_AGE):
+        """
+        Constructor of the OcrCache class.
+           :param database: CacheDatabase object to store the results in.
+           :param max_entries: Maximum number of OCR results kept, the least recently used are evicted first.
+           :param max_age: Maximum age in seconds of an OCR result, None to keep them forever.
+           :raise TypeError: If max_entries is not an integer or max_age not an integer, a float or None.
+        """
+        if isinstance(max_entries, int) is False:
+            raise TypeError("Kwarg max_entries must be an integer.")
+        if isinstance(max_age, (int, float)) is False and max_age is not None:
+            raise TypeError("Kwarg max_age must be an integer, a float or None.")
+        self.database = database
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = Lock()
+        self._memory = OrderedDict()
+        self.evict()
+
+    def get(self, key):
+        """
+        Look up an OCR result.
+           :param key: Digest returned by ocr_key().
+           :return: The cached text, None on a miss.
+        """
+        with self._lock:
+            text, _ = self._memory.get(key, (None, None))
+            if text is not None:
+                self._memory.move_to_end(key)
+        if text is None:
+            rows = self.database.query("SELECT text, strftime('%s', ts, 'utc') FROM ocr WHERE digest = ?;", (key,))
+            if len(rows) == 0:
+                with self._lock:
+                    self.misses += 1
+                return None
+            text = rows[0][0]
+            self._remember(key, text, float(rows[0][1]))
+        with self._lock:
+            self.hits += 1
+        self.database.execute("UPDATE ocr SET used = DATETIME('now', 'localtime') WHERE digest = ?;", (key,))
+        return text
+
+    def put(self, key, text, lang=None, config=""):
+        """
+        Store an OCR result, eventually evicting old results.
+           :param key: Digest returned by ocr_key().
+           :param text: Text read by tesseract.
+           :param lang: Tesseract language of the result.
+           :param config: Tesseract configuration of the result.
+        """
+        self._remember(key, text, time())
+        request = '''INSERT OR REPLACE INTO ocr
+            VALUES(?, ?, ?, ?, DATETIME('now', 'localtime'), DATETIME('now', 'localtime'));'''
+        self.database.execute(request, (key, lang, config, text,))
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % OCR_CACHE_EVICT_EVERY == 0
+        if evict is True:
+            self.evict()
+
+    def evict(self):
+        """
+        Queue the deletion of the results older than max_age and of the least recently used above max_entries. The
+        results kept in memory are forgotten by the same rules, the others staying in memory.
+        """
+        if self.max_age is not None:
+            request = "DELETE FROM ocr WHERE ts < DATETIME('now', 'localtime', ?);"
+            self.database.execute(request, ("{0:+} seconds".format(-self.max_age),))
+        request = '''DELETE FROM ocr WHERE digest NOT IN
+            (SELECT digest FROM ocr ORDER BY used DESC LIMIT ?);'''
+        self.database.execute(request, (self.max_entries,))
+        with self._lock:
+            if self.max_age is not None:
+                oldest = time() - self.max_age
+                for key in [key for key, (_, ts) in self._memory.items() if ts < oldest]:
+                    del self._memory[key]
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self):
+        """
+        Hit and miss counters of the cache since its creation.
+           :return: Dictionary with the hits, misses, hit ratio and number of entries.
+        """
+        self.database.flush()
+        entries = self.database.query('SELECT COUNT(*) FROM ocr;')[0][0]
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": entries,
+                "ratio": self.hits / lookups if lookups else 0.0}
+
+    def _remember(self, key, text, ts):
+        """
+        Keep a result in memory, forgetting the least recently used above OCR_CACHE_MEMORY results.
+           :param key: Digest returned by ocr_key().
+           :param text: Text read by tesseract.
+           :param ts: Time of the tesseract read, in seconds since the epoch.
+        """
+        with self._lock:
+            self._memory[key] = (text, ts)
+            self._memory.move_to_end(key)
+            if len(self._memory) > OCR_CACHE_MEMORY:
+                self._memory.popitem(last=False)
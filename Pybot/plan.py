@@ -0,0 +1,325 @@
+"""
+====
+Plan
+====
+   Action plan of an exported Sikuli script: the templates used by each action of the script, in the order of the
+   source. The plan is compiled from the script at export time, without running it. At the start of a run, all the
+   templates of the plan are decoded in background threads, in the order they are needed, and each action prefetches
+   the templates of the next ones, so the timed run never waits for the disk or the decoding.
+   The exported scripts call the lackey functions, which decode their image with cv2.imread() on each action: the
+   lackey loader serves them the templates of the plan from memory, decoded in color in background.
+"""
+import ast
+import json
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from threading import Lock
+
+PLAN_EXT = ".plan.json"
+PREFETCH_AHEAD = 3
+PREFETCH_WORKERS = 2
+ACTIONS = {"click", "doubleClick", "rightClick", "hover", "dragDrop", "exists", "wait", "waitVanish", "find",
+           "findAll", "type", "paste", "onAppear", "onVanish", "check_click", "wait_click", "wait_template",
+           "find_any"}
+
+Action = namedtuple("Action", "line function templates")
+Action.__doc__ = """
+Action of a script: line in the source, function called and tuple of the template image paths it uses.
+"""
+
+
+def _string(node):
+    """
+    Value of a string literal of the syntax tree, ast.Str before python 3.8.
+       :param node: Node of the syntax tree.
+       :return: The value of the literal, None if the node is not a literal.
+    """
+    return node.value if isinstance(node, ast.Constant) else getattr(node, "s", None)
+
+
+class ActionPlan:
+    """
+    Ordered actions of a script and the templates they use.
+    """
+
+    def __init__(self, actions, name=None):
+        """
+        Constructor of the ActionPlan class.
+           :param actions: List of Action objects, in the order of the script.
+           :param name: Name of the script.
+        """
+        self.actions = list(actions)
+        self.name = name
+
+    def __len__(self):
+        """Number of actions using templates."""
+        return len(self.actions)
+
+    @property
+    def templates(self):
+        """Template image paths of the plan, without duplicates, in the order they are first used."""
+        return list(dict.fromkeys(template for action in self.actions for template in action.templates))
+
+    @classmethod
+    def compile(cls, source, name=None, extension=".png"):
+        """
+        Compile the action plan of a script.
+           :param source: Python 3 text of the script.
+           :param name: Name of the script.
+           :param extension: Extension of the template images.
+           :return: ActionPlan object.
+           :raise SyntaxError: If the script cannot be parsed.
+        """
+        actions = []
+        for node in ast.walk(ast.parse(source, filename=name or "<script>")):
+            if isinstance(node, ast.Call) is True:
+                function = node.func.id if isinstance(node.func, ast.Name) else getattr(node.func, "attr", None)
+                if function in ACTIONS:
+                    templates = tuple(dict.fromkeys(
+                        value for child in node.args + [keyword.value for keyword in node.keywords]
+                        for value in map(_string, ast.walk(child))
+                        if isinstance(value, str) and value.endswith(extension)))
+                    if len(templates) != 0:
+                        actions.append((node.lineno, node.col_offset, Action(node.lineno, function, templates)))
+        return cls([action for _, _, action in sorted(actions)], name=name)
+
+    @classmethod
+    def load(cls, plan_file):
+        """
+        Read a plan saved by save().
+           :param plan_file: Path of the JSON file.
+           :return: ActionPlan object.
+        """
+        with open(plan_file, mode="r", encoding="utf-8") as file:
+            plan = json.load(file)
+        return cls([Action(line, function, tuple(templates)) for line, function, templates in plan["actions"]],
+                   name=plan["name"])
+
+    def save(self, plan_file):
+        """
+        Write the plan as JSON.
+           :param plan_file: Path of the JSON file.
+        """
+        with open(plan_file, mode="w", encoding="utf-8") as file:
+            json.dump({"name": self.name, "templates": self.templates,
+                       "actions": [list(action) for action in self.actions]}, file, indent=1)
+
+
+class PlanPrefetcher:
+    """
+    Background decoding of the templates of a plan into a TemplateIndex, following the actions as they run.
+    """
+
+    def __init__(self, plan, templates, ahead=PREFETCH_AHEAD, max_workers=PREFETCH_WORKERS):
+        """
+        Constructor of the PlanPrefetcher class, nothing is loaded before start().
+           :param plan: ActionPlan object.
+           :param templates: TemplateIndex object the templates are decoded into.
+           :param ahead: Number of actions whose templates are prefetched after the current one.
+           :param max_workers: Number of background decoding threads.
+        """
+        self.plan = plan
+        self.templates = templates
+        self.ahead = ahead
+        self.cursor = 0
+        self.errors = {}
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = {}
+        self._lock = Lock()
+
+    def start(self):
+        """
+        Decode all the templates of the plan in background, in the order of the plan.
+           :return: The PlanPrefetcher object.
+        """
+        for template in self.plan.templates:
+            self._prefetch(template)
+        return self
+
+    def advance(self, img):
+        """
+        Follow the plan to the next action using an image, and prefetch the templates of the following actions.
+           :param img: Template image path used by the current action.
+           :return: Index of the action in the plan, None if the image is not in the plan.
+        """
+        with self._lock:
+            actions = self.plan.actions
+            for index in list(range(self.cursor, len(actions))) + list(range(0, self.cursor)):
+                if img in actions[index].templates:
+                    self.cursor = index + 1
+                    break
+            else:
+                return None
+        for action in actions[index + 1:index + 1 + self.ahead]:
+            for template in action.templates:
+                self._prefetch(template)
+        return index
+
+    def wait(self, timeout=None):
+        """
+        Wait for the templates being decoded.
+           :param timeout: Maximum number of seconds to wait for each template, None to wait forever.
+           :return: Number of templates in memory.
+        """
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            future.result(timeout)
+        return sum(template in self.templates for template in self.plan.templates)
+
+    def stop(self):
+        """Stop the background decoding, the templates being decoded are finished."""
+        with self._lock:
+            self._stopped = True
+        self._executor.shutdown(wait=False)
+
+    def _prefetch(self, template):
+        """
+        Decode a template in background, unless it is in memory or being decoded.
+           :param template: Template image path.
+        """
+        with self._lock:
+            if self._stopped is True or template in self._pending and (
+                    self._pending[template].done() is False or template in self.templates):
+                return
+            self._pending[template] = self._executor.submit(self._load, template)
+
+    def _load(self, template):
+        """
+        Decode a template, recording the failure of a missing or invalid image.
+           :param template: Template image path.
+        """
+        try:
+            self.templates.get(template)
+        except (OSError, ValueError) as error:
+            self.errors[template] = error
+
+
+class LackeyImages:
+    """
+    Templates decoded in color, in the BGR order of OpenCV, as lackey reads them. Same interface as TemplateIndex, to
+    be filled by a PlanPrefetcher.
+    """
+
+    def __init__(self):
+        """Constructor of the LackeyImages class, no image is decoded before the first get()."""
+        self._images = {}
+        self._lock = Lock()
+
+    def __contains__(self, img):
+        """True if the image is decoded."""
+        with self._lock:
+            return path.normcase(path.abspath(img)) in self._images
+
+    def get(self, img):
+        """
+        Color image, decoded on the first call or if the file was modified.
+           :param img: Path of the image.
+           :return: Read-only array (height, width, 3) of uint8.
+           :raise FileNotFoundError: If the image does not exist.
+           :raise ValueError: If the image cannot be decoded.
+        """
+        import cv2
+        key = path.normcase(path.abspath(img))
+        mtime = os.stat(key).st_mtime
+        with self._lock:
+            entry = self._images.get(key)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+        image = cv2.imread(key, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Image {0} cannot be decoded.".format(img))
+        image.flags.writeable = False
+        with self._lock:
+            self._images[key] = (mtime, image)
+        return image
+
+
+class LackeyLoader:
+    """
+    Stand-in of the cv2 module of lackey.RegionMatching, where lackey decodes the image of each find(), exists() or
+    wait() with cv2.imread(). The templates of the plan are served from memory and advance the plan, the other images
+    and functions are left to cv2.
+    """
+
+    def __init__(self, prefetcher):
+        """
+        Constructor of the LackeyLoader class, lackey is unchanged before install().
+           :param prefetcher: PlanPrefetcher object filling a LackeyImages object.
+        """
+        self.prefetcher = prefetcher
+        self.hits = 0
+        self._paths = {path.normcase(path.abspath(template)): template for template in prefetcher.plan.templates}
+        self._last = None
+        self._module = None
+        self._cv2 = None
+
+    def __getattr__(self, name):
+        """Functions and constants of cv2 other than imread()."""
+        if name.startswith("__") or self._cv2 is None:
+            raise AttributeError(name)
+        return getattr(self._cv2, name)
+
+    def install(self, module):
+        """
+        Serve the templates of the plan to lackey, a loader already installed being replaced.
+           :param module: The lackey module.
+           :return: The LackeyLoader object.
+        """
+        matching = module.RegionMatching
+        self._cv2 = matching.cv2._cv2 if isinstance(matching.cv2, LackeyLoader) else matching.cv2
+        self._module = matching
+        matching.cv2 = self
+        return self
+
+    def stop(self):
+        """Give back the cv2 module to lackey and stop the background decoding."""
+        if self._module is not None and self._module.cv2 is self:
+            self._module.cv2 = self._cv2
+        self._module = None
+        self.prefetcher.stop()
+
+    def imread(self, filename, flags=None):
+        """
+        Image of a file, from memory if it is a template of the plan read in color.
+           :param filename: Path of the image.
+           :param flags: cv2.imread() flags, default is None for a color image.
+           :return: Array of the image, None if it cannot be decoded, like cv2.imread().
+        """
+        template = self._paths.get(path.normcase(path.abspath(filename)))
+        if template is None or flags not in (None, self._cv2.IMREAD_COLOR):
+            return self._cv2.imread(filename) if flags is None else self._cv2.imread(filename, flags)
+        if template != self._last:  # A lackey Pattern reads its image when created and again when searched
+            self._last = template
+            self.prefetcher.advance(template)
+        try:
+            image = self.prefetcher.templates.get(template)
+        except (OSError, ValueError):
+            return None
+        self.hits += 1
+        return image
+
+
+def prefetch_lackey(plan, module=None, wait=False):
+    """
+    Serve the templates of a plan to lackey from memory, decoded in color in background. Called by the header of the
+    exported scripts, and by Pybot.load_plan().
+       :param plan: ActionPlan object, or path of an exported script, its plan being next to it.
+       :param module: The lackey module, default is None for the lackey module imported by the script.
+       :param wait: If True, return once all the templates are decoded.
+       :return: LackeyLoader object installed, None if lackey is not imported or the script has no plan.
+    """
+    module = sys.modules.get("lackey") if module is None else module
+    if isinstance(plan, str) is True:
+        plan_file = path.splitext(plan)[0] + PLAN_EXT
+        plan = ActionPlan.load(plan_file) if path.isfile(plan_file) is True else None
+    if module is None or plan is None:
+        return None
+    loader = LackeyLoader(PlanPrefetcher(plan, LackeyImages()).start()).install(module)
+    if wait is True:
+        loader.prefetcher.wait()
+    return loader
@@ -0,0 +1,220 @@
+"""
+==========
+Preprocess
+==========
+   Preprocessing of the captures before tesseract, vectorized with numpy. The capture is converted to grayscale, its
+   contrast stretched or binarized with the Otsu threshold, the text made dark on a light background, cropped to the
+   regions bearing text and eventually upscaled for the small fonts. Tesseract reads fewer pixels, in one channel, and
+   does not have to binarize the anti-aliased colored UI itself. A capture without any text is not read at all.
+   The text regions are the connected sharp edges joined along the lines, the outlines of the panels and windows and
+   the thin rules being left out. The capture is cropped to all the text regions at once and the pixels between them
+   blanked, so text spread over the whole screen still gives a large crop: pass the bounds of the text to read.
+"""
+import numpy
+
+from Pybot.template import grayscale
+
+THRESHOLDS = ("otsu", "stretch", None)
+STRETCH_PERCENTILES = (1, 99)
+CROP_MARGIN = 8
+MIN_CONTRAST = 32
+MIN_TEXT_HEIGHT = 4  # Edges of a one pixel rule are 2 pixels high
+MIN_TEXT_DENSITY = 0.25  # Share of its bounding box covered by a line of text, an outline covers much less
+
+
+def tesseract_config(psm=None, whitelist=None, extra=""):
+    """
+    Tesseract configuration string of a call.
+       :param psm: Page segmentation mode, 6 for a block of text, 7 for a single line, 8 for a single word.
+       :param whitelist: Characters recognized, "0123456789" for a counter for instance.
+       :param extra: Other tesseract options.
+       :return: Configuration string passed to tesseract.
+       :raise TypeError: If psm is not None or an integer or whitelist is not None or a string.
+    """
+    options = []
+    if psm is not None:
+        if isinstance(psm, int) is False:
+            raise TypeError("Kwarg psm must be an integer or None.")
+        options.append("--psm {0}".format(psm))
+    if whitelist is not None:
+        if isinstance(whitelist, str) is False:
+            raise TypeError("Kwarg whitelist must be a string or None.")
+        options.append("-c tessedit_char_whitelist={0}".format(whitelist.replace(" ", "")))
+    if extra:
+        options.append(extra)
+    return " ".join(options)
+
+
+def stretch(gray, percentiles=STRETCH_PERCENTILES):
+    """
+    Stretch the contrast of a grayscale image to the full range, the extreme percentiles being saturated.
+       :param gray: 2 dimensions array of uint8.
+       :param percentiles: Tuple of the low and high percentiles mapped to 0 and 255.
+       :return: 2 dimensions array of uint8.
+    """
+    low, high = numpy.percentile(gray, percentiles)
+    if high <= low:
+        return gray
+    lut = numpy.clip(numpy.rint((numpy.arange(256) - low) * (255.0 / (high - low))), 0, 255)
+    return lut.astype(numpy.uint8)[gray]
+
+
+def otsu(gray):
+    """
+    Otsu threshold of a grayscale image, maximizing the variance between the dark and light pixels.
+       :param gray: 2 dimensions array of uint8.
+       :return: Threshold, the pixels above it being light.
+    """
+    histogram = numpy.bincount(gray.ravel(), minlength=256).astype(numpy.float64)
+    weights = numpy.cumsum(histogram)
+    means = numpy.cumsum(histogram * numpy.arange(256))
+    total = weights[-1]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        variance = (means[-1] * weights - means * total) ** 2 / (weights * (total - weights))
+    return int(numpy.nanargmax(variance[:-1])) if total != 0 else 127
+
+
+def edges(gray, min_contrast=MIN_CONTRAST):
+    """
+    Pixels on a sharp edge, the strokes of the text, unlike the gradients and flat areas of the background.
+       :param gray: 2 dimensions array of uint8.
+       :param min_contrast: Minimum difference of gray levels between neighbour pixels.
+       :return: 2 dimensions array of booleans.
+    """
+    gray = gray.astype(numpy.int16)
+    mask = numpy.zeros(gray.shape, dtype=bool)
+    mask[:, 1:] |= numpy.abs(numpy.diff(gray, axis=1)) >= min_contrast
+    mask[1:, :] |= numpy.abs(numpy.diff(gray, axis=0)) >= min_contrast
+    return mask
+
+
+def text_bounds(ink, margin=CROP_MARGIN):
+    """
+    Bounding box of the ink pixels.
+       :param ink: 2 dimensions array of booleans, True for the pixels of the text, as returned by edges().
+       :param margin: Number of pixels kept around the text.
+       :return: Tuple (x, y, width, height), None if there is no ink.
+    """
+    rows = numpy.flatnonzero(ink.any(axis=1))
+    if len(rows) == 0:
+        return None
+    columns = numpy.flatnonzero(ink.any(axis=0))
+    top, bottom = max(0, rows[0] - margin), min(ink.shape[0], rows[-1] + 1 + margin)
+    left, right = max(0, columns[0] - margin), min(ink.shape[1], columns[-1] + 1 + margin)
+    return int(left), int(top), int(right - left), int(bottom - top)
+
+
+def text_regions(ink, margin=CROP_MARGIN):
+    """
+    Bounding boxes of the lines of text: the ink pixels are joined along the rows up to margin pixels apart, and the
+    connected regions thinner than MIN_TEXT_HEIGHT or covering less than MIN_TEXT_DENSITY of their bounding box, the
+    rules and the outlines of the panels, are left out.
+       :param ink: 2 dimensions array of booleans, True for the pixels of the text, as returned by edges().
+       :param margin: Number of pixels joining the ink of a line, and kept around the text.
+       :return: List of tuples (x, y, width, height), empty if there is no text.
+    """
+    import cv2
+    if ink.size == 0 or bool(ink.any()) is False:
+        return []
+    lines = cv2.dilate(ink.astype(numpy.uint8), numpy.ones((1, 2 * margin + 1), dtype=numpy.uint8))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(lines, connectivity=8)
+    regions = []
+    for x, y, width, height, area in stats[1:count].tolist():
+        if height >= MIN_TEXT_HEIGHT and area >= MIN_TEXT_DENSITY * width * height:
+            top, bottom = max(0, y - margin), min(ink.shape[0], y + height + margin)
+            regions.append((x, top, width, bottom - top))  # The joining already kept the margin along the rows
+    return regions
+
+
+def upscale(gray, factor):
+    """
+    Enlarge an image by an integer factor, each pixel being repeated.
+       :param gray: 2 dimensions array.
+       :param factor: Integer factor.
+       :return: 2 dimensions array factor times larger.
+    """
+    if factor == 1:
+        return gray
+    return numpy.repeat(numpy.repeat(gray, factor, axis=0), factor, axis=1)
+
+
+class Preprocess:
+    """
+    Preprocessing of the captures read by tesseract, configured once and applied to each capture.
+    """
+
+    def __init__(self, threshold="otsu", crop=True, scale=1, margin=CROP_MARGIN, min_contrast=MIN_CONTRAST):
+        """
+        Constructor of the Preprocess class.
+           :param threshold: otsu to binarize, stretch to only stretch the contrast or None to keep the gray levels.
+           :param crop: If True, crop to the regions bearing text and blank the pixels between them, a capture
+              without text is not read.
+           :param scale: Integer upscaling factor, 2 or 3 for the fonts smaller than 10 pixels.
+           :param margin: Number of pixels kept around the text when cropping.
+           :param min_contrast: Minimum difference of gray levels between the text and the background, a capture
+              without such an edge has no text.
+           :raise TypeError: If threshold is unknown, crop not a boolean or scale, margin or min_contrast not a
+              positive integer.
+        """
+        if threshold not in THRESHOLDS:
+            raise TypeError("Kwarg threshold must be in {0}.".format(THRESHOLDS))
+        if isinstance(crop, bool) is False:
+            raise TypeError("Kwarg crop must be a boolean type, True or False.")
+        for value in (scale, margin, min_contrast):
+            if isinstance(value, int) is False or value < 0:
+                raise TypeError("Kwargs scale, margin and min_contrast must be positive integers.")
+        if scale < 1:
+            raise TypeError("Kwarg scale must be an integer of at least 1.")
+        self.threshold = threshold
+        self.crop = crop
+        self.scale = scale
+        self.margin = margin
+        self.min_contrast = min_contrast
+
+    def __repr__(self):
+        """Parameters of the preprocessing, part of the key of the OCR cache."""
+        return "Preprocess(threshold={0!r}, crop={1}, scale={2}, margin={3}, min_contrast={4})".format(
+            self.threshold, self.crop, self.scale, self.margin, self.min_contrast)
+
+    def apply(self, data):
+        """
+        Preprocess a capture.
+           :param data: Array of pixels as returned by Pybot.capture().
+           :return: 2 dimensions array of uint8, dark text on a light background, None if there is no text.
+        """
+        return self.transform(data)[0]
+
+    def transform(self, data):
+        """
+        Preprocess a capture, giving where the result is in the capture.
+           :param data: Array of pixels as returned by Pybot.capture().
+           :return: Tuple of the array returned by apply() and the x and y offset of its crop in the capture, its
+              scale being self.scale.
+        """
+        gray = grayscale(data)
+        if gray.size == 0:
+            return None, 0, 0
+        x, y = 0, 0
+        if self.crop is True:
+            regions = text_regions(edges(gray, self.min_contrast), self.margin)
+            if len(regions) == 0:
+                return None, 0, 0
+            x, y = min(left for left, _, _, _ in regions), min(top for _, top, _, _ in regions)
+            keep = numpy.zeros((max(top + height for _, top, _, height in regions) - y,
+                                max(left + width for left, _, width, _ in regions) - x), dtype=bool)
+            for left, top, width, height in regions:
+                keep[top - y:top - y + height, left - x:left - x + width] = True
+            gray = gray[y:y + keep.shape[0], x:x + keep.shape[1]]
+            if bool(keep.all()) is False:
+                background = numpy.bincount(gray[keep]).argmax()  # Most common gray level around the text
+                gray = numpy.where(keep, gray, numpy.uint8(background))
+        if self.threshold is not None:
+            dark = gray <= otsu(gray)
+            if numpy.count_nonzero(dark) * 2 > dark.size:
+                dark = ~dark  # Light text on a dark background
+                gray = 255 - gray
+            if self.threshold == "otsu":
+                gray = numpy.where(dark, numpy.uint8(0), numpy.uint8(255))
+            else:
+                gray = stretch(gray)
+        return numpy.ascontiguousarray(upscale(gray, self.scale)), x, y
@@ -0,0 +1,174 @@
+"""
+=======
+Process
+=======
+   In process inspection of the running programs. The process table is read once per snapshot, from /proc on Linux or
+   a single tasklist (Windows) or ps (Darwin) call, and kept during a short TTL to answer many checks. The processes are
+   signaled directly, without any shell.
+"""
+import csv
+import os
+import platform
+import signal
+import subprocess
+from os import path
+from threading import Lock
+from time import monotonic
+
+PROCESS_TTL = 0.5
+PROC_FOLDER = "/proc"
+
+
+def _read_proc():
+    """
+    Read the process table from /proc.
+       :return: List of (pid, name) tuples, a process being listed under its comm name and its executable name.
+    """
+    processes = []
+    for entry in os.listdir(PROC_FOLDER):
+        if entry.isdigit() is False:
+            continue
+        pid = int(entry)
+        try:
+            with open(path.join(PROC_FOLDER, entry, "comm"), "rb") as comm:
+                processes.append((pid, comm.read().decode(errors="replace").strip()))
+            with open(path.join(PROC_FOLDER, entry, "cmdline"), "rb") as cmdline:
+                executable = cmdline.read().split(b"\0", 1)[0]
+        except OSError:
+            continue
+        if len(executable) != 0:
+            processes.append((pid, path.basename(executable.decode(errors="replace"))))
+    return processes
+
+
+def _read_tasklist():
+    """
+    Read the process table with a single tasklist call.
+       :return: List of (pid, name) tuples.
+    """
+    output = subprocess.check_output(["tasklist", "/FO", "CSV", "/NH"]).decode(errors="replace")
+    return [(int(row[1]), row[0]) for row in csv.reader(output.splitlines()) if len(row) > 1 and row[1].isdigit()]
+
+
+def _read_ps():
+    """
+    Read the process table with a single ps call.
+       :return: List of (pid, name) tuples.
+    """
+    output = subprocess.check_output(["ps", "-axo", "pid=,comm="]).decode(errors="replace")
+    processes = []
+    for line in output.splitlines():
+        pid, _, command = line.strip().partition(" ")
+        if pid.isdigit() is True:
+            processes.append((int(pid), path.basename(command.strip())))
+    return processes
+
+
+class ProcessTable:
+    """
+    Snapshot of the running processes by program name, refreshed when older than a TTL.
+    """
+
+    def __init__(self, ttl=PROCESS_TTL, os_type=None):
+        """
+        Constructor of the ProcessTable class, the process table is read on the first query.
+           :param ttl: Number of seconds a snapshot is used to answer the queries.
+           :param os_type: Platform system name, default is None for the current one.
+           :raise TypeError: If ttl is not an integer or a float.
+        """
+        if isinstance(ttl, (int, float)) is False:
+            raise TypeError("Kwarg ttl must be an integer or a float.")
+        self.ttl = ttl
+        self.os_type = platform.system() if os_type is None else os_type
+        self._snapshot = None
+        self._updated = None
+        self._lock = Lock()
+
+    def snapshot(self):
+        """
+        Running processes, read again only if the snapshot is older than the TTL.
+           :return: Dictionary of the program names and the set of their pids.
+        """
+        with self._lock:
+            if self._snapshot is None or monotonic() - self._updated > self.ttl:
+                self._snapshot = self._read()
+                self._updated = monotonic()
+            return self._snapshot
+
+    def invalidate(self):
+        """Forget the snapshot, the next query reads the process table."""
+        with self._lock:
+            self._snapshot = None
+
+    def pids(self, pgm):
+        """
+        Processes of a program.
+           :param pgm: Program name, with the .exe extension on Windows.
+           :return: Set of the pids.
+        """
+        return set(self.snapshot().get(self._key(pgm), ()))
+
+    def running(self, pgm):
+        """
+        Check if a program is running.
+           :param pgm: Program name, with the .exe extension on Windows.
+           :return: True if program running, False on contrary.
+        """
+        return len(self.pids(pgm)) != 0
+
+    def running_all(self, pgms):
+        """
+        Check many programs with the same snapshot.
+           :param pgms: List of program names.
+           :return: Dictionary of the program names and True if running, False on contrary.
+        """
+        snapshot = self.snapshot()
+        return {pgm: self._key(pgm) in snapshot for pgm in pgms}
+
+    def kill(self, pgms, sig=signal.SIGTERM):
+        """
+        Signal all the processes of many programs, the snapshot is forgotten afterwards.
+           :param pgms: List of program names.
+           :param sig: Signal sent to the processes, terminating them on Windows whatever the signal.
+           :return: Dictionary of the program names and True if at least one process was signaled and none failed,
+              False on contrary.
+        """
+        snapshot = self.snapshot()
+        result = {}
+        for pgm in pgms:
+            pids = snapshot.get(self._key(pgm), set())
+            killed = len(pids) != 0
+            for pid in pids:
+                try:
+                    os.kill(pid, sig)
+                except ProcessLookupError:
+                    pass
+                except OSError:
+                    killed = False
+            result[pgm] = killed
+        self.invalidate()
+        return result
+
+    def _key(self, pgm):
+        """
+        Key of a program name in the snapshot, case insensitive on Windows.
+           :param pgm: Program name.
+           :return: The name used in the snapshot.
+        """
+        return pgm.lower() if self.os_type == "Windows" else pgm
+
+    def _read(self):
+        """
+        Read the process table of the platform.
+           :return: Dictionary of the program names and the set of their pids.
+        """
+        if self.os_type == "Windows":
+            processes = _read_tasklist()
+        elif self.os_type == "Darwin" or path.isdir(PROC_FOLDER) is False:
+            processes = _read_ps()
+        else:
+            processes = _read_proc()
+        snapshot = {}
+        for pid, name in processes:
+            snapshot.setdefault(self._key(name), set()).add(pid)
+        return snapshot
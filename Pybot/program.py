@@ -0,0 +1,200 @@
+"""
+=======
+Program
+=======
+   Handle of a program started by Pybot, with its pid, output streams and exit status, and readiness probes to wait for
+   the program to be ready instead of sleeping a fixed number of seconds. A probe is a callable taking the handle and
+   returning True when the program is ready.
+"""
+import os
+import re
+import socket
+import subprocess
+from collections import deque
+from os import path
+from threading import Thread, Lock
+
+from Pybot.wait import wait_until
+
+START_TIMEOUT = 30
+LOG_LINES = 10000
+
+
+def port_open(port, host="127.0.0.1"):
+    """
+    Probe of a TCP port accepting connections.
+       :param port: TCP port number.
+       :param host: Host name or address.
+       :return: Probe callable.
+    """
+    def probe(handle):
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return True
+        except OSError:
+            return False
+    return probe
+
+
+def log_line(pattern):
+    """
+    Probe of a line of the program output (stdout or stderr) matching a regular expression.
+       :param pattern: Regular expression searched in the lines.
+       :return: Probe callable.
+    """
+    regex = re.compile(pattern)
+    return lambda handle: handle.search(regex) is not None
+
+
+def file_exists(file_path):
+    """
+    Probe of a file existing.
+       :param file_path: Path of the file.
+       :return: Probe callable.
+    """
+    return lambda handle: path.exists(file_path)
+
+
+def template_found(pybot, img):
+    """
+    Probe of a template image, a window for instance, appearing on the screen.
+       :param pybot: Pybot object searching the screen.
+       :param img: Image path of the template.
+       :return: Probe callable.
+    """
+    return lambda handle: pybot.find(img) is not None
+
+
+class ProgramHandle:
+    """
+    Program started in background, its output being collected by reader threads.
+    """
+
+    def __init__(self, args, cwd=None):
+        """
+        Constructor of the ProgramHandle class, starting the program.
+           :param args: List of the program and its arguments.
+           :param cwd: Working directory of the program, None for the current one.
+           :raise OSError: If the program cannot be started.
+        """
+        self.args = args
+        self.ready = None
+        self._lines = deque(maxlen=LOG_LINES)
+        self._lock = Lock()
+        if os.name == "nt":
+            # Own console like START CMD /C, the program keeps an interactive stdin.
+            self.process = subprocess.Popen(args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                            creationflags=subprocess.CREATE_NEW_CONSOLE)
+        else:
+            self.process = subprocess.Popen(args, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE)
+        self._readers = [Thread(target=self._read, args=(stream, name), daemon=True)
+                         for stream, name in ((self.process.stdout, "stdout"), (self.process.stderr, "stderr"))]
+        for reader in self._readers:
+            reader.start()
+
+    def __repr__(self):
+        """Description of the program handle."""
+        return "<ProgramHandle {0} pid={1} returncode={2}>".format(self.args[0], self.pid, self.returncode)
+
+    def __bool__(self):
+        """True if the program is running or ended successfully."""
+        return self.returncode in (None, 0)
+
+    @property
+    def pid(self):
+        """Process identifier of the program."""
+        return self.process.pid
+
+    @property
+    def returncode(self):
+        """Exit status of the program, None while running."""
+        return self.process.poll()
+
+    @property
+    def running(self):
+        """True if the program is running."""
+        return self.returncode is None
+
+    @property
+    def stdout(self):
+        """Last lines written by the program on its standard output."""
+        return self._output("stdout")
+
+    @property
+    def stderr(self):
+        """Last lines written by the program on its error output."""
+        return self._output("stderr")
+
+    def search(self, regex):
+        """
+        Search the output of the program.
+           :param regex: Compiled regular expression.
+           :return: The first line matching, None if not found.
+        """
+        with self._lock:
+            lines = list(self._lines)
+        for _, line in lines:
+            if regex.search(line) is not None:
+                return line
+        return None
+
+    def wait_ready(self, probes, timeout=START_TIMEOUT):
+        """
+        Wait for all the readiness probes to pass. The wait stops if the program ends before being ready.
+           :param probes: Probe callable, or list of probe callables.
+           :param timeout: Maximum number of seconds to wait.
+           :return: WaitResult object, ok being True if the program is ready.
+        """
+        if callable(probes) is True:
+            probes = [probes]
+
+        def probe():
+            ready = all(ready_probe(self) for ready_probe in probes)
+            return ready or self.running is False, ready, False
+
+        result = wait_until(probe, timeout)
+        self.ready = result._replace(ok=result.value is True)
+        return self.ready
+
+    def wait(self, timeout=None):
+        """
+        Wait for the program to end.
+           :param timeout: Maximum number of seconds to wait, None to wait forever.
+           :return: Exit status of the program.
+           :raise subprocess.TimeoutExpired: If the program is still running after timeout.
+        """
+        return_code = self.process.wait(timeout)
+        for reader in self._readers:
+            reader.join()
+        return return_code
+
+    def terminate(self):
+        """Terminate the program."""
+        if self.running is True:
+            self.process.terminate()
+
+    def kill(self):
+        """Kill the program."""
+        if self.running is True:
+            self.process.kill()
+
+    def _output(self, name):
+        """
+        Lines of an output of the program.
+           :param name: stdout or stderr.
+           :return: Text of the lines.
+        """
+        with self._lock:
+            return "".join(line for stream, line in self._lines if stream == name)
+
+    def _read(self, stream, name):
+        """
+        Thread collecting the lines of an output of the program.
+           :param stream: Output stream of the process.
+           :param name: stdout or stderr.
+        """
+        for line in iter(stream.readline, b""):
+            with self._lock:
+                self._lines.append((name, line.decode(errors="replace")))
+        stream.close()
@@ -0,0 +1,61 @@
+"""
+======
+Runner
+======
+   Run an automation task against many Android devices in parallel. Each worker gets its own device context, with the
+   serial number, the capture source and the input channel of its device. The number of devices driven at the same time
+   is bounded, and a failing device does not stop the others: results and timings are collected per device.
+   A task is a callable taking the device context. The scripts exported by Pybot.export_sikuli_script() are not
+   accepted: they drive the single desktop through lackey, its mouse and screen, not the device of a worker.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+RUNNER_WORKERS = 4
+
+DeviceContext = namedtuple("DeviceContext", "serial screen input")
+DeviceContext.__doc__ = """
+Device of a worker: its serial number, its AndroidScreen capture source and its AndroidInput channel.
+"""
+
+DeviceResult = namedtuple("DeviceResult", "serial ok value error elapsed")
+DeviceResult.__doc__ = """
+Result of a task on a device: ok is True if the task succeeded, value what the callable returned, error the exception
+raised and elapsed the number of seconds of the task.
+"""
+
+def run_task(task, context):
+    """
+    Run a task for a device, catching its failure.
+       :param task: Callable taking the DeviceContext object.
+       :param context: DeviceContext object of the device.
+       :return: DeviceResult object, ok being False if the task raised an exception.
+    """
+    start = perf_counter()
+    try:
+        return DeviceResult(context.serial, True, task(context), None, perf_counter() - start)
+    except Exception as error:
+        return DeviceResult(context.serial, False, None, error, perf_counter() - start)
+
+
+def run_devices(task, contexts, max_workers=RUNNER_WORKERS):
+    """
+    Run a task against many devices in parallel.
+       :param task: Callable taking a DeviceContext object.
+       :param contexts: List of the DeviceContext objects of the devices.
+       :param max_workers: Maximum number of devices driven at the same time.
+       :return: Dictionary of the serial numbers and the DeviceResult objects, in the order of the contexts.
+       :raise TypeError: If task is not a callable, an exported script driving the desktop and not the devices, or
+          max_workers is not a positive integer.
+    """
+    if callable(task) is False:
+        raise TypeError("First argument task must be a callable taking a DeviceContext object, the exported scripts "
+                        "drive the desktop and not the devices.")
+    if isinstance(max_workers, int) is False or max_workers < 1:
+        raise TypeError("Kwarg max_workers must be a positive integer.")
+    if len(contexts) == 0:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(contexts))) as executor:
+        results = executor.map(lambda context: run_task(task, context), contexts)
+        return {result.serial: result for result in results}
@@ -0,0 +1,201 @@
+"""
+================
+Screenshot store
+================
+   Content addressed store of the screenshots, apart from the Sikuli templates of the img folder. A screenshot is named
+   by a hash of its pixels, so identical frames are stored once, and saved in sharded directories to keep them small.
+   The encoding is configurable, PNG with a compression level or lossless WebP. A retention policy by number, total size
+   or age evicts the oldest files and their rows of the cache database together.
+"""
+import os
+from collections import OrderedDict
+from os import path
+from threading import Lock
+from time import time
+
+from Pybot.ocr_cache import frame_key
+
+SCREENSHOT_COUNT = 10000
+SCREENSHOT_BYTES = 1024 ** 3
+SCREENSHOT_AGE = None
+PNG_COMPRESS_LEVEL = 6
+ENCODINGS = {"png": ".png", "webp": ".webp"}
+
+
+class ScreenshotStore:
+    """
+    Screenshots stored once per content in folder/ab/cd/abcd....png, with a retention by number, size and age. The
+    files are indexed in memory, from the folder on first use, and recorded in the screenshot_file table of the cache
+    database if any.
+    """
+
+    def __init__(self, folder, database=None, node=None, encoding="png", compress_level=PNG_COMPRESS_LEVEL,
+                 max_count=SCREENSHOT_COUNT, max_bytes=SCREENSHOT_BYTES, max_age=SCREENSHOT_AGE):
+        """
+        Constructor of the ScreenshotStore class, nothing is read before the first use.
+           :param folder: Root folder of the store.
+           :param database: CacheDatabase object recording the screenshots, None to only store the files.
+           :param node: Name of the computer recorded with the screenshots.
+           :param encoding: png or webp, the WebP files being lossless.
+           :param compress_level: zlib compression level of the PNG files, from 0 (fastest) to 9 (smallest).
+           :param max_count: Maximum number of screenshots kept, None for no limit.
+           :param max_bytes: Maximum total size in bytes of the screenshots kept, None for no limit.
+           :param max_age: Maximum age in seconds of a screenshot, None to keep them forever.
+           :raise TypeError: If encoding is unknown, compress_level is not an integer from 0 to 9 or a limit is not a
+              number or None.
+        """
+        if encoding not in ENCODINGS:
+            raise TypeError("Kwarg encoding must be in {0}.".format(sorted(ENCODINGS)))
+        if isinstance(compress_level, int) is False or not 0 <= compress_level <= 9:
+            raise TypeError("Kwarg compress_level must be an integer from 0 to 9.")
+        for limit in (max_count, max_bytes, max_age):
+            if isinstance(limit, (int, float)) is False and limit is not None:
+                raise TypeError("Kwargs max_count, max_bytes and max_age must be integers, floats or None.")
+        self.folder = folder
+        self.database = database
+        self.node = node
+        self.encoding = encoding
+        self.compress_level = compress_level
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stored = 0
+        self.deduplicated = 0
+        self.evicted = 0
+        self._lock = Lock()
+        self._index = None
+        self._bytes = 0
+
+    def __len__(self):
+        """Number of screenshots stored."""
+        with self._lock:
+            return len(self._files())
+
+    @property
+    def size(self):
+        """Total size in bytes of the screenshots stored."""
+        with self._lock:
+            self._files()
+            return self._bytes
+
+    def get(self, key):
+        """
+        Path of a screenshot in the store.
+           :param key: Digest returned by frame_key().
+           :return: Path of the file, None if not stored.
+        """
+        with self._lock:
+            entry = self._files().get(key)
+        return None if entry is None else entry[0]
+
+    def put(self, data, text=""):
+        """
+        Store a screenshot, an identical frame already stored is only refreshed. The retention policy is applied
+        afterwards.
+           :param data: Array of pixels as returned by Pybot.capture().
+           :param text: Text read in the screenshot, recorded in the database.
+           :return: Path of the file.
+        """
+        key = frame_key(data)
+        with self._lock:
+            files = self._files()
+            entry = files.get(key)
+            now = time()
+            if entry is not None and path.isfile(entry[0]) is True:
+                file_path, size, _ = entry
+                os.utime(file_path, (now, now))
+                files.move_to_end(key)
+                self.deduplicated += 1
+            else:
+                if entry is not None:
+                    self._bytes -= entry[1]
+                file_path = path.join(self.folder, key[:2], key[2:4], key + ENCODINGS[self.encoding])
+                size = self._write(data, file_path)
+                self._bytes += size
+                self.stored += 1
+            files[key] = (file_path, size, now)
+            if self.database is not None:
+                request = "INSERT OR REPLACE INTO screenshot_file VALUES(?, ?, ?, ?, ?, DATETIME('now', 'localtime'));"
+                self.database.execute(request, (key, file_path, self.node, text, size,))
+            self._retain(now)
+        return file_path
+
+    def evict(self):
+        """
+        Apply the retention policy.
+           :return: Number of screenshots evicted.
+        """
+        with self._lock:
+            return self._retain(time())
+
+    def stats(self):
+        """
+        Statistics of the store.
+           :return: Dictionary with the number of screenshots (count) and their size (bytes), the number of files
+              written (stored), of identical frames not written again (deduplicated) and of screenshots evicted.
+        """
+        with self._lock:
+            files = self._files()
+            return {"count": len(files), "bytes": self._bytes, "stored": self.stored,
+                    "deduplicated": self.deduplicated, "evicted": self.evicted}
+
+    def _files(self):
+        """
+        Index of the screenshots, read from the folder on first use. The lock must be held.
+           :return: OrderedDict of the digests and (path, size, time) tuples, the oldest first.
+        """
+        if self._index is None:
+            entries = []
+            for directory, _, file_names in os.walk(self.folder):
+                for file_name in file_names:
+                    key, extension = path.splitext(file_name)
+                    if extension in ENCODINGS.values() and len(key) == 40:
+                        file_path = path.join(directory, file_name)
+                        info = os.stat(file_path)
+                        entries.append((info.st_mtime, key, file_path, info.st_size))
+            self._index = OrderedDict((key, (file_path, size, mtime))
+                                      for mtime, key, file_path, size in sorted(entries))
+            self._bytes = sum(size for _, size, _ in self._index.values())
+        return self._index
+
+    def _write(self, data, file_path):
+        """
+        Encode a screenshot to its file.
+           :param data: Array of pixels.
+           :param file_path: Path of the file.
+           :return: Size of the file in bytes.
+        """
+        from PIL import Image
+        os.makedirs(path.dirname(file_path), exist_ok=True)
+        img = Image.fromarray(data)
+        if self.encoding == "webp":
+            img.save(file_path, format="WEBP", lossless=True)
+        else:
+            img.save(file_path, format="PNG", compress_level=self.compress_level)
+        return os.stat(file_path).st_size
+
+    def _retain(self, now):
+        """
+        Evict the oldest screenshots until the store is within its limits. The lock must be held.
+           :param now: Current time in seconds since the epoch.
+           :return: Number of screenshots evicted.
+        """
+        files = self._files()
+        evicted = 0
+        while len(files) != 0:
+            key, (file_path, size, mtime) = next(iter(files.items()))
+            if (self.max_count is None or len(files) <= self.max_count) and \
+                    (self.max_bytes is None or self._bytes <= self.max_bytes) and \
+                    (self.max_age is None or now - mtime <= self.max_age):
+                break
+            del files[key]
+            self._bytes -= size
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            if self.database is not None:
+                self.database.execute("DELETE FROM screenshot_file WHERE digest = ?;", (key,))
+            evicted += 1
+        self.evicted += evicted
+        return evicted
@@ -0,0 +1,228 @@
+"""
+=============
+Sikuli export
+=============
+   Incremental and parallel export of many Sikuli projects. A manifest in the export directory keeps the content hash
+   of the script and images of each project, so a project is only exported again if its files changed, and an image is
+   only copied if its content changed. The scripts are converted to python 3 in process with lib2to3, and the changed
+   projects are exported in parallel processes. The action plan of each script, the templates used by its actions, is
+   compiled at the same time, and the python 3 scripts load it when they start, so lackey reads their templates from
+   memory.
+"""
+import hashlib
+import json
+import os
+import re
+import warnings
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from os import path
+from shutil import copyfile
+
+from Pybot.plan import ActionPlan, PLAN_EXT
+
+SIKULI_FOLDER = "sikuli_project"
+SIKULI_EXT = ".sikuli"
+MANIFEST_FILE = ".pybot_export.json"
+IMAGE_EXT = ".png"
+IMAGE_REGEX = re.compile(r'([0-9]{13}.png)')
+EXPORT_HEADER = "'''Generated by Pybot Framework'''\nfrom lackey import *\n"
+PLAN_HEADER = "from Pybot.plan import prefetch_lackey\nprefetch_lackey(__file__)\n"
+
+ExportResult = namedtuple("ExportResult", "project exported images error")
+ExportResult.__doc__ = """
+Result of the export of a project: exported is True if the script was written again, images the number of images
+copied and error the exception raised, None on success.
+"""
+
+_refactoring_tool = None
+
+
+def file_digest(file_path, previous=None):
+    """
+    Content hash of a file, computed again only if its size or modification time changed.
+       :param file_path: Path of the file.
+       :param previous: Entry of the file in the manifest, None if unknown.
+       :return: Manifest entry, list of the size, modification time in nanoseconds and hexadecimal digest.
+    """
+    info = os.stat(file_path)
+    if previous is not None and previous[:2] == [info.st_size, info.st_mtime_ns]:
+        return previous
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return [info.st_size, info.st_mtime_ns, digest.hexdigest()]
+
+
+def convert(source, name="<sikuli>"):
+    """
+    Convert a Jython 2 Sikuli script to python 3 with the 2to3 fixers, in process.
+       :param source: Text of the script.
+       :param name: Name of the script in the error messages.
+       :return: Text of the converted script.
+       :raise PybotException: If lib2to3 is not available (python 3.13+), export with to_python3=False.
+    """
+    global _refactoring_tool
+    if _refactoring_tool is None:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                from lib2to3.refactor import RefactoringTool, get_fixers_from_package
+        except ImportError:
+            from Pybot.Pybot import PybotException
+            raise PybotException("Script {0} cannot be converted to python 3 without lib2to3, export it with "
+                                 "to_python3=False.".format(name))
+        _refactoring_tool = RefactoringTool(get_fixers_from_package("lib2to3.fixes"))
+    if source.endswith("\n") is False:
+        source += "\n"
+    return str(_refactoring_tool.refactor_string(source, name))
+
+
+def export_project(project_name, directory, img_folder, sikuli_folder=SIKULI_FOLDER, previous=None, to_python3=True):
+    """
+    Export a Sikuli project, skipping its script and images if unchanged since the previous export.
+       :param project_name: Name of the project, folder project_name.sikuli of sikuli_folder.
+       :param directory: Export directory of the script.
+       :param img_folder: Folder the images are copied to.
+       :param sikuli_folder: Folder of the Sikuli projects.
+       :param previous: Manifest entry of the previous export of the project, None to export everything.
+       :param to_python3: If True, convert the script to python 3.
+       :return: Tuple of the ExportResult object and the new manifest entry of the project.
+    """
+    project_folder = path.join(sikuli_folder, project_name + SIKULI_EXT)
+    previous = {} if previous is None else previous
+    script = path.join(project_folder, project_name + ".py")
+    new_file = path.join(directory, project_name + ".py")
+    plan_file = path.join(directory, project_name + PLAN_EXT)
+    entry = {"script": file_digest(script, previous.get("script")), "python3": to_python3, "images": {}}
+    exported = entry["script"][-1] != previous.get("script", [None])[-1] or to_python3 != previous.get("python3") or \
+        path.isfile(new_file) is False or (to_python3 is True and path.isfile(plan_file) is False)
+    if exported is True:
+        with open(script, mode="r", encoding="utf-8") as file_to_export:
+            data_to_export = file_to_export.read()
+        header = EXPORT_HEADER
+        if to_python3 is True:
+            data_to_export = convert(data_to_export, name=script)
+            header += PLAN_HEADER
+        data_to_export = IMAGE_REGEX.sub(r'img/\1', "".join([header, data_to_export]))
+        with open(new_file, mode="w", encoding="utf-8") as file_to_write:
+            file_to_write.write(data_to_export)
+        if to_python3 is True:
+            ActionPlan.compile(data_to_export, name=project_name).save(plan_file)
+    images = 0
+    previous_images = previous.get("images", {})
+    for file_name in sorted(os.listdir(project_folder)):
+        if file_name.endswith(IMAGE_EXT):
+            img = path.join(project_folder, file_name)
+            digest = file_digest(img, previous_images.get(file_name))
+            entry["images"][file_name] = digest
+            target = path.join(img_folder, file_name)
+            if previous_images.get(file_name, [None])[-1] != digest[-1] or path.isfile(target) is False:
+                copyfile(img, target)
+                images += 1
+    return ExportResult(project_name, exported, images, None), entry
+
+
+def unchanged(project_name, directory, img_folder, sikuli_folder=SIKULI_FOLDER, previous=None, to_python3=True):
+    """
+    Check that the content of a project and its exported files did not change since the previous export, without
+    reading any file whose size and modification time are unchanged. A file touched with the same content is
+    unchanged.
+       :param project_name: Name of the project, folder project_name.sikuli of sikuli_folder.
+       :param directory: Export directory of the script.
+       :param img_folder: Folder the images are copied to.
+       :param sikuli_folder: Folder of the Sikuli projects.
+       :param previous: Manifest entry of the previous export of the project, None if never exported.
+       :param to_python3: If True, the script is converted to python 3.
+       :return: True if the export can be skipped, False on contrary.
+    """
+    if previous is None or previous.get("python3") != to_python3:
+        return False
+    project_folder = path.join(sikuli_folder, project_name + SIKULI_EXT)
+    script = path.join(project_folder, project_name + ".py")
+    if file_digest(script, previous["script"])[-1] != previous["script"][-1] or \
+            path.isfile(path.join(directory, project_name + ".py")) is False or \
+            (to_python3 is True and path.isfile(path.join(directory, project_name + PLAN_EXT)) is False):
+        return False
+    images = sorted(file_name for file_name in os.listdir(project_folder) if file_name.endswith(IMAGE_EXT))
+    if images != sorted(previous["images"]):
+        return False
+    return all(file_digest(path.join(project_folder, file_name), previous["images"][file_name])[-1] ==
+               previous["images"][file_name][-1] and path.isfile(path.join(img_folder, file_name)) is True
+               for file_name in images)
+
+
+def _export_task(args):
+    """
+    Export a project in a worker process, catching its failure.
+       :param args: Tuple of the export_project() arguments.
+       :return: Tuple of the ExportResult object and the new manifest entry, None on failure.
+    """
+    try:
+        return export_project(*args)
+    except Exception as error:
+        return ExportResult(args[0], False, 0, error), None
+
+
+def sikuli_projects(sikuli_folder=SIKULI_FOLDER):
+    """
+    Sikuli projects of a folder.
+       :param sikuli_folder: Folder of the Sikuli projects.
+       :return: Sorted list of the project names.
+    """
+    return sorted(name[:-len(SIKULI_EXT)] for name in os.listdir(sikuli_folder)
+                  if name.endswith(SIKULI_EXT) and path.isdir(path.join(sikuli_folder, name)))
+
+
+def export_projects(projects=None, directory="script", img_folder="img/", sikuli_folder=SIKULI_FOLDER, max_workers=None,
+                    to_python3=True):
+    """
+    Export many Sikuli projects in parallel processes, the unchanged projects being skipped thanks to the manifest of
+    the export directory.
+       :param projects: List of the project names, default is None for all the projects of sikuli_folder.
+       :param directory: Export directory of the scripts, where the manifest is kept.
+       :param img_folder: Folder the images are copied to.
+       :param sikuli_folder: Folder of the Sikuli projects.
+       :param max_workers: Maximum number of projects exported at the same time, default depends on the CPU.
+       :param to_python3: If True, convert the scripts to python 3.
+       :return: Dictionary of the project names and ExportResult objects.
+       :raise TypeError: If projects is not None or a list of strings.
+    """
+    if projects is None:
+        projects = sikuli_projects(sikuli_folder)
+    elif isinstance(projects, (list, tuple)) is False or any(isinstance(project, str) is False for project in projects):
+        raise TypeError("Kwarg projects must be a list of strings.")
+    os.makedirs(directory, exist_ok=True)
+    os.makedirs(img_folder, exist_ok=True)
+    manifest_file = path.join(directory, MANIFEST_FILE)
+    manifest = {}
+    if path.isfile(manifest_file) is True:
+        with open(manifest_file, mode="r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    results = {}
+    tasks = []
+    for project in projects:
+        task = (project, directory, img_folder, sikuli_folder, manifest.get(project), to_python3)
+        try:
+            skip = unchanged(*task)
+        except OSError:
+            skip = False
+        if skip is True:
+            results[project] = ExportResult(project, False, 0, None)
+        else:
+            results[project] = None
+            tasks.append(task)
+    if len(tasks) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            outcomes = list(executor.map(_export_task, tasks))
+    else:
+        outcomes = [_export_task(task) for task in tasks]
+    for result, entry in outcomes:
+        results[result.project] = result
+        if entry is not None:
+            manifest[result.project] = entry
+    with open(manifest_file + ".tmp", mode="w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(manifest_file + ".tmp", manifest_file)
+    return results
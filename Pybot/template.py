@@ -0,0 +1,254 @@
+"""
+========
+Template
+========
+   Index of the Sikuli template images, decoded once in grayscale and kept in memory, and the template matching on
+   captured pixels. A match gives the coordinates to click, no need to search the template again.
+   The last location of each template is remembered to search a small region around it before the whole screen.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from os import path, listdir, stat
+from threading import Lock
+
+import numpy
+
+TEMPLATE_SIMILARITY = 0.7  # Default minimum similarity of Sikuli
+HINT_MARGIN = 32
+
+
+class Match(namedtuple("Match", "template score x y width height")):
+    """
+    Template found on the screen, with its similarity score and its bounds in screen coordinates.
+    """
+    __slots__ = ()
+
+    @property
+    def center(self):
+        """
+        Center of the match, where to click.
+           :return: Tuple of the x and y coordinates.
+        """
+        return self.x + self.width // 2, self.y + self.height // 2
+
+
+def grayscale(data):
+    """
+    Convert captured pixels to grayscale.
+       :param data: Array of pixels as returned by Pybot.capture(), RGB, RGBA or already grayscale.
+       :return: 2 dimensions array of uint8.
+    """
+    import cv2
+    if data.ndim == 2:
+        return data
+    elif data.shape[2] == 4:
+        return cv2.cvtColor(data, cv2.COLOR_RGBA2GRAY)
+    else:
+        return cv2.cvtColor(numpy.ascontiguousarray(data), cv2.COLOR_RGB2GRAY)
+
+
+def match_template(gray, template, similarity=TEMPLATE_SIMILARITY, name=None, offset=(0, 0)):
+    """
+    Search the best match of a template in a grayscale capture.
+       :param gray: Grayscale capture to search in.
+       :param template: Grayscale template to search.
+       :param similarity: Minimum similarity score, between 0 and 1.
+       :param name: Name of the template given to the match.
+       :param offset: Screen coordinates of the capture top left corner.
+       :return: Match object, None if the best score is below similarity.
+    """
+    import cv2
+    height, width = template.shape
+    if height > gray.shape[0] or width > gray.shape[1]:
+        return None
+    scores = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
+    numpy.nan_to_num(scores, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    _, score, _, (x, y) = cv2.minMaxLoc(scores)
+    if score < similarity:
+        return None
+    return Match(name, float(score), x + offset[0], y + offset[1], width, height)
+
+
+def match_templates(gray, templates, similarity=TEMPLATE_SIMILARITY, offset=(0, 0), max_workers=None):
+    """
+    Search many templates in the same grayscale capture, in parallel. OpenCV releases the GIL while matching.
+       :param gray: Grayscale capture to search in.
+       :param templates: List of (name, grayscale template) tuples.
+       :param similarity: Minimum similarity score, between 0 and 1.
+       :param offset: Screen coordinates of the capture top left corner.
+       :param max_workers: Maximum number of templates matched at the same time, default depends on the CPU.
+       :return: List of Match objects or None if not found, in the order of the templates.
+    """
+    if len(templates) < 2:
+        return [match_template(gray, template, similarity=similarity, name=name, offset=offset)
+                for name, template in templates]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(
+            lambda item: match_template(gray, item[1], similarity=similarity, name=item[0], offset=offset),
+            templates))
+
+
+class TemplateIndex:
+    """
+    Template images decoded in grayscale and kept in memory, reloaded only if the file is modified.
+    """
+
+    def __init__(self, folder):
+        """
+        Constructor of the TemplateIndex class, nothing is loaded before load() or get().
+           :param folder: Folder of the template images.
+        """
+        self.folder = folder
+        self._templates = {}
+        self._lock = Lock()
+
+    def __len__(self):
+        """Number of templates in memory."""
+        return len(self._templates)
+
+    def __contains__(self, img):
+        """
+        Check a template is in memory.
+           :param img: Path of the template image.
+        """
+        return path.normpath(img) in self._templates
+
+    def load(self, extension=".png"):
+        """
+        Decode all the images of the folder.
+           :param extension: Extension of the images to load.
+           :return: Number of templates in memory.
+        """
+        if path.isdir(self.folder) is True:
+            for file_name in listdir(self.folder):
+                if file_name.endswith(extension):
+                    self.get(path.join(self.folder, file_name))
+        return len(self)
+
+    def get(self, img):
+        """
+        Grayscale template of an image, decoded on the first call or if the file was modified.
+           :param img: Path of the template image.
+           :return: 2 dimensions array of uint8.
+           :raise FileNotFoundError: If the image does not exist.
+           :raise ValueError: If the image cannot be decoded.
+        """
+        import cv2
+        key = path.normpath(img)
+        mtime = stat(key).st_mtime
+        with self._lock:
+            entry = self._templates.get(key)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+        template = cv2.imread(key, cv2.IMREAD_GRAYSCALE)
+        if template is None:
+            raise ValueError("Image {0} cannot be decoded.".format(img))
+        with self._lock:
+            self._templates[key] = (mtime, template)
+        return template
+
+    def clear(self):
+        """Forget all the templates."""
+        with self._lock:
+            self._templates.clear()
+
+
+class LocationHints:
+    """
+    Last known location of the templates for a computer and a screen size, stored in the template_hint table of the
+    cache database, with the statistics of the searches around these locations.
+    """
+
+    def __init__(self, database, node, width, height, margin=HINT_MARGIN):
+        """
+        Constructor of the LocationHints class, the known locations are read once from the database.
+           :param database: CacheDatabase object to store the locations in, None to keep them only in memory.
+           :param node: Computer name.
+           :param width: Screen width.
+           :param height: Screen height.
+           :param margin: Number of pixels searched around the last location.
+        """
+        self.database = database
+        self.node = node
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.hits = 0
+        self.misses = 0
+        self.searches = 0
+        self.hint_time = 0.0
+        self.search_time = 0.0
+        self._lock = Lock()
+        self._locations = {}
+        if database is not None:
+            request = 'SELECT template, x, y FROM template_hint WHERE node = ? AND width = ? AND height = ?;'
+            for template, x, y in database.query(request, (node, width, height,)):
+                self._locations[template] = (x, y)
+
+    def region(self, img, shape, bounds):
+        """
+        Region to search first for a template.
+           :param img: Path of the template image.
+           :param shape: Shape of the template (height, width).
+           :param bounds: Bounds of the screen (x, y, width, height), the region is kept inside.
+           :return: Bounds of the region around the last location, None if the template was never found.
+        """
+        location = self._locations.get(path.normpath(img))
+        if location is None:
+            return None
+        left = max(bounds[0], location[0] - self.margin)
+        top = max(bounds[1], location[1] - self.margin)
+        right = min(bounds[0] + bounds[2], location[0] + shape[1] + self.margin)
+        bottom = min(bounds[1] + bounds[3], location[1] + shape[0] + self.margin)
+        if right - left < shape[1] or bottom - top < shape[0]:
+            return None
+        return left, top, right - left, bottom - top
+
+    def hint(self, found, elapsed):
+        """
+        Record a search in a region around the last location.
+           :param found: True if the template was found in the region.
+           :param elapsed: Duration of the search in seconds.
+        """
+        with self._lock:
+            if found is True:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.hint_time += elapsed
+
+    def search(self, match, elapsed):
+        """
+        Record a search on the whole screen, remembering the location of the match.
+           :param match: Match object, None if the template was not found.
+           :param elapsed: Duration of the search in seconds.
+        """
+        with self._lock:
+            self.searches += 1
+            self.search_time += elapsed
+        if match is not None:
+            self.update(match)
+
+    def update(self, match):
+        """
+        Remember the location of a match.
+           :param match: Match object.
+        """
+        key = path.normpath(match.template)
+        location = (match.x, match.y)
+        if self._locations.get(key) != location:
+            self._locations[key] = location
+            if self.database is not None:
+                request = "INSERT OR REPLACE INTO template_hint VALUES(?, ?, ?, ?, ?, ?, DATETIME('now', 'localtime'));"
+                self.database.execute(request, (self.node, self.width, self.height, key, match.x, match.y,))
+
+    def stats(self):
+        """
+        Hit rate of the last known locations and estimation of the time saved.
+           :return: Dictionary with the hits, misses, hit ratio, number of whole screen searches and seconds saved.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            search_mean = self.search_time / self.searches if self.searches else 0.0
+            return {"hits": self.hits, "misses": self.misses, "ratio": self.hits / lookups if lookups else 0.0,
+                    "searches": self.searches, "saved_sec": self.hits * search_mean - self.hint_time}
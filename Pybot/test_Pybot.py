@@ -1,7 +1,11 @@
+import platform
+
 import pytest
 
 from Pybot.Pybot import Pybot
 
+pytestmark = pytest.mark.skipif(platform.system() != "Windows", reason="Desktop automation on Windows.")
+
 
 @pytest.fixture(scope='module')
 def test_automaton():
@@ -29,7 +33,9 @@ def test_b_init(test_automaton):
 
 def test_c_pgm(test_automaton):
     """Test the method to manage programs."""
-    assert test_automaton.start_pgm('node.exe', sleep_sec=10) is True
+    handle = test_automaton.start_pgm('node.exe', sleep_sec=10)
+    assert handle.running is True
+    assert handle.pid > 0
     assert test_automaton.check_pgm('node.exe') is True
     assert test_automaton.kill_pgm('node.exe') is True
 
@@ -0,0 +1,132 @@
+import struct
+import sys
+from time import sleep
+
+import pytest
+
+from Pybot.android import AndroidInput, AndroidScreen, DeviceRegistry, parse_devices, parse_screencap
+
+FAKE_ADB = '''
+import struct
+import sys
+import time
+
+frame = struct.pack("<4I", 1080, 1920, 1, 0) + bytes(1080 * 1920 * 4)
+if sys.argv[1:4] == ["-s", "R58M123ABC", "exec-out"] and sys.argv[4] == "screencap":
+    sys.stdout.buffer.write(frame)
+elif sys.argv[1:4] == ["-s", "R58M123ABC", "exec-out"] and sys.argv[4] == "sh":
+    for line in sys.stdin.buffer:
+        sys.stdout.buffer.write(frame)
+        sys.stdout.buffer.flush()
+elif sys.argv[1:4] == ["-s", "R58M123ABC", "shell"]:
+    with open(sys.argv[0] + ".shell", "a") as commands:
+        for line in sys.stdin:
+            time.sleep(0.01)  # Commands executed slower than sent
+            commands.write(line)
+            commands.flush()
+            if line.startswith("echo "):
+                sys.stdout.write(line[5:])
+                sys.stdout.flush()
+elif sys.argv[1] == "devices":
+    with open(sys.argv[0] + ".calls", "a") as calls:
+        calls.write("devices\\n")
+    sys.stdout.write("List of devices attached\\r\\nR58M123ABC\\tdevice\\r\\nemulator-5554\\toffline\\r\\n\\r\\n")
+elif sys.argv[1] == "track-devices":
+    for payload in ["R58M123ABC\\tdevice\\n", "R58M123ABC\\tdevice\\nemulator-5554\\tdevice\\n", ""]:
+        sys.stdout.write("{0:04x}{1}".format(len(payload), payload))
+        sys.stdout.flush()
+        time.sleep(0.05)
+    time.sleep(30)
+'''
+
+
+@pytest.fixture
+def fake_adb(tmp_path):
+    """Fixture representing the command of a fake adb printing scripted outputs."""
+    script = tmp_path / "adb.py"
+    script.write_text(FAKE_ADB)
+    return [sys.executable, str(script)]
+
+
+def test_a_parse():
+    """Test the parsing of adb devices output, with Windows or Unix end of lines."""
+    output = "List of devices attached\r\nR58M123ABC\tdevice\r\nemulator-5554\tunauthorized\r\n\r\n"
+    assert parse_devices(output) == [{"type": "device", "num": "R58M123ABC"},
+                                     {"type": "unauthorized", "num": "emulator-5554"}]
+    assert parse_devices(output.replace("\r", "")) == parse_devices(output)
+    assert parse_devices("* daemon started successfully\nList of devices attached\n\n") == []
+
+
+def test_b_poll(fake_adb, tmp_path):
+    """Test the device list is polled only when older than the TTL."""
+    registry = DeviceRegistry(fake_adb, ttl=60)
+    assert len(registry.devices()) == 2
+    assert len(registry.devices()) == 2
+    assert (tmp_path / "adb.py.calls").read_text() == "devices\n"
+
+
+def test_c_track(fake_adb):
+    """Test the track-devices stream updates the list and notifies the subscribers."""
+    events = []
+    registry = DeviceRegistry(fake_adb)
+    registry.subscribe(lambda event, device: events.append((event, device["num"])))
+    assert registry.track() is True
+    assert registry.tracking is True
+    sleep(0.5)
+    assert registry.devices() == []
+    assert events == [("connected", "R58M123ABC"), ("connected", "emulator-5554"),
+                      ("disconnected", "R58M123ABC"), ("disconnected", "emulator-5554")]
+    registry.stop()
+    assert registry.tracking is False
+
+
+def test_d_screencap():
+    """Test the parsing of raw screencap frames, with the header of Android 8 and 9."""
+    pixels = bytes(range(24))
+    data, header_size = parse_screencap(struct.pack("<3I", 3, 2, 1) + pixels)
+    assert header_size == 12
+    assert data.shape == (2, 3, 3)
+    assert data[1, 2].tolist() == [20, 21, 22]
+    data, header_size = parse_screencap(struct.pack("<4I", 3, 2, 1, 0) + pixels)
+    assert header_size == 16
+    with pytest.raises(ValueError):
+        parse_screencap(struct.pack("<4I", 3, 2, 1, 0) + pixels[:-1])
+    with pytest.raises(ValueError):
+        parse_screencap(struct.pack("<3I", 3, 2, 4) + pixels)
+
+
+def test_e_android_screen(fake_adb):
+    """Test the captures of a fake device, one adb per capture and through a persistent session."""
+    android_screen = AndroidScreen(fake_adb, "R58M123ABC")
+    assert android_screen.capture().shape == (1920, 1080, 3)
+    assert android_screen.getBounds() == (0, 0, 1080, 1920)
+    android_screen.start()
+    assert android_screen.streaming is True
+    assert android_screen.capture(bounds=(10, 20, 100, 50)).shape == (50, 100, 3)
+    assert android_screen.capture().shape == (1920, 1080, 3)
+    android_screen.stop()
+    assert android_screen.streaming is False
+
+
+def test_f_android_input(fake_adb, tmp_path):
+    """Test the input commands are pipelined in one adb shell session."""
+    android_input = AndroidInput(fake_adb, "R58M123ABC")
+    android_input.keyevent("home")
+    android_input.tap(10.4, 20)
+    android_input.swipe(0, 0, 100, 200, duration_ms=50)
+    android_input.text("it's ok")
+    assert android_input.sync() > 0
+    assert android_input.sent == 5
+    android_input.stop()
+    assert (tmp_path / "adb.py.shell").read_text().splitlines() == [
+        "input keyevent 3", "input tap 10 20", "input swipe 0 0 100 200 50", "input text 'it'\"'\"'s%sok'",
+        "echo pybot-sync-0"]
+
+
+def test_g_stop_pending(fake_adb, tmp_path):
+    """Test the commands sent and not yet executed are executed before the session stops."""
+    android_input = AndroidInput(fake_adb, "R58M123ABC")
+    for x in range(20):
+        android_input.tap(x, 0)
+    android_input.stop()
+    assert (tmp_path / "adb.py.shell").read_text().splitlines() == ["input tap {0} 0".format(x) for x in range(20)]
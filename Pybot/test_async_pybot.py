@@ -0,0 +1,114 @@
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+import numpy
+
+from Pybot.Pybot import Pybot
+from Pybot.async_pybot import AsyncPybot
+from Pybot.backend import HeadlessBackend
+from Pybot.wait import AdaptivePoll, wait_until_async
+
+
+class FakePybot:
+    """Pybot double capturing a frame changing on the second capture and reading it slowly."""
+
+    def __init__(self):
+        self.captures = 0
+        self.closed = False
+
+    def capture(self, bounds=None):
+        self.captures += 1
+        return numpy.full((8, 8, 3), 0 if self.captures < 2 else 255, dtype=numpy.uint8)
+
+    def get_text_data(self, data, lang=None):
+        sleep(0.2)
+        return "ready" if data.mean() > 0 else ""
+
+    def text(self, bounds=None, lang=None, keep=False):
+        return self.get_text_data(self.capture(bounds), lang=lang)
+
+    def android(self):
+        return [{"num": "emulator-5554", "type": "device"}]
+
+    def close(self):
+        self.closed = True
+
+
+def run(coroutine):
+    """Run a coroutine in a new event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_a_wait_until_async():
+    """Test the asynchronous wait returns as soon as the condition is met, or on timeout."""
+    calls = iter(range(100))
+
+    async def probe():
+        return next(calls) == 2, "value", False
+
+    result = run(wait_until_async(probe, timeout=5, poll=AdaptivePoll(minimum=0.001, maximum=0.001)))
+    assert result.ok is True and result.polls == 3
+
+    async def never():
+        return False, None, False
+
+    result = run(wait_until_async(never, timeout=0.05))
+    assert result.ok is False and result.elapsed >= 0.05
+
+
+def test_b_concurrent_text():
+    """Test the OCR run in the executor, several reads not blocking each other, and a shared executor kept open."""
+    async_pybot = AsyncPybot(FakePybot())
+
+    async def flows():
+        start = asyncio.get_running_loop().time()
+        texts = await asyncio.gather(*(async_pybot.text() for _ in range(4)))
+        return texts, asyncio.get_running_loop().time() - start
+
+    texts, elapsed = run(flows())
+    assert len(texts) == 4 and elapsed < 0.6
+    run(async_pybot.close())
+    assert async_pybot.pybot.closed is True
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        run(AsyncPybot(FakePybot(), executor=executor).close())
+        assert executor.submit(sum, (1, 2)).result() == 3
+
+
+def test_c_wait_text():
+    """Test the asynchronous waits poll the probes of Pybot in the executor."""
+    frame = numpy.zeros((64, 64, 3), dtype=numpy.uint8)
+    changed = numpy.full((64, 64, 3), 255, dtype=numpy.uint8)
+    backend = HeadlessBackend(frame=frame)
+    async_pybot = AsyncPybot(Pybot(cache=False, backend=backend))
+    threads = set()
+    async_pybot.pybot.get_text_data = lambda data, lang=None: threads.add(threading.current_thread()) or (
+        "ready" if data.mean() > 0 else "")
+    backend.queue(frame, frame, changed)
+    result = run(async_pybot.wait_text("ready", timeout=5))
+    assert result.ok is True and result.value == "ready" and result.polls == 3
+    assert threading.main_thread() not in threads and len(threads) != 0
+    backend.queue(frame, frame, changed)
+    result = run(async_pybot.wait_change(timeout=5))
+    assert result.ok is True and result.value == 255
+    run(async_pybot.close())
+
+
+def test_d_exec_cmd():
+    """Test the commands run in asyncio subprocesses."""
+    async_pybot = AsyncPybot(FakePybot())
+    assert run(async_pybot.exec_cmd('"{0}" -c "pass"'.format(sys.executable))) is True
+    assert run(async_pybot.exec_cmd('"{0}" -c "exit(1)"'.format(sys.executable))) is False
+
+
+def test_e_android():
+    """Test the devices come from Pybot.android(), and its device registry."""
+    async_pybot = AsyncPybot(FakePybot())
+    assert run(async_pybot.android()) == [{"num": "emulator-5554", "type": "device"}]
+    run(async_pybot.close())
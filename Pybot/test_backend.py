@@ -0,0 +1,172 @@
+import subprocess
+import sys
+from os import makedirs, path
+from time import sleep
+
+import numpy
+import pytest
+from PIL import Image
+
+from Pybot.Pybot import Pybot, PybotException
+from Pybot.backend import HeadlessBackend, LackeyBackend, Key
+from Pybot.plan import ActionPlan
+
+ROOT_FOLDER = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+def checkerboard(size=24, square=6):
+    """Button template, textured for the matching to be unambiguous."""
+    ys, xs = numpy.indices((size, size))
+    return numpy.repeat((((ys // square + xs // square) % 2) * 255).astype(numpy.uint8)[:, :, None], 3, axis=2)
+
+
+@pytest.fixture
+def button(tmp_path, monkeypatch):
+    """Template image file of a button, in a temporary working directory."""
+    monkeypatch.chdir(tmp_path)
+    makedirs("img")
+    img = path.join("img", "button.png")
+    Image.fromarray(checkerboard()).save(img)
+    return img
+
+
+def test_a_headless_backend():
+    """Test the scripted frames and the recorded events of the virtual framebuffer."""
+    backend = HeadlessBackend(width=64, height=32)
+    assert backend.getBounds() == (0, 0, 64, 32)
+    backend.queue(numpy.full((32, 64, 3), 1, dtype=numpy.uint8), numpy.full((32, 64, 3), 2, dtype=numpy.uint8))
+    assert [backend.capture((0, 0, 64, 32)).max() for _ in range(3)] == [1, 2, 2]
+    backend.draw(checkerboard(), 10, 5)
+    assert backend.capture((10, 5, 24, 24)).tolist() == checkerboard().tolist()
+    backend.draw(checkerboard()[:, :, 0], 40, 5)
+    assert backend.capture((40, 5, 24, 24)).tolist() == checkerboard().tolist()
+    backend.click(3, 4)
+    backend.type("v", Key.CTRL)
+    assert [event.action for event in backend.events] == ["click", "type"]
+    assert backend.events[1].modifiers == "{CTRL}"
+
+
+def test_b_check_click(button):
+    """Test a button is found and clicked on its center, without display."""
+    backend = HeadlessBackend(width=320, height=200)
+    test_automaton = Pybot(cache=False, backend=backend)
+    test_automaton.load_plan(ActionPlan.compile('click("{0}")'.format(button)), wait=True)
+    assert button in test_automaton.templates
+    assert test_automaton.check_click(button) is False
+    backend.draw(button, 100, 50)
+    assert test_automaton.check_click(button) is True
+    assert backend.events[-1][:3] == ("click", 112, 62)
+    test_automaton.type_n_time(2, Key.ENTER)
+    assert [event.text for event in backend.events[1:]] == ["{ENTER}", "{ENTER}"]
+    test_automaton.close()
+
+
+def test_c_wait_click(button):
+    """Test the wait for a button appearing after a few frames, and the timeout."""
+    backend = HeadlessBackend(width=320, height=200)
+    test_automaton = Pybot(cache=True, backend=backend)
+    empty = backend.capture((0, 0, 320, 200))
+    shown = empty.copy()
+    shown[120:144, 200:224] = checkerboard()
+    backend.queue(empty, empty, shown)
+    assert test_automaton.wait_click(button, timeout=5).center == (212, 132)
+    backend.show(empty)
+    with pytest.raises(PybotException):
+        test_automaton.wait_click(button, timeout=0.1)
+    assert test_automaton.screenshot()[0] == 1
+    test_automaton.close()
+
+
+def test_d_lazy_startup(tmp_path, monkeypatch):
+    """Test the heavy modules are imported on first use and the cache database is opened on first use."""
+    code = "import sys, Pybot.Pybot; print(sorted(set(sys.modules) & {0}))".format(
+        {"cv2", "PIL", "easygui", "pytesseract", "lackey"})
+    assert subprocess.check_output([sys.executable, "-c", code], cwd=ROOT_FOLDER).decode().strip() == "[]"
+    monkeypatch.chdir(tmp_path)
+    test_automaton = Pybot(cache=True, backend=HeadlessBackend(width=64, height=32))
+    assert path.isdir("sqlite3") is False
+    assert test_automaton.db is not None and path.isdir("sqlite3") is True
+    test_automaton.close()
+    assert test_automaton.db is None
+
+
+def test_e_lackey_rgb():
+    """Test the BGR captures of lackey are converted to RGB, like the other backends."""
+    class Screen:
+        channels = 3
+
+        def capture(self, bounds):
+            return numpy.array([[[255, 0, 0, 255], [0, 0, 255, 255]]], dtype=numpy.uint8)[:, :, :self.channels]
+
+    backend = LackeyBackend.__new__(LackeyBackend)
+    backend.screen = Screen()
+    for channels in (3, 4):
+        backend.screen.channels = channels
+        data = backend.capture((0, 0, 2, 1))
+        assert data.tolist() == [[[0, 0, 255], [255, 0, 0]]] and data.flags["C_CONTIGUOUS"] is True
+
+
+def test_f_texts(monkeypatch):
+    """Test the regions are cropped from a single capture and read with their lang, in the order of the regions."""
+    ys, xs = numpy.indices((200, 320))
+    frame = numpy.stack([xs % 256, ys, xs // 256], axis=2).astype(numpy.uint8)
+    backend = HeadlessBackend(frame=frame)
+    test_automaton = Pybot(cache=False, backend=backend)
+    reads = []
+
+    def fake_ocr(img, lang=None, config="", words=False):
+        data = numpy.asarray(img)
+        reads.append((data, lang))
+        sleep(0.05 if data[0, 0, 1] < 100 else 0)  # The first region is read last
+        return "{0},{1}".format(int(data[0, 0, 0]) + 256 * int(data[0, 0, 2]), data[0, 0, 1])
+
+    monkeypatch.setattr(test_automaton, "_ocr", fake_ocr)
+    regions = [(10, 20, 30, 12), ((290, 150, 20, 40), "fra"), (100, 120, 50, 10)]
+    assert test_automaton.texts(regions, lang="eng", max_workers=3) == ["10,20", "290,150", "100,120"]
+    assert backend.captures == 1 and test_automaton.texts([]) == []
+    reads = {(int(data[0, 0, 0]) + 256 * int(data[0, 0, 2]), int(data[0, 0, 1])): (data, lang) for data, lang in reads}
+    assert sorted(reads) == [(10, 20), (100, 120), (290, 150)]
+    for bounds, lang in [((10, 20, 30, 12), "eng"), ((290, 150, 20, 40), "fra"), ((100, 120, 50, 10), "eng")]:
+        data, read_lang = reads[bounds[:2]]
+        x, y, width, height = bounds
+        assert read_lang == lang and numpy.array_equal(data, frame[y:y + height, x:x + width])
+    test_automaton.close()
+
+
+def test_g_lazy_threads(tmp_path, monkeypatch):
+    """Test the cache database is opened once when the workers of texts() first use it at the same time."""
+    from Pybot import Pybot as pybot_module
+    monkeypatch.chdir(tmp_path)
+    databases = []
+
+    class CountedDatabase(pybot_module.CacheDatabase):
+        def __init__(self, *args, **kwargs):
+            databases.append(self)
+            sleep(0.05)  # Widen the race between the workers
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(pybot_module, "CacheDatabase", CountedDatabase)
+    test_automaton = Pybot(cache=True, backend=HeadlessBackend(width=320, height=200))
+    monkeypatch.setattr(test_automaton, "_ocr", lambda img, lang=None, config="", words=False: "text")
+    regions = [(10 * i, 0, 10, 10) for i in range(16)]
+    assert test_automaton.texts(regions, max_workers=8) == ["text"] * 16
+    assert len(databases) == 1 and test_automaton.db is databases[0]
+    test_automaton.close()
+
+
+def test_h_del(monkeypatch):
+    """Test a deleted Pybot only stops the scrcpy it started, and is silent at the end of the interpreter."""
+    import gc
+    from Pybot.program import ProgramHandle
+    test_automaton = Pybot(cache=False, backend=HeadlessBackend(width=64, height=32))
+    kills = []
+    monkeypatch.setattr(test_automaton.processes, "kill", lambda pgms: kills.append(pgms))
+    test_automaton.android_gui = ProgramHandle([sys.executable, "-c", "import time; time.sleep(30)"])
+    handle = test_automaton.android_gui
+    del test_automaton
+    gc.collect()
+    assert handle.wait(timeout=5) != 0 and kills == []
+    code = "from Pybot.Pybot import Pybot; from Pybot.backend import HeadlessBackend; " \
+           "automaton = Pybot(cache=False, backend=HeadlessBackend(width=64, height=32))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_FOLDER, stderr=subprocess.PIPE)
+    assert result.returncode == 0 and result.stderr.decode().strip() == ""
@@ -0,0 +1,46 @@
+import pytest
+
+from Pybot.database import CacheDatabase
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Fixture representing a cache database in a temporary directory."""
+    db = CacheDatabase(str(tmp_path / "pybot.sqlite3"), batch_size=10, batch_sec=60)
+    yield db
+    db.close()
+
+
+def test_a_schema(database):
+    """Test the schema is created and the database in WAL mode."""
+    tables = {row[0] for row in database.query("SELECT name FROM sqlite_master WHERE type = 'table';")}
+    assert {"computer", "screen", "screenshot_file", "ocr", "template_hint"} <= tables and "screenshot" not in tables
+    assert database.query("PRAGMA journal_mode;")[0][0] == "wal"
+
+
+def test_b_batch(database):
+    """Test the queued writes are committed by batches and on flush."""
+    request = "INSERT INTO screen VALUES(?, ?, ?, DATETIME('now', 'localtime'));"
+    for i in range(25):
+        database.execute(request, ("node", i, i,))
+    database.flush()
+    assert database.query("SELECT COUNT(*) FROM screen;")[0][0] == 25
+
+
+def test_c_close(tmp_path):
+    """Test the queued writes are committed on close."""
+    db = CacheDatabase(str(tmp_path / "pybot.sqlite3"), batch_sec=60)
+    db.execute("INSERT INTO screen VALUES(?, ?, ?, DATETIME('now', 'localtime'));", ("node", 1920, 1080,))
+    db.close()
+    db.close()
+    db = CacheDatabase(str(tmp_path / "pybot.sqlite3"))
+    assert db.query("SELECT node, width, height FROM screen;") == [("node", 1920, 1080)]
+    db.close()
+
+
+def test_d_error(database):
+    """Test a failing queued write is raised on flush."""
+    database.execute("INSERT INTO missing VALUES(1);")
+    with pytest.raises(Exception):
+        database.flush()
+    database.flush()
@@ -0,0 +1,83 @@
+import json
+from os import makedirs, path
+
+import numpy
+import pytest
+from PIL import Image
+
+from Pybot.Pybot import Pybot
+from Pybot.backend import HeadlessBackend
+from Pybot.database import CacheDatabase
+from Pybot.metrics import Metrics, Histogram
+
+
+def test_a_histogram():
+    """Test the buckets, the extrema and the quantiles of a histogram."""
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for seconds in (0.005, 0.05, 0.05, 0.5, 5.0):
+        histogram.observe(seconds)
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.count == 5 and histogram.min == 0.005 and histogram.max == 5.0
+    assert histogram.quantile(0.5) == 0.1 and histogram.quantile(1) == 5.0
+    assert histogram.to_dict()["buckets"] == {"0.01": 1, "0.1": 3, "1.0": 4, "+Inf": 5}
+
+
+def test_b_disabled():
+    """Test nothing is recorded when the metrics are disabled, and the type of kwarg enabled."""
+    metrics = Metrics()
+    with metrics.stage("capture"):
+        pass
+    metrics.count("ocr_cache_hit")
+    assert metrics.to_dict() == {"stages": {}, "events": {}}
+    with pytest.raises(TypeError):
+        Metrics(enabled=1)
+
+
+def test_c_export(tmp_path):
+    """Test the JSON and Prometheus exports."""
+    metrics = Metrics(enabled=True)
+    with metrics.stage("capture"):
+        pass
+    metrics.observe("ocr", 0.3)
+    metrics.count("ocr_cache_miss", 2)
+    metrics.write_json(str(tmp_path / "metrics.json"))
+    with open(str(tmp_path / "metrics.json")) as file:
+        data = json.load(file)
+    assert sorted(data["stages"]) == ["capture", "ocr"] and data["events"] == {"ocr_cache_miss": 2}
+    metrics.write_prometheus(str(tmp_path / "pybot.prom"), labels={"node": 'a"b'})
+    with open(str(tmp_path / "pybot.prom")) as file:
+        text = file.read()
+    assert '# TYPE pybot_stage_seconds histogram' in text
+    assert 'pybot_stage_seconds_bucket{stage="ocr",node="a\\"b",le="0.25"} 0' in text
+    assert 'pybot_stage_seconds_bucket{stage="ocr",node="a\\"b",le="0.5"} 1' in text
+    assert 'pybot_stage_seconds_count{stage="ocr",node="a\\"b"} 1' in text
+    assert 'pybot_events_total{event="ocr_cache_miss",node="a\\"b"} 2' in text
+
+
+def test_d_database(tmp_path):
+    """Test the queries and the commits of the cache database are timed."""
+    metrics = Metrics(enabled=True)
+    database = CacheDatabase(str(tmp_path / "pybot.sqlite3"), metrics=metrics)
+    database.execute("INSERT INTO screen VALUES(?, ?, ?, ?);", ("node", 1, 2, None))
+    database.flush()
+    database.query("SELECT * FROM screen;")
+    database.close()
+    assert metrics.histograms["db_commit"].count == 1 and metrics.histograms["db_query"].count == 1
+    assert metrics.counters["db_rows"] == 1
+
+
+def test_e_pybot(tmp_path, monkeypatch):
+    """Test the capture and matching stages of a headless Pybot object."""
+    monkeypatch.chdir(tmp_path)
+    makedirs("img")
+    img = path.join("img", "button.png")
+    Image.fromarray(numpy.eye(16, dtype=numpy.uint8) * 255).convert("RGB").save(img)
+    test_automaton = Pybot(cache=False, backend=HeadlessBackend(width=64, height=48), metrics=True)
+    test_automaton.screen.draw(img, 20, 10)
+    assert test_automaton.find(img) is not None
+    assert test_automaton.metrics.histograms["capture"].count == 1
+    assert test_automaton.metrics.histograms["match"].count == 1
+    test_automaton.metrics.enabled = False
+    test_automaton.capture()
+    assert test_automaton.metrics.histograms["capture"].count == 1
+    test_automaton.close()
@@ -0,0 +1,58 @@
+import numpy
+import pytest
+
+from Pybot.database import CacheDatabase
+from Pybot.ocr_cache import OcrCache, ocr_key
+
+
+@pytest.fixture
+def ocr_cache(tmp_path):
+    """Fixture representing an OCR cache in a temporary database."""
+    database = CacheDatabase(str(tmp_path / "pybot.sqlite3"))
+    yield OcrCache(database, max_entries=2)
+    database.close()
+
+
+def test_a_key():
+    """Test the key depends on the pixels and the tesseract parameters only."""
+    data = numpy.zeros((10, 20, 3), dtype=numpy.uint8)
+    assert ocr_key(data) == ocr_key(data.copy())
+    assert ocr_key(data) != ocr_key(data, lang='eng')
+    assert ocr_key(data) != ocr_key(data, config='--psm 7')
+    other = data.copy()
+    other[5, 5, 0] = 1
+    assert ocr_key(data) != ocr_key(other)
+    assert ocr_key(data[:, ::2]) == ocr_key(numpy.ascontiguousarray(data[:, ::2]))
+
+
+def test_b_hit_miss(ocr_cache):
+    """Test the hit and miss counters."""
+    assert ocr_cache.get("a") is None
+    ocr_cache.put("a", "text", lang='eng')
+    assert ocr_cache.get("a") == "text"
+    stats = ocr_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["ratio"] == 0.5
+
+
+def test_c_evict(ocr_cache):
+    """Test the eviction by number of entries and by age, in the database and in memory."""
+    for key in "abc":
+        ocr_cache.put(key, key)
+    ocr_cache.evict()
+    assert ocr_cache.stats()["entries"] == 2
+    assert list(ocr_cache._memory) == ["b", "c"]
+    ocr_cache.database.execute("UPDATE ocr SET ts = DATETIME('now', 'localtime', '-2 hours') WHERE digest = 'b';")
+    ocr_cache.database.flush()
+    ocr_cache._memory.clear()
+    assert ocr_cache.get("b") == "b" and ocr_cache.get("c") == "c"
+    ocr_cache.max_age = 3600
+    ocr_cache.evict()
+    ocr_cache.database.flush()
+    assert list(ocr_cache._memory) == ["c"] and ocr_cache.get("b") is None and ocr_cache.get("c") == "c"
+    ocr_cache.max_age = -1
+    ocr_cache.evict()
+    assert ocr_cache.stats()["entries"] == 0
+    assert ocr_cache.get("c") is None
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import cv2
+import numpy
+from PIL import Image
+
+from Pybot.plan import ActionPlan, PlanPrefetcher, PLAN_EXT, prefetch_lackey
+from Pybot.template import TemplateIndex
+
+SCRIPT = """from lackey import *
+if exists("img/a.png"):
+    click(Pattern("img/b.png").similar(0.8))
+wait("img/c.png", 10)
+test_automaton.find_any(["img/a.png", "img/d.png"])
+type("not a template")
+"""
+
+
+def test_a_compile(tmp_path):
+    """Test the actions and their templates are found in the order of the script, and saved."""
+    plan = ActionPlan.compile(SCRIPT, name="tahomaBee")
+    assert [(action.line, action.function) for action in plan.actions] == [(2, "exists"), (3, "click"), (4, "wait"),
+                                                                           (5, "find_any")]
+    assert plan.actions[3].templates == ("img/a.png", "img/d.png")
+    assert plan.templates == ["img/a.png", "img/b.png", "img/c.png", "img/d.png"]
+    plan.save(str(tmp_path / "tahomaBee.plan.json"))
+    loaded = ActionPlan.load(str(tmp_path / "tahomaBee.plan.json"))
+    assert loaded.actions == plan.actions and loaded.name == "tahomaBee"
+
+
+def test_b_prefetch(tmp_path, monkeypatch):
+    """Test the templates are decoded in background and the plan followed, a missing template being reported."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "img").mkdir()
+    for name in "abc":
+        Image.fromarray(numpy.full((8, 8, 3), ord(name), dtype=numpy.uint8)).save("img/{0}.png".format(name))
+    templates = TemplateIndex("img")
+    prefetcher = PlanPrefetcher(ActionPlan.compile(SCRIPT), templates).start()
+    assert prefetcher.wait(timeout=10) == 3
+    assert "img/c.png" in templates and list(prefetcher.errors) == ["img/d.png"]
+    assert prefetcher.advance("img/c.png") == 2 and prefetcher.advance("img/a.png") == 3
+    assert prefetcher.advance("img/a.png") == 0 and prefetcher.advance("img/z.png") is None
+    prefetcher.stop()
+
+
+def test_c_lackey(tmp_path, monkeypatch):
+    """Test lackey is served the templates of the plan of an exported script in color, and gets its cv2 back."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "img").mkdir()
+    colors = {"a": (255, 0, 0), "b": (0, 255, 0), "c": (0, 0, 255)}
+    for name, color in colors.items():
+        Image.fromarray(numpy.full((8, 8, 3), color, dtype=numpy.uint8)).save("img/{0}.png".format(name))
+    (tmp_path / "other.png").write_bytes((tmp_path / "img" / "a.png").read_bytes())
+    ActionPlan.compile(SCRIPT).save("tahomaBee" + PLAN_EXT)
+    lackey = SimpleNamespace(RegionMatching=SimpleNamespace(cv2=cv2))
+    assert prefetch_lackey("missing.py", module=lackey) is None and lackey.RegionMatching.cv2 is cv2
+    loader = prefetch_lackey(str(tmp_path / "tahomaBee.py"), module=lackey, wait=True)
+    assert lackey.RegionMatching.cv2 is loader and loader.IMREAD_GRAYSCALE == cv2.IMREAD_GRAYSCALE
+    needle = lackey.RegionMatching.cv2.imread(str(tmp_path / "img" / "c.png"))
+    assert needle.shape == (8, 8, 3) and tuple(needle[0, 0]) == (255, 0, 0) and loader.prefetcher.cursor == 3
+    assert lackey.RegionMatching.cv2.imread("img/c.png") is needle and loader.hits == 2
+    assert lackey.RegionMatching.cv2.imread("img/d.png") is None and loader.prefetcher.cursor == 4
+    assert tuple(lackey.RegionMatching.cv2.imread("other.png")[0, 0]) == (0, 0, 255) and loader.hits == 2
+    loader.stop()
+    assert lackey.RegionMatching.cv2 is cv2
@@ -0,0 +1,75 @@
+import numpy
+import pytest
+from PIL import Image, ImageDraw
+
+from Pybot.Pybot import Pybot
+from Pybot.backend import HeadlessBackend
+from Pybot.preprocess import Preprocess, tesseract_config, otsu, stretch, text_bounds, text_regions, edges, upscale
+
+
+def screen(light_text=True):
+    """Gradient screen with a line of text."""
+    gray = numpy.linspace(40, 90, 200, dtype=numpy.float32)[None, :].repeat(100, axis=0).astype(numpy.uint8)
+    img = Image.fromarray(numpy.repeat(gray[:, :, None], 3, axis=2))
+    ImageDraw.Draw(img).text((60, 40), "4242", fill=(255, 255, 255) if light_text else (0, 0, 0))
+    return numpy.array(img)
+
+
+def test_a_functions():
+    """Test the threshold, the contrast stretch, the upscaling and the tesseract configuration."""
+    gray = numpy.array([[10, 12, 200, 210]], dtype=numpy.uint8)
+    assert 12 <= otsu(gray) < 200
+    assert stretch(numpy.array([[100, 150]], dtype=numpy.uint8), (0, 100)).tolist() == [[0, 255]]
+    assert upscale(gray, 2).shape == (2, 8)
+    assert text_bounds(numpy.zeros((4, 4), dtype=bool)) is None
+    assert tesseract_config(psm=7, whitelist="0123 456789") == "--psm 7 -c tessedit_char_whitelist=0123456789"
+    with pytest.raises(TypeError):
+        tesseract_config(psm="7")
+    with pytest.raises(TypeError):
+        Preprocess(threshold="sauvola")
+
+
+def test_b_apply():
+    """Test the text is cropped, made dark on light and upscaled, a screen without text being skipped."""
+    for light_text in (True, False):
+        data = Preprocess(scale=2).apply(screen(light_text))
+        x, y, width, height = text_bounds(edges(screen(light_text)[:, :, 0]), 8)
+        assert data.shape == (2 * height, 2 * width) and 40 < x < 70 and 30 < y < 50
+        assert set(numpy.unique(data).tolist()) == {0, 255}
+        assert numpy.count_nonzero(data == 0) * 4 < data.size
+    assert Preprocess().apply(numpy.full((50, 50, 3), 90, dtype=numpy.uint8)) is None
+
+
+def test_c_pybot(monkeypatch):
+    """Test tesseract reads the preprocessed pixels with the configuration, and a blank screen is not read."""
+    test_automaton = Pybot(cache=False, backend=HeadlessBackend(frame=screen()))
+    calls = []
+    monkeypatch.setattr(test_automaton, "_ocr", lambda img, lang=None, config="": calls.append((img, config)) or "4242")
+    assert test_automaton.text(config=tesseract_config(psm=7)) == "4242"
+    assert calls[0][0].size == (200, 100) and calls[0][1] == "--psm 7"
+    test_automaton.preprocess = Preprocess()
+    assert test_automaton.text() == "4242" and calls[1][0].mode == "L" and calls[1][0].size[0] < 100
+    test_automaton.screen.show(numpy.zeros((100, 200, 3), dtype=numpy.uint8))
+    assert test_automaton.text() == "" and len(calls) == 2
+    assert test_automaton.text(preprocess=False) == "4242" and len(calls) == 3
+    with pytest.raises(TypeError):
+        test_automaton.text(preprocess="otsu")
+    test_automaton.close()
+
+
+def test_d_text_regions():
+    """Test the outline of a window and a rule are left out of the crop, and the pixels between the texts blanked."""
+    img = Image.new("RGB", (640, 480), (200, 200, 200))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((10, 10, 629, 469), outline=(0, 0, 0), width=2)
+    draw.line((10, 60, 629, 60), fill=(0, 0, 0))
+    draw.text((100, 120), "4242", fill=(0, 0, 0))
+    draw.text((300, 300), "Pybot", fill=(0, 0, 0))
+    data = numpy.array(img)
+    regions = text_regions(edges(data[:, :, 0]))
+    assert len(regions) == 2 and all(width < 60 and height < 30 for _, _, width, height in regions)
+    crop, x, y = Preprocess().transform(data)
+    assert 80 < x < 100 and 100 < y < 120 and crop.shape[0] < 220 and crop.shape[1] < 280
+    dark = [numpy.count_nonzero(crop[top - y:top - y + height, left - x:left - x + width] == 0)
+            for left, top, width, height in regions]
+    assert min(dark) > 0 and sum(dark) == numpy.count_nonzero(crop == 0)
@@ -0,0 +1,44 @@
+import platform
+import subprocess
+from os import symlink
+from pathlib import Path
+from shutil import which
+from time import monotonic, sleep
+
+import pytest
+
+from Pybot.process import ProcessTable
+
+
+@pytest.mark.skipif(platform.system() != "Linux" or which("sleep") is None, reason="Linux /proc process table.")
+def test_a_check_kill(tmp_path):
+    """Test a program is found in the snapshot, then killed without shell."""
+    program = tmp_path / "pybot-test-sleep"
+    symlink(which("sleep"), str(program))
+    process = subprocess.Popen([str(program), "30"])
+    deadline = monotonic() + 5
+    while str(program).encode() not in Path("/proc/{0}/cmdline".format(process.pid)).read_bytes() \
+            and monotonic() < deadline:
+        sleep(0.01)  # Wait for the exec of the program
+    try:
+        table = ProcessTable(ttl=60)
+        assert table.pids("pybot-test-sleep") == {process.pid}
+        assert table.running_all(["pybot-test-sleep", "pybot-not-running"]) == {"pybot-test-sleep": True,
+                                                                               "pybot-not-running": False}
+        assert table.kill(["pybot-test-sleep", "pybot-not-running"]) == {"pybot-test-sleep": True,
+                                                                         "pybot-not-running": False}
+        assert process.wait(timeout=5) != 0
+        assert table.running("pybot-test-sleep") is False
+    finally:
+        process.kill()
+
+
+def test_b_ttl():
+    """Test the snapshot is kept during the TTL, and case insensitive on Windows."""
+    table = ProcessTable(ttl=60, os_type="Windows")
+    table._read = lambda: {"firefox.exe": {42}}
+    assert table.running("Firefox.exe") is True
+    table._read = lambda: {}
+    assert table.pids("FIREFOX.EXE") == {42}
+    table.invalidate()
+    assert table.running("firefox.exe") is False
@@ -0,0 +1,54 @@
+import socket
+import sys
+
+from Pybot.program import ProgramHandle, file_exists, log_line, port_open
+
+SERVER = '''
+import socket
+import sys
+import time
+
+time.sleep(0.2)
+server = socket.socket()
+server.bind(("127.0.0.1", 0))
+server.listen()
+print("listening on", server.getsockname()[1], flush=True)
+sys.stderr.write("warning\\n")
+time.sleep(30)
+'''
+
+
+def test_a_handle():
+    """Test the handle gives the exit status and the output of the program."""
+    handle = ProgramHandle([sys.executable, "-c", "import sys; print('out'); sys.stderr.write('err'); sys.exit(3)"])
+    assert handle.pid > 0
+    assert handle.wait(timeout=10) == 3
+    assert handle.running is False
+    assert bool(handle) is False
+    assert handle.stdout.strip() == "out"
+    assert handle.stderr == "err"
+
+
+def test_b_ready(tmp_path):
+    """Test the readiness probes end the wait as soon as the program is ready."""
+    handle = ProgramHandle([sys.executable, "-c", SERVER])
+    result = handle.wait_ready(log_line(r"listening on \d+"), timeout=10)
+    assert result.ok is True
+    assert result.elapsed < 10
+    port = int(handle.stdout.split()[-1])
+    assert handle.wait_ready([port_open(port), log_line("warning")], timeout=10).ok is True
+    assert handle.wait_ready(file_exists(str(tmp_path / "missing")), timeout=0.1).ok is False
+    handle.kill()
+    handle.wait()
+    closed = socket.socket()
+    closed.bind(("127.0.0.1", 0))
+    assert port_open(closed.getsockname()[1])(handle) is False
+    closed.close()
+
+
+def test_c_ended():
+    """Test the wait stops if the program ends before being ready."""
+    handle = ProgramHandle([sys.executable, "-c", "pass"])
+    result = handle.wait_ready(log_line("never"), timeout=30)
+    assert result.ok is False
+    assert result.elapsed < 10
@@ -0,0 +1,33 @@
+from time import sleep
+
+import pytest
+
+from Pybot.runner import DeviceContext, run_devices
+
+
+def contexts(*serials):
+    """Device contexts without capture source nor input channel."""
+    return [DeviceContext(serial, None, None) for serial in serials]
+
+
+def test_a_parallel_callable():
+    """Test the devices are driven in parallel, a failing device not stopping the others."""
+    def task(device):
+        sleep(0.2)
+        if device.serial == "broken":
+            raise RuntimeError("device offline")
+        return device.serial.upper()
+
+    results = run_devices(task, contexts("R58M123ABC", "broken", "emulator-5554"), max_workers=3)
+    assert list(results) == ["R58M123ABC", "broken", "emulator-5554"]
+    assert results["R58M123ABC"].ok is True and results["R58M123ABC"].value == "R58M123ABC"
+    assert results["broken"].ok is False and isinstance(results["broken"].error, RuntimeError)
+    assert max(result.elapsed for result in results.values()) < 0.4
+
+
+def test_b_script(tmp_path):
+    """Test an exported script is refused, it would drive the desktop and not the devices."""
+    script = tmp_path / "script.py"
+    script.write_text("from lackey import *\n")
+    with pytest.raises(TypeError):
+        run_devices(str(script), contexts("R58M123ABC", "emulator-5554"))
@@ -0,0 +1,63 @@
+import os
+from os import path
+
+import numpy
+import pytest
+from PIL import Image
+
+from Pybot.database import CacheDatabase
+from Pybot.screenshot_store import ScreenshotStore, frame_key
+
+
+def frame(value):
+    """Screenshot filled with a gray level, with a gradient to have some content to compress."""
+    data = numpy.full((32, 48, 3), value, dtype=numpy.uint8)
+    data[:, :, 0] = numpy.arange(48, dtype=numpy.uint8)
+    return data
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Fixture representing a cache database in a temporary directory."""
+    db = CacheDatabase(str(tmp_path / "pybot.sqlite3"))
+    yield db
+    db.close()
+
+
+def test_a_dedup(tmp_path, database):
+    """Test identical frames are stored once, in sharded directories, and recorded in the database."""
+    store = ScreenshotStore(str(tmp_path / "screenshots"), database=database, node="node")
+    first = store.put(frame(1), text="hello")
+    assert store.put(frame(1)) == first
+    key = frame_key(frame(1))
+    assert first == path.join(str(tmp_path / "screenshots"), key[:2], key[2:4], key + ".png")
+    assert numpy.asarray(Image.open(first)).tolist() == frame(1).tolist()
+    assert store.stats()["stored"] == 1 and store.stats()["deduplicated"] == 1
+    database.flush()
+    assert database.query("SELECT image, size FROM screenshot_file;") == [(first, os.stat(first).st_size)]
+
+
+def test_b_retention(tmp_path, database):
+    """Test the oldest screenshots and their rows are evicted by count and size, the index being read again."""
+    folder = str(tmp_path / "screenshots")
+    store = ScreenshotStore(folder, database=database, max_count=3)
+    files = [store.put(frame(value)) for value in range(5)]
+    assert [path.isfile(file) for file in files] == [False, False, True, True, True]
+    database.flush()
+    assert database.query("SELECT COUNT(*) FROM screenshot_file;")[0][0] == 3
+    store = ScreenshotStore(folder, max_count=None, max_bytes=os.stat(files[-1]).st_size)
+    assert len(store) == 3 and store.evict() == 2
+    assert path.isfile(files[-1]) is True and store.size == os.stat(files[-1]).st_size
+
+
+def test_c_age_webp(tmp_path):
+    """Test the lossless WebP encoding and the eviction by age."""
+    store = ScreenshotStore(str(tmp_path / "screenshots"), encoding="webp", max_age=60)
+    old = store.put(frame(1))
+    assert old.endswith(".webp") and numpy.asarray(Image.open(old)).tolist() == frame(1).tolist()
+    os.utime(old, (0, 0))
+    store = ScreenshotStore(str(tmp_path / "screenshots"), encoding="webp", max_age=60)
+    store.put(frame(2))
+    assert path.isfile(old) is False and len(store) == 1
+    with pytest.raises(TypeError):
+        ScreenshotStore(str(tmp_path), encoding="bmp")
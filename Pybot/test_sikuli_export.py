@@ -0,0 +1,93 @@
+import builtins
+import json
+import os
+
+from Pybot import sikuli_export
+from Pybot.Pybot import PybotException
+from Pybot.plan import ActionPlan
+from Pybot.sikuli_export import MANIFEST_FILE, export_projects, unchanged
+
+SCRIPT = 'click("1529851880929.png")\nprint "exported"\n'
+
+
+def sikuli_project(folder, name, images):
+    """Create a Sikuli project with a Jython script and images."""
+    project = folder / (name + ".sikuli")
+    project.mkdir(parents=True)
+    (project / (name + ".py")).write_text(SCRIPT)
+    for image in images:
+        (project / image).write_bytes(image.encode())
+
+
+def test_a_export(tmp_path):
+    """Test the projects are converted to python 3 in parallel, with their images."""
+    sikuli_folder = tmp_path / "sikuli_project"
+    sikuli_project(sikuli_folder, "tahomaBee", ["1529851880929.png"])
+    sikuli_project(sikuli_folder, "papit", ["1529851880930.png", "1529851880931.png"])
+    results = export_projects(directory=str(tmp_path / "script"), img_folder=str(tmp_path / "img"),
+                              sikuli_folder=str(sikuli_folder), max_workers=2)
+    assert sorted(results) == ["papit", "tahomaBee"]
+    assert all(result.exported is True and result.error is None for result in results.values())
+    assert results["papit"].images == 2
+    script = (tmp_path / "script" / "tahomaBee.py").read_text()
+    assert 'click("img/1529851880929.png")' in script and 'print("exported")' in script
+    assert script.startswith("'''Generated by Pybot Framework'''\nfrom lackey import *\n"
+                             "from Pybot.plan import prefetch_lackey\nprefetch_lackey(__file__)\n")
+    assert ActionPlan.load(str(tmp_path / "script" / "tahomaBee.plan.json")).templates == ["img/1529851880929.png"]
+    assert sorted(os.listdir(str(tmp_path / "img"))) == ["1529851880929.png", "1529851880930.png",
+                                                          "1529851880931.png"]
+
+
+def test_b_incremental(tmp_path):
+    """Test the unchanged or only touched projects and images are skipped, a failing project not stopping the others."""
+    sikuli_folder = tmp_path / "sikuli_project"
+    sikuli_project(sikuli_folder, "tahomaBee", ["1529851880929.png"])
+    sikuli_project(sikuli_folder, "papit", ["1529851880930.png", "1529851880931.png"])
+    kwargs = {"directory": str(tmp_path / "script"), "img_folder": str(tmp_path / "img"),
+              "sikuli_folder": str(sikuli_folder), "max_workers": 1}
+    export_projects(**kwargs)
+    results = export_projects(**kwargs)
+    assert [(result.exported, result.images) for result in results.values()] == [(False, 0), (False, 0)]
+    exported = tmp_path / "script" / "tahomaBee.py"
+    exported.write_text("not written again")
+    script = sikuli_folder / "tahomaBee.sikuli" / "tahomaBee.py"
+    os.utime(str(script), ns=(script.stat().st_atime_ns, script.stat().st_mtime_ns + 10 ** 9))
+    results = export_projects(**kwargs)
+    assert results["tahomaBee"].exported is False and exported.read_text() == "not written again"
+    (sikuli_folder / "papit.sikuli" / "papit.py").write_text(SCRIPT)
+    assert unchanged("papit", previous=json.loads((tmp_path / "script" / MANIFEST_FILE).read_text())["papit"],
+                     **{key: value for key, value in kwargs.items() if key != "max_workers"}) is True
+    (sikuli_folder / "papit.sikuli" / "1529851880931.png").write_bytes(b"changed")
+    (sikuli_folder / "papit.sikuli" / "papit.py").unlink()
+    (sikuli_folder / "tahomaBee.sikuli" / "1529851880929.png").write_bytes(b"changed")
+    results = export_projects(**kwargs)
+    assert isinstance(results["papit"].error, FileNotFoundError)
+    assert results["tahomaBee"].exported is False and results["tahomaBee"].images == 1
+    assert (tmp_path / "img" / "1529851880929.png").read_bytes() == b"changed"
+    with open(str(tmp_path / "script" / MANIFEST_FILE)) as manifest:
+        assert sorted(json.load(manifest)) == ["papit", "tahomaBee"]
+
+
+def test_c_without_lib2to3(tmp_path, monkeypatch):
+    """Test a script is not exported nor marked converted if lib2to3 is not available."""
+    real_import = builtins.__import__
+
+    def no_lib2to3(name, *args, **kwargs):
+        if name.startswith("lib2to3") is True:
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(sikuli_export, "_refactoring_tool", None)
+    monkeypatch.setattr(builtins, "__import__", no_lib2to3)
+    sikuli_folder = tmp_path / "sikuli_project"
+    sikuli_project(sikuli_folder, "tahomaBee", ["1529851880929.png"])
+    kwargs = {"directory": str(tmp_path / "script"), "img_folder": str(tmp_path / "img"),
+              "sikuli_folder": str(sikuli_folder), "max_workers": 1}
+    results = export_projects(**kwargs)
+    assert isinstance(results["tahomaBee"].error, PybotException)
+    assert os.listdir(str(tmp_path / "script")) == [MANIFEST_FILE]
+    with open(str(tmp_path / "script" / MANIFEST_FILE)) as manifest:
+        assert json.load(manifest) == {}
+    results = export_projects(to_python3=False, **kwargs)
+    assert results["tahomaBee"].exported is True and results["tahomaBee"].error is None
+    assert 'print "exported"' in (tmp_path / "script" / "tahomaBee.py").read_text()
@@ -0,0 +1,114 @@
+from os import path
+
+import cv2
+import numpy
+import pytest
+
+from Pybot.Pybot import Pybot
+from Pybot.backend import HeadlessBackend, LackeyBackend
+from Pybot.database import CacheDatabase
+from Pybot.template import TemplateIndex, LocationHints, Match, grayscale, match_template, match_templates
+
+
+@pytest.fixture
+def screen():
+    """Fixture representing a noisy RGB capture with a button at (120, 40)."""
+    data = numpy.random.RandomState(0).randint(0, 255, (200, 300, 3)).astype(numpy.uint8)
+    data[40:60, 120:170] = (10, 200, 30)
+    data[45:55, 130:160] = (250, 250, 250)
+    return data
+
+
+@pytest.fixture
+def template(tmp_path, screen):
+    """Fixture representing the button template saved as an image."""
+    img = str(tmp_path / "1529851880929.png")
+    cv2.imwrite(img, cv2.cvtColor(screen[38:62, 118:172], cv2.COLOR_RGB2BGR))
+    return img
+
+
+def test_a_index(tmp_path, template):
+    """Test the templates are decoded once, in grayscale."""
+    index = TemplateIndex(str(tmp_path))
+    assert index.load() == 1
+    assert template in index
+    gray = index.get(template)
+    assert gray.shape == (24, 54)
+    assert index.get(template) is gray
+
+
+def test_b_match(tmp_path, screen, template):
+    """Test the match coordinates and the similarity threshold."""
+    gray = TemplateIndex(str(tmp_path)).get(template)
+    match = match_template(grayscale(screen), gray, name=template, offset=(1000, 0))
+    assert match.score > 0.99
+    assert (match.x, match.y) == (1118, 38)
+    assert match.center == (1145, 50)
+    assert match_template(grayscale(numpy.zeros_like(screen)), gray) is None
+
+
+def test_c_hints(tmp_path):
+    """Test the region around the last location and its persistence in the database."""
+    database = CacheDatabase(str(tmp_path / "pybot.sqlite3"))
+    hints = LocationHints(database, "node", 300, 200, margin=10)
+    assert hints.region("img/a.png", (20, 50), (0, 0, 300, 200)) is None
+    hints.search(Match("img/a.png", 0.9, 5, 100, 50, 20), 0.2)
+    assert hints.region("img/a.png", (20, 50), (0, 0, 300, 200)) == (0, 90, 65, 40)
+    hints.hint(True, 0.05)
+    assert hints.stats()["saved_sec"] == pytest.approx(0.15)
+    database.flush()
+    assert LocationHints(database, "node", 300, 200)._locations == {path.normpath("img/a.png"): (5, 100)}
+    assert LocationHints(database, "node", 1920, 1080)._locations == {}
+    database.close()
+
+
+def test_d_match_templates(tmp_path, screen, template):
+    """Test many templates are matched on the same capture, in the order of the templates."""
+    gray = TemplateIndex(str(tmp_path)).get(template)
+    missing = numpy.kron([[0, 255] * 5, [255, 0] * 5] * 5, numpy.ones((2, 2))).astype(numpy.uint8)
+    matches = match_templates(grayscale(screen), [("missing", missing), ("button", gray), ("again", gray)])
+    assert matches[0] is None
+    assert (matches[1].template, matches[1].x, matches[1].y) == ("button", 118, 38)
+    assert matches[2].template == "again"
+
+
+def test_e_bgr_capture(tmp_path):
+    """Test a colored template is found with the same luminance on the BGR captures of lackey."""
+    rgb = numpy.full((60, 80, 3), 240, dtype=numpy.uint8)
+    rgb[10:40, 20:60] = (200, 30, 30)
+    rgb[15:35, 25:40] = (30, 30, 200)
+    rgb[15:35, 42:55] = (30, 160, 30)
+    img = str(tmp_path / "1529851880929.png")
+    cv2.imwrite(img, cv2.cvtColor(rgb[8:42, 18:62], cv2.COLOR_RGB2BGR))
+
+    class Screen:
+        def getBounds(self):
+            return 0, 0, 80, 60
+
+        def capture(self, bounds):
+            x, y, width, height = bounds
+            return numpy.ascontiguousarray(rgb[y:y + height, x:x + width, ::-1])
+
+    backend = LackeyBackend.__new__(LackeyBackend)
+    backend.screen = Screen()
+    test_automaton = Pybot(cache=False, backend=backend)
+    match = test_automaton.find(img)
+    assert match.score > 0.99 and (match.x, match.y) == (18, 8)
+    bgr = Screen().capture((0, 0, 80, 60))
+    assert match_template(grayscale(bgr), test_automaton.templates.get(img)).score < 0.99
+    test_automaton.close()
+
+
+def test_f_moving_hint(tmp_path, screen, template):
+    """Test the location of a template found around its last location is remembered, to follow it moving."""
+    backend = HeadlessBackend(frame=screen)
+    test_automaton = Pybot(cache=False, backend=backend)
+    button = screen[38:62, 118:172].copy()
+    for x in (118, 138, 158, 178):
+        frame = numpy.random.RandomState(1).randint(0, 255, screen.shape).astype(numpy.uint8)
+        frame[38:62, x:x + 54] = button
+        backend.show(frame)
+        match = test_automaton.find(template)
+        assert (match.x, match.y) == (x, 38)
+    assert test_automaton.hints.stats()["hits"] == 3 and test_automaton.hints.searches == 1
+    test_automaton.close()
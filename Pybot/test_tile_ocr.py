@@ -0,0 +1,122 @@
+import numpy
+import pytest
+
+from Pybot.Pybot import Pybot
+from Pybot.backend import HeadlessBackend
+from Pybot.tile_ocr import TileOcr, Word, merge_words, tile_keys, changed_regions
+
+
+def fake_reader(calls):
+    """Word reader finding a word on each bright block of 8 x 8 pixels, named by its gray level."""
+    def read_words(data):
+        calls.append(data.shape[:2])
+        bright = data[:, :, 0] > 0
+        starts = bright.copy()
+        starts[:, 1:] &= ~bright[:, :-1]
+        starts[1:, :] &= ~bright[:-1, :]
+        words = []
+        for y, x in zip(*numpy.nonzero(starts)):
+            block = data[y:y + 8, x:x + 8, 0]
+            if block.shape == (8, 8) and block.min() > 0:
+                words.append(Word("w{0}".format(block.min()), int(x), int(y), 8, 8))
+        return words
+    return read_words
+
+
+def fake_tesseract(calls):
+    """Tesseract reading the words of fake_reader, a block per column of words and a line per row of a block."""
+    read_words = fake_reader(calls)
+
+    def ocr(img, lang=None, config="", words=False):
+        found = read_words(numpy.asarray(img.convert("RGB")))
+        columns = []
+        for word in sorted(found, key=lambda word: word.x):
+            if len(columns) == 0 or word.x - columns[-1][-1].x > 16:
+                columns.append([])
+            columns[-1].append(word)
+        blocks = [[sorted((word for word in column if word.y == y), key=lambda word: word.x)
+                   for y in sorted(set(word.y for word in column))] for column in columns]
+        if words is True:
+            return [word._replace(line=(block, 1, number)) for block, lines in enumerate(blocks, 1)
+                    for number, line in enumerate(lines, 1) for word in line]
+        return "\n".join("".join(" ".join(word.text for word in line) + "\n" for line in lines)
+                         for lines in blocks) + "\f"
+    return ocr
+
+
+def screen(*words, size=64):
+    """Square screen with bright blocks at the given locations and levels."""
+    data = numpy.zeros((size, size, 3), dtype=numpy.uint8)
+    for x, y, level in words:
+        data[y:y + 8, x:x + 8] = level
+    return data
+
+
+def test_a_functions():
+    """Test the tile digests, the rectangles of changed tiles and the assembly of the lines."""
+    data = screen((4, 4, 1))
+    keys = tile_keys(data, 16)
+    assert keys.shape == (4, 4) and (keys != tile_keys(screen((4, 4, 2)), 16)).sum() == 1
+    changed = numpy.zeros((4, 4), dtype=bool)
+    changed[0, 0] = changed[1, 1] = changed[3, 3] = True
+    assert sorted(changed_regions(changed)) == [(0, 0, 2, 2), (3, 3, 1, 1)]
+    words = [Word("b", 30, 1, 10, 8), Word("c", 0, 20, 10, 10), Word("a", 0, 0, 10, 10)]
+    assert merge_words(words) == "a b\nc\n\f"
+    words = [Word("l1", 0, 0, 10, 10, (1, 1, 1)), Word("l2", 0, 20, 10, 10, (1, 1, 2)),
+             Word("r1", 50, 4, 10, 10, (2, 1, 1)), Word("r2", 50, 24, 10, 10, (2, 1, 2))]
+    assert merge_words(words) == "l1\nl2\n\nr1\nr2\n\f" and merge_words([]) == "\f"
+
+
+def test_b_incremental():
+    """Test only the changed tiles and their margin are read, the text of the other tiles being kept."""
+    calls = []
+    reader = TileOcr(fake_reader(calls), tile_size=16, margin=4)
+    assert reader.read(screen((4, 4, 1), (40, 44, 2))) == "w1\nw2\n\f"
+    assert calls == [(64, 64)] and reader.full_reads == 1
+    text = reader.text
+    assert reader.read(screen((4, 4, 1), (40, 44, 2))) is text and len(calls) == 1
+    assert reader.read(screen((4, 4, 1), (40, 44, 3))) == "w1\nw3\n\f"
+    assert calls[1] == (36, 24) and reader.tiles_read == 18
+    assert reader.read(screen((4, 4, 1), (12, 44, 3))) == "w1\nw3\n\f"
+    with pytest.raises(TypeError):
+        TileOcr(fake_reader(calls), tile_size=0)
+
+
+def test_c_tile_edge():
+    """Test a word crossing the edge of a changed tile by more than the margin is read again whole."""
+    calls = []
+    reader = TileOcr(fake_reader(calls), tile_size=16, margin=4)
+    data = screen((10, 4, 1), (40, 44, 2))
+    assert reader.read(data) == "w1\nw2\n\f"
+    data[14, 28] = 9
+    assert reader.read(data) == "w1\nw2\n\f"
+    assert calls[1] == (20, 26) and reader.full_reads == 1
+
+
+def test_d_pybot(monkeypatch):
+    """Test the incremental text() of Pybot reads the words of the changed tiles only."""
+    backend = HeadlessBackend(frame=screen((4, 4, 1)))
+    test_automaton = Pybot(cache=False, backend=backend)
+    calls = []
+    read_words = fake_reader(calls)
+    monkeypatch.setattr(test_automaton, "_ocr", lambda img, lang=None, config="", words=False:
+                        read_words(numpy.asarray(img.convert("RGB"))))
+    assert test_automaton.text(incremental=True) == "w1\n\f"
+    backend.show(screen((4, 4, 1), (50, 50, 5)))
+    assert test_automaton.text(incremental=True) == "w1\nw5\n\f"
+    assert len(test_automaton.tile_readers) == 1 and len(calls) == 2
+    test_automaton.close()
+    assert test_automaton.tile_readers == {}
+
+
+def test_e_same_text(monkeypatch):
+    """Test the incremental text() is the text() of the same frame, the two columns of a dashboard kept apart."""
+    backend = HeadlessBackend(frame=screen((4, 4, 1), (4, 150, 2), (200, 8, 3), (200, 154, 4), size=256))
+    test_automaton = Pybot(cache=False, backend=backend)
+    calls = []
+    monkeypatch.setattr(test_automaton, "_ocr", fake_tesseract(calls))
+    assert test_automaton.text(incremental=True) == test_automaton.text() == "w1\nw2\n\nw3\nw4\n\f"
+    backend.show(screen((4, 4, 1), (4, 150, 2), (200, 8, 3), (200, 154, 5), (212, 154, 6), size=256))
+    assert test_automaton.text(incremental=True) == test_automaton.text() == "w1\nw2\n\nw3\nw5 w6\n\f"
+    assert calls[2] == (160, 160)
+    test_automaton.close()
@@ -0,0 +1,73 @@
+import gzip
+import json
+import types
+from os import makedirs, path
+
+import numpy
+import pytest
+from PIL import Image
+
+from Pybot.backend import HeadlessBackend
+from Pybot.trace import Tracer, active, patch_module, trace_script
+
+
+@pytest.fixture
+def button(tmp_path, monkeypatch):
+    """Template image file of a button, in a temporary working directory."""
+    monkeypatch.chdir(tmp_path)
+    makedirs("img")
+    img = path.join("img", "button.png")
+    Image.fromarray(numpy.eye(16, dtype=numpy.uint8) * 255).convert("RGB").save(img)
+    return img
+
+
+def test_a_patch_module():
+    """Test the functions of a module are traced once, nested calls being attributed to the calling line."""
+    module = types.ModuleType("fake_lackey")
+    module.find = lambda img: None
+    module.click = lambda img: module.find(img) or True
+    assert patch_module(module) == ["click", "find"] and patch_module(module) == []
+    module.click("a.png")
+    with Tracer() as tracer:
+        module.click("b.png")
+    assert active() is None
+    assert [(span.name, span.depth, span.args["target"]) for span in tracer.spans] == \
+        [("lackey.find", 1, "b.png"), ("lackey.click", 0, "b.png")]
+    assert tracer.spans[0].line == tracer.spans[1].line and tracer.spans[1].args["result"] is True
+    stats = tracer.breakdown()
+    assert len(stats) == 1 and stats[0].calls == 1 and stats[0].source == 'module.click("b.png")'
+
+
+def test_b_script(tmp_path, button):
+    """Test an exported script is run and its lines are timed, the trace being written in the Chrome format."""
+    with open("script.py", mode="w") as script:
+        script.write("from Pybot.Pybot import Pybot\n"
+                     "from Pybot.backend import HeadlessBackend\n"
+                     "backend = HeadlessBackend(width=64, height=48)\n"
+                     "backend.draw('{0}', 20, 10)\n"
+                     "test_automaton = Pybot(cache=False, backend=backend)\n"
+                     "test_automaton.check_click('{0}')\n"
+                     "test_automaton.check_click('{0}')\n".format(button.replace("\\", "/")))
+    tracer = trace_script("script.py", trace_file="trace.json.gz")
+    lines = {stat.line: stat for stat in tracer.breakdown() if stat.file.endswith("script.py")}
+    assert sorted(lines) == [6, 7] and lines[6].calls == 1
+    assert lines[6].source == "test_automaton.check_click('{0}')".format(button.replace("\\", "/"))
+    with gzip.open("trace.json.gz") as file:
+        events = json.load(file)["traceEvents"]
+    names = [event["name"] for event in events]
+    assert names.count("check_click") == 2 and names.count("find") == 2
+    find = events[names.index("find")]
+    assert find["ph"] == "X" and find["args"]["region"] == [20, 10, 16, 16] and find["args"]["line"] == "script.py:6"
+    assert "script.py:6" in tracer.report()
+
+
+def test_c_error():
+    """Test a failing action is recorded with its error."""
+    backend = HeadlessBackend(width=8, height=8)
+    module = types.ModuleType("fake_lackey")
+    module.capture = backend.capture
+    patch_module(module)
+    with Tracer() as tracer:
+        with pytest.raises(TypeError):
+            module.capture(1)
+    assert "TypeError" in tracer.spans[0].args["error"]
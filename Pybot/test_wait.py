@@ -0,0 +1,58 @@
+import numpy
+
+from Pybot.Pybot import Pybot
+from Pybot.backend import HeadlessBackend
+from Pybot.wait import AdaptivePoll, difference, signature, wait_until, CHANGE_THRESHOLD
+
+
+def test_a_signature():
+    """Test the frames are compared downscaled in grayscale, a change of a few pixels being seen."""
+    frame = numpy.zeros((100, 80, 3), dtype=numpy.uint8)
+    assert signature(frame).shape == (25, 20)
+    changed = frame.copy()
+    changed[:, :40] = 255
+    assert difference(signature(frame), signature(frame)) == 0
+    assert difference(signature(frame), signature(changed)) == 255
+    assert difference(signature(frame), signature(frame[:50])) == float("inf")
+    changed = frame.copy()
+    changed[41:43, 57:59] = 255
+    assert difference(signature(frame), signature(changed)) > CHANGE_THRESHOLD
+
+
+def test_b_adaptive_poll():
+    """Test the polling interval grows without change and is reset on a change."""
+    poll = AdaptivePoll(minimum=0.1, maximum=0.3, factor=2)
+    assert poll.next(False) == 0.2
+    assert poll.next(False) == 0.3
+    assert poll.next(True) == 0.1
+
+
+def test_c_wait_until():
+    """Test the wait returns as soon as the condition is met, or on timeout."""
+    calls = iter(range(100))
+    result = wait_until(lambda: (next(calls) == 2, "value", False), timeout=5,
+                        poll=AdaptivePoll(minimum=0.001, maximum=0.001))
+    assert result.ok is True
+    assert result.polls == 3
+    assert result.value == "value"
+    assert result.elapsed < 1
+    result = wait_until(lambda: (False, None, False), timeout=0.05, poll=AdaptivePoll(minimum=0.01))
+    assert result.ok is False
+    assert result.elapsed >= 0.05
+
+
+def test_d_small_change():
+    """Test a small widget changing on a full screen is seen, and a text changing between sampled pixels is read."""
+    frame = numpy.zeros((1080, 1920, 3), dtype=numpy.uint8)
+    changed = frame.copy()
+    changed[501:504, 1001:1003] = 255
+    backend = HeadlessBackend(frame=frame)
+    test_automaton = Pybot(cache=False, backend=backend)
+    backend.queue(frame, frame, changed)
+    assert test_automaton.wait_change(timeout=5).ok is True
+    reads = []
+    test_automaton.get_text_data = lambda data, lang=None: reads.append(data) or ("7" if data.max() > 0 else "1")
+    backend.queue(frame, frame, changed)
+    result = test_automaton.wait_text("7", timeout=5)
+    assert result.ok is True and len(reads) == 2
+    test_automaton.close()
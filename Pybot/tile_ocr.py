@@ -0,0 +1,230 @@
+"""
+========
+Tile OCR
+========
+   Incremental OCR of a region polled continuously, a dashboard for instance. The capture is split in a grid of tiles
+   hashed against the previous capture, and only the rectangles of changed tiles are read again by tesseract, grown to
+   the whole words read before on them and by a margin for the words growing across their edges. The words read keep
+   their location and their block, paragraph and line, so the words of the changed tiles replace the previous ones in
+   the lines they belong to and the text is assembled again like tesseract does, with the words of the unchanged
+   tiles. The cost of a read is then roughly proportional to the area that changed.
+"""
+import hashlib
+from collections import namedtuple
+from threading import Lock
+
+import numpy
+
+TILE_SIZE = 128
+TILE_MARGIN = 32
+FULL_READ_RATIO = 0.5
+PAGE_SEPARATOR = "\f"  # Written by tesseract 4.1 and later after the text of an image
+
+Word = namedtuple("Word", "text x y width height line")
+Word.__new__.__defaults__ = (None,)
+Word.__doc__ = """
+Word read by tesseract, with its bounds in the coordinates of the capture. Line is the tuple (block, paragraph, line)
+of the tesseract layout, its paragraph being line[:-1], or None if unknown.
+"""
+
+
+def tile_keys(data, tile_size=TILE_SIZE):
+    """
+    Hash the tiles of a capture.
+       :param data: Array of pixels as returned by Pybot.capture().
+       :param tile_size: Size in pixels of the square tiles, the tiles of the right and bottom edges being smaller.
+       :return: Array (rows, columns) of the tile digests.
+    """
+    rows = -(-data.shape[0] // tile_size)
+    columns = -(-data.shape[1] // tile_size)
+    keys = numpy.empty((rows, columns), dtype="S16")
+    for row in range(rows):
+        band = data[row * tile_size:(row + 1) * tile_size]
+        for column in range(columns):
+            tile = numpy.ascontiguousarray(band[:, column * tile_size:(column + 1) * tile_size])
+            keys[row, column] = hashlib.blake2b(memoryview(tile).cast("B"), digest_size=16).digest()
+    return keys
+
+
+def changed_regions(changed):
+    """
+    Rectangles of connected changed tiles.
+       :param changed: Array (rows, columns) of booleans, True for the changed tiles.
+       :return: List of the (column, row, columns, rows) rectangles, in tiles.
+    """
+    import cv2
+    count, _, stats, _ = cv2.connectedComponentsWithStats(changed.astype(numpy.uint8), connectivity=8)
+    return [tuple(int(value) for value in stats[label, :4]) for label in range(1, count)]
+
+
+def _overlap(word, x, y, width, height):
+    """True if the bounds of a word intersect a rectangle in pixels."""
+    return word.x < x + width and x < word.x + word.width and word.y < y + height and y < word.y + word.height
+
+
+def layout(words, prefix=()):
+    """
+    Give a line to the words without one, grouped by the center of their height in a single paragraph, and prefix the
+    lines to keep them apart from the lines of other reads.
+       :param words: List of Word objects.
+       :param prefix: Tuple prepended to the line of each word, to the line number only for the words without line.
+       :return: List of Word objects, the words without line last, top to bottom.
+    """
+    lines = []
+    for word in sorted((word for word in words if word.line is None), key=lambda word: word.y + word.height / 2):
+        center = word.y + word.height / 2
+        if len(lines) != 0 and abs(center - lines[-1][0]) <= max(word.height, lines[-1][1]) / 2:
+            line = lines[-1]
+            line[2].append(word)
+            line[0] += (center - line[0]) / len(line[2])
+            line[1] = max(line[1], word.height)
+        else:
+            lines.append([center, word.height, [word]])
+    return [word._replace(line=prefix + word.line) for word in words if word.line is not None] + \
+        [word._replace(line=(0, 0, prefix + (number,))) for number, line in enumerate(lines) for word in line[2]]
+
+
+def merge_words(words):
+    """
+    Assemble words into text like tesseract does: the words of a line left to right, the lines and paragraphs in the
+    order of their first word, a blank line between paragraphs.
+       :param words: List of Word objects, in the reading order of tesseract.
+       :return: The text, as returned by pytesseract image_to_string().
+    """
+    paragraphs = {}
+    for word in layout(words):
+        paragraphs.setdefault(word.line[:-1], {}).setdefault(word.line, []).append(word)
+    return "\n".join("".join(" ".join(word.text for word in sorted(line, key=lambda word: word.x)) + "\n"
+                             for line in paragraph.values())
+                     for paragraph in paragraphs.values()) + PAGE_SEPARATOR
+
+
+def _anchor(word, dropped, words):
+    """
+    Line of the previous words a word read again belongs to: the line of the previous word it overlaps the most, else
+    of the nearest previous word on the same row, no further than twice the height of the word.
+       :param word: Word object read again.
+       :param dropped: List of the previous Word objects replaced.
+       :param words: List of all the previous Word objects.
+       :return: The line, None if the word starts a new line.
+    """
+    best, line = 0, None
+    for previous in dropped:
+        area = max(0, min(word.x + word.width, previous.x + previous.width) - max(word.x, previous.x)) * \
+            max(0, min(word.y + word.height, previous.y + previous.height) - max(word.y, previous.y))
+        if area > best:
+            best, line = area, previous.line
+    if line is not None:
+        return line
+    best = 2 * word.height + 1
+    for previous in words:
+        if abs(word.y + word.height / 2 - previous.y - previous.height / 2) <= max(word.height, previous.height) / 2:
+            distance = max(previous.x - word.x - word.width, word.x - previous.x - previous.width, 0)
+            if distance < best:
+                best, line = distance, previous.line
+    return line
+
+
+class TileOcr:
+    """
+    Incremental reader of a region, keeping the words read and the tile digests of the previous capture.
+    """
+
+    def __init__(self, read_words, tile_size=TILE_SIZE, margin=TILE_MARGIN, full_ratio=FULL_READ_RATIO):
+        """
+        Constructor of the TileOcr class.
+           :param read_words: Callable reading an array of pixels, returning the list of Word objects in its
+              coordinates.
+           :param tile_size: Size in pixels of the square tiles.
+           :param margin: Number of pixels read around the changed tiles, for the words growing across their edges, the
+              words read before on the changed tiles being read again whole whatever their length.
+           :param full_ratio: Ratio of changed tiles above which the whole capture is read at once.
+           :raise TypeError: If tile_size or margin is not a positive integer.
+        """
+        if isinstance(tile_size, int) is False or isinstance(margin, int) is False or tile_size < 1 or margin < 0:
+            raise TypeError("Kwargs tile_size and margin must be positive integers.")
+        self.read_words = read_words
+        self.tile_size = tile_size
+        self.margin = margin
+        self.full_ratio = full_ratio
+        self.words = []
+        self.text = None
+        self.reads = 0
+        self.full_reads = 0
+        self.tiles_read = 0
+        self._keys = None
+        self._lock = Lock()
+
+    def read(self, data):
+        """
+        Read the text of a capture, only the changed tiles being read by tesseract.
+           :param data: Array of pixels as returned by Pybot.capture(), the region being the same each time.
+           :return: String of the text, the same object as the previous read if no tile changed.
+        """
+        keys = tile_keys(data, self.tile_size)
+        with self._lock:
+            if self._keys is None or self._keys.shape != keys.shape:
+                changed = numpy.ones(keys.shape, dtype=bool)
+            else:
+                changed = self._keys != keys
+            if self.text is not None and bool(changed.any()) is False:
+                return self.text
+            self.reads += 1
+            if changed.mean() > self.full_ratio:
+                self.words = layout(list(self.read_words(data)), (self.reads,))
+                self.full_reads += 1
+                self.tiles_read += changed.size
+            else:
+                for region in changed_regions(changed):
+                    self._read_region(data, region)
+                self.tiles_read += int(numpy.count_nonzero(changed))
+            self._keys = keys
+            self.text = merge_words(self.words)
+            return self.text
+
+    def reset(self):
+        """Forget the previous capture, the next read reads the whole capture."""
+        with self._lock:
+            self._keys = None
+            self.words = []
+            self.text = None
+
+    def _read_region(self, data, region):
+        """
+        Read a rectangle of changed tiles grown to the previous words crossing it and by the margin, its words
+        replacing the previous ones in their lines. The lock must be held.
+           :param data: Array of pixels.
+           :param region: Tuple (column, row, columns, rows) of the rectangle, in tiles.
+        """
+        column, row, columns, rows = region
+        x, y = column * self.tile_size, row * self.tile_size
+        width = min(data.shape[1], (column + columns) * self.tile_size) - x
+        height = min(data.shape[0], (row + rows) * self.tile_size) - y
+        dropped = [word for word in self.words if _overlap(word, x, y, width, height) is True]
+        left = max(0, min([x - self.margin] + [word.x for word in dropped]))
+        top = max(0, min([y - self.margin] + [word.y for word in dropped]))
+        right = min(data.shape[1], max([x + width + self.margin] + [word.x + word.width for word in dropped]))
+        bottom = min(data.shape[0], max([y + height + self.margin] + [word.y + word.height for word in dropped]))
+        words = [word for word in layout([Word(word.text, word.x + left, word.y + top, word.width, word.height,
+                                               word.line) for word in self.read_words(data[top:bottom, left:right])],
+                                         (self.reads, x, y))
+                 if _overlap(word, x, y, width, height) is True]
+        lines = {}
+        for word in words:
+            if lines.get(word.line) is None:
+                lines[word.line] = _anchor(word, dropped, self.words)
+        inserts = {}
+        for word in words:
+            line = lines[word.line]
+            if line is None:
+                index = next((index for index, previous in enumerate(self.words) if previous.y > word.y),
+                             len(self.words))
+            else:
+                index = next(index for index, previous in enumerate(self.words) if previous.line == line)
+            inserts.setdefault(index, []).append(word if line is None else word._replace(line=line))
+        merged = []
+        for index, previous in enumerate(self.words):
+            merged.extend(inserts.get(index, ()))
+            if _overlap(previous, x, y, width, height) is False:
+                merged.append(previous)
+        self.words = merged + inserts.get(len(self.words), [])
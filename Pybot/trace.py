@@ -0,0 +1,308 @@
+"""
+=====
+Trace
+=====
+   Action timeline of a script run. While a Tracer is active, each Pybot action and each lackey function called by an
+   exported script is recorded with its start and end time, its target, the region matched or the text read, and the
+   line of the script calling it. The timeline is written in the Chrome trace format, to be opened with
+   chrome://tracing or ui.perfetto.dev as a flame chart, and the time spent per line of the script is summed up to
+   know which step to optimize. When no Tracer is active, a traced action costs a global lookup.
+"""
+import functools
+import gzip
+import json
+import linecache
+import os
+import runpy
+import sys
+from collections import namedtuple
+from threading import Lock, local, get_ident
+from time import perf_counter
+
+LACKEY_ACTIONS = ("click", "doubleClick", "rightClick", "hover", "dragDrop", "exists", "wait", "waitVanish", "find",
+                  "findAll", "type", "paste", "text", "capture", "wheel", "mouseMove")
+TEXT_LENGTH = 200
+
+Span = namedtuple("Span", "name start end thread depth file line args")
+Span.__doc__ = """
+Action recorded: name of the function, start and end in seconds since the start of the trace, identifier of the thread,
+depth of the call in other actions (0 for a call of the script), file and line of the script calling it and dictionary
+of its target and result.
+"""
+
+LineStat = namedtuple("LineStat", "file line source calls total")
+LineStat.__doc__ = """
+Time spent by a line of the script in actions: number of calls and total in seconds.
+"""
+
+_tracer = None
+
+
+def active():
+    """
+    Tracer recording the actions.
+       :return: The active Tracer object, None if the actions are not traced.
+    """
+    return _tracer
+
+
+def describe(value):
+    """
+    Summary of the result of an action, for the trace.
+       :param value: Value returned by the action.
+       :return: Dictionary of the region matched, the text read, the result of a wait or the boolean returned.
+    """
+    if value is None or isinstance(value, bool) is True:
+        return {"result": value}
+    if isinstance(value, str) is True:
+        return {"text": value[:TEXT_LENGTH]}
+    if hasattr(value, "polls") and hasattr(value, "ok"):
+        result = {"ok": value.ok, "polls": value.polls}
+        if isinstance(value.value, (int, float)) is False:
+            result.update(describe(value.value))
+        return result
+    if hasattr(value, "score") and hasattr(value, "width"):
+        return {"region": [value.x, value.y, value.width, value.height], "score": round(float(value.score), 4)}
+    if hasattr(value, "getScore") and hasattr(value, "getW"):
+        return {"region": [value.getX(), value.getY(), value.getW(), value.getH()],
+                "score": round(float(value.getScore()), 4)}
+    return {}
+
+
+def _target(args, kwargs):
+    """
+    Target of an action, its first argument if it is a string: image, pattern, command or text typed.
+       :param args: Positional arguments of the action, without self.
+       :param kwargs: Keyword arguments of the action.
+       :return: Dictionary with the target, empty if none.
+    """
+    if len(args) != 0:
+        if isinstance(args[0], str) is True:
+            return {"target": args[0][:TEXT_LENGTH]}
+        if isinstance(args[0], (list, tuple)) is True and all(isinstance(arg, str) for arg in args[0]):
+            return {"target": list(args[0])}
+    if isinstance(kwargs.get("bounds"), tuple) is True:
+        return {"bounds": list(kwargs["bounds"])}
+    return {}
+
+
+def traced(function, name=None, method=True):
+    """
+    Decorator recording the calls of an action in the active Tracer.
+       :param function: Method of Pybot or lackey function.
+       :param name: Name of the action in the trace, default is the name of the function.
+       :param method: If True, the first argument is self and not the target of the action.
+       :return: The wrapped function.
+    """
+    name = function.__name__ if name is None else name
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        tracer = _tracer
+        if tracer is None:
+            return function(*args, **kwargs)
+        target = args[1:] if method is True else args
+        return tracer.call(sys._getframe(1), name, function, args, kwargs, _target(target, kwargs))
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def patch_module(module, names=LACKEY_ACTIONS):
+    """
+    Trace the functions of a module, the lackey functions imported by the exported scripts with from lackey import *.
+    The module must be patched before the script is imported.
+       :param module: Module object, lackey for instance.
+       :param names: Names of the functions to trace.
+       :return: List of the names of the functions traced.
+    """
+    patched = []
+    for name in names:
+        function = getattr(module, name, None)
+        if callable(function) and getattr(function, "__traced__", False) is False:
+            setattr(module, name, traced(function, name="lackey." + name, method=False))
+            patched.append(name)
+    return patched
+
+
+class Tracer:
+    """
+    Recorder of the actions of a script run, active between start() and stop() or in a with block.
+    """
+
+    def __init__(self, script=None):
+        """
+        Constructor of the Tracer class.
+           :param script: Path of the script whose lines are recorded, default is None for the line calling each
+              action, whatever its file.
+        """
+        self.script = None if script is None else os.path.abspath(script)
+        self.spans = []
+        self.origin = None
+        self._lock = Lock()
+        self._local = local()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def start(self):
+        """
+        Activate the tracer, the actions called afterwards are recorded.
+           :return: The Tracer object.
+        """
+        global _tracer
+        if self.origin is None:
+            self.origin = perf_counter()
+        _tracer = self
+        return self
+
+    def stop(self):
+        """Deactivate the tracer, the spans recorded are kept."""
+        global _tracer
+        if _tracer is self:
+            _tracer = None
+
+    def call(self, frame, name, function, args, kwargs, details):
+        """
+        Call an action and record its span.
+           :param frame: Frame calling the action.
+           :param name: Name of the action.
+           :param function: Function of the action.
+           :param args: Positional arguments.
+           :param kwargs: Keyword arguments.
+           :param details: Dictionary of the target of the action.
+           :return: The value returned by the action.
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        if len(stack) != 0:
+            file, line = stack[-1]
+        else:
+            file, line = self._line(frame)
+        stack.append((file, line))
+        start = perf_counter()
+        try:
+            value = function(*args, **kwargs)
+        except BaseException as error:
+            details["error"] = repr(error)[:TEXT_LENGTH]
+            raise
+        else:
+            details.update(describe(value))
+            return value
+        finally:
+            end = perf_counter()
+            stack.pop()
+            with self._lock:
+                self.spans.append(Span(name, start - self.origin, end - self.origin, get_ident(), len(stack), file,
+                                       line, details))
+
+    def breakdown(self):
+        """
+        Time spent per line of the script, only the actions called by the script itself being counted, not the
+        actions they call.
+           :return: List of LineStat objects, the slowest line first.
+        """
+        lines = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if span.depth == 0:
+                calls, total = lines.get((span.file, span.line), (0, 0.0))
+                lines[(span.file, span.line)] = (calls + 1, total + span.end - span.start)
+        stats = [LineStat(file, line, linecache.getline(file, line).strip() if file else "", calls, total)
+                 for (file, line), (calls, total) in lines.items()]
+        return sorted(stats, key=lambda stat: stat.total, reverse=True)
+
+    def report(self, top=20):
+        """
+        Time breakdown per line of the script as text.
+           :param top: Number of lines reported, the slowest ones.
+           :return: Text table of the lines, their number of calls and total time.
+        """
+        stats = self.breakdown()
+        total = sum(stat.total for stat in stats) or 1.0
+        rows = ["{0:>10} {1:>6} {2:>6}  {3}".format("seconds", "%", "calls", "line")]
+        for stat in stats[:top]:
+            rows.append("{0:>10.3f} {1:>6.1f} {2:>6}  {3}:{4} {5}".format(
+                stat.total, 100 * stat.total / total, stat.calls, os.path.basename(stat.file or "?"), stat.line,
+                stat.source))
+        return "\n".join(rows)
+
+    def to_chrome(self):
+        """
+        Timeline in the Chrome trace format.
+           :return: Dictionary with the complete events (ph X) of the actions, times in microseconds.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        threads = {}
+        events = []
+        for span in sorted(spans, key=lambda span: (span.start, span.depth)):
+            args = dict(span.args)
+            if span.file is not None:
+                args["line"] = "{0}:{1}".format(os.path.basename(span.file), span.line)
+            events.append({"name": span.name, "cat": "lackey" if span.name.startswith("lackey.") else "pybot",
+                           "ph": "X", "ts": round(span.start * 1e6, 1), "dur": round((span.end - span.start) * 1e6, 1),
+                           "pid": os.getpid(), "tid": threads.setdefault(span.thread, len(threads)), "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"script": self.script, "spans": len(events)}}
+
+    def write(self, trace_file):
+        """
+        Write the timeline in the Chrome trace format, compact JSON, gzipped if the file ends with .gz.
+           :param trace_file: Path of the trace file, trace.json or trace.json.gz for instance.
+        """
+        data = json.dumps(self.to_chrome(), separators=(",", ":")).encode("utf-8")
+        opener = gzip.open if trace_file.endswith(".gz") else open
+        with opener(trace_file, "wb") as file:
+            file.write(data)
+
+    def _line(self, frame):
+        """
+        Line of the script calling an action.
+           :param frame: Frame calling the action.
+           :return: Tuple of the file and the line number, the first caller in the script if any.
+        """
+        caller = frame
+        if self.script is not None:
+            while frame is not None and os.path.abspath(frame.f_code.co_filename) != self.script:
+                frame = frame.f_back
+            if frame is not None:
+                caller = frame
+        return caller.f_code.co_filename, caller.f_lineno
+
+
+def trace_script(script, trace_file=None, argv=(), tracer=None):
+    """
+    Run a script exported by export_sikuli_script() with the actions traced, the lackey functions included if lackey
+    can be imported.
+       :param script: Path of the python script.
+       :param trace_file: Path of the trace file written, even if the script fails, default is None to keep the trace
+          in memory only.
+       :param argv: Arguments of the script.
+       :param tracer: Tracer object recording the actions, default is None for a new one.
+       :return: The Tracer object.
+       :raise SystemExit: If the script exits, like any exception raised by the script.
+    """
+    try:
+        import lackey
+    except (ImportError, NotImplementedError):
+        pass
+    else:
+        patch_module(lackey)
+    tracer = Tracer(script) if tracer is None else tracer
+    saved_argv = sys.argv
+    sys.argv = [script] + list(argv)
+    try:
+        with tracer:
+            runpy.run_path(script, run_name="__main__")
+    finally:
+        sys.argv = saved_argv
+        if trace_file is not None:
+            tracer.write(trace_file)
+    return tracer
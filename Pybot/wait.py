@@ -0,0 +1,156 @@
+"""
+====
+Wait
+====
+   Wait primitives returning as soon as the screen changes, settles or shows what is expected, instead of sleeping a
+   fixed number of seconds. Frames are compared downscaled in grayscale, each block of pixels averaged so that a change
+   of a few pixels is still seen, which is cheap enough to poll often, and the polling slows down while nothing
+   happens.
+"""
+from collections import namedtuple
+from time import monotonic, sleep
+
+import numpy
+
+from Pybot.template import grayscale
+
+WAIT_TIMEOUT = 3.0  # Default auto wait timeout of Sikuli
+WAIT_POLL_MIN = 0.02
+WAIT_POLL_MAX = 0.5
+WAIT_POLL_FACTOR = 1.5
+WAIT_DOWNSCALE = 4
+CHANGE_THRESHOLD = 4.0  # A pixel of a block changed by 64 gray levels
+SETTLE_SEC = 0.5
+
+WaitResult = namedtuple("WaitResult", "ok elapsed polls value")
+WaitResult.__doc__ = """
+Result of a wait: ok is True if the condition was met before the timeout, elapsed the number of seconds waited, polls
+the number of captures and value what was found (match, text, frame difference).
+"""
+
+
+def signature(data, step=WAIT_DOWNSCALE):
+    """
+    Downscaled grayscale signature of captured pixels, to compare frames cheaply. The pixels are averaged by blocks of
+    step x step pixels, every pixel weighing in its block.
+       :param data: Array of pixels as returned by Pybot.capture().
+       :param step: Size in pixels of the blocks averaged.
+       :return: 2 dimensions array of float32.
+    """
+    import cv2
+    gray = grayscale(data)
+    if gray.size == 0:
+        return gray.astype(numpy.float32)
+    size = (-(-gray.shape[1] // step), -(-gray.shape[0] // step))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(numpy.float32)
+
+
+def difference(first, second):
+    """
+    Largest absolute difference between the blocks of two signatures, so a small region changing on a large screen is
+    not averaged away.
+       :param first: Signature returned by signature().
+       :param second: Signature returned by signature().
+       :return: Difference in gray levels (0 to 255) of the most changed block, infinity if the sizes differ.
+    """
+    if first.shape != second.shape:
+        return float("inf")
+    if first.size == 0:
+        return 0.0
+    return float(numpy.abs(first - second).max())
+
+
+class AdaptivePoll:
+    """
+    Polling interval growing while nothing changes and reset on a change.
+    """
+
+    def __init__(self, minimum=WAIT_POLL_MIN, maximum=WAIT_POLL_MAX, factor=WAIT_POLL_FACTOR):
+        """
+        Constructor of the AdaptivePoll class.
+           :param minimum: First and minimum interval in seconds.
+           :param maximum: Maximum interval in seconds.
+           :param factor: Multiplication of the interval after a poll without change.
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.interval = minimum
+
+    def next(self, changed):
+        """
+        Interval before the next poll.
+           :param changed: True if the last poll saw a change.
+           :return: Number of seconds to sleep.
+        """
+        if changed is True:
+            self.interval = self.minimum
+        else:
+            self.interval = min(self.maximum, self.interval * self.factor)
+        return self.interval
+
+
+def settle_poll(settle_sec):
+    """
+    Polling of a wait for the screen to settle, slowing down to half the settle time at most.
+       :param settle_sec: Number of seconds without change for the screen to be settled.
+       :return: AdaptivePoll object.
+    """
+    return AdaptivePoll(maximum=max(WAIT_POLL_MIN, min(WAIT_POLL_MAX, settle_sec / 2)))
+
+
+def wait_until(probe, timeout, poll=None):
+    """
+    Poll a condition until it is met or the timeout is reached.
+       :param probe: Callable without argument returning a tuple (done, value, changed), changed being True if the
+          screen changed since the previous call.
+       :param timeout: Maximum number of seconds to wait.
+       :param poll: AdaptivePoll object, a default one if None.
+       :return: WaitResult object.
+       :raise TypeError: If timeout is not an integer or a float.
+    """
+    if isinstance(timeout, (int, float)) is False:
+        raise TypeError("Kwarg timeout must be an integer or a float.")
+    if poll is None:
+        poll = AdaptivePoll()
+    start = monotonic()
+    deadline = start + timeout
+    polls = 0
+    while True:
+        done, value, changed = probe()
+        polls += 1
+        now = monotonic()
+        if done is True:
+            return WaitResult(True, now - start, polls, value)
+        if now >= deadline:
+            return WaitResult(False, now - start, polls, value)
+        sleep(min(poll.next(changed), deadline - now))
+
+
+async def wait_until_async(probe, timeout, poll=None):
+    """
+    Poll a condition until it is met or the timeout is reached, without blocking the event loop.
+       :param probe: Coroutine function without argument returning a tuple (done, value, changed), changed being True
+          if the screen changed since the previous call.
+       :param timeout: Maximum number of seconds to wait.
+       :param poll: AdaptivePoll object, a default one if None.
+       :return: WaitResult object.
+       :raise TypeError: If timeout is not an integer or a float.
+    """
+    import asyncio
+    if isinstance(timeout, (int, float)) is False:
+        raise TypeError("Kwarg timeout must be an integer or a float.")
+    if poll is None:
+        poll = AdaptivePoll()
+    start = monotonic()
+    deadline = start + timeout
+    polls = 0
+    while True:
+        done, value, changed = await probe()
+        polls += 1
+        now = monotonic()
+        if done is True:
+            return WaitResult(True, now - start, polls, value)
+        if now >= deadline:
+            return WaitResult(False, now - start, polls, value)
+        await asyncio.sleep(min(poll.next(changed), deadline - now))
@@ -0,0 +1,41 @@
+"""
+Benchmark of the Android screen capture, one adb process per capture against a persistent adb session.
+Runs against the fake adb of this folder unless an adb executable and a device serial are given.
+Usage: python benchmark/bench_android_capture.py [number of captures] [adb executable serial]
+"""
+
+import sys
+from os import path
+from time import perf_counter
+
+from Pybot.android import AndroidScreen
+
+FAKE_ADB = [sys.executable, path.join(path.dirname(path.abspath(__file__)), "fake_adb.py")]
+
+
+def bench(android_screen, n):
+    """
+    Time n captures.
+       :param android_screen: AndroidScreen object.
+       :param n: Number of captures.
+       :return: Mean latency in seconds.
+    """
+    start = perf_counter()
+    for _ in range(n):
+        android_screen.capture()
+    return (perf_counter() - start) / n
+
+
+if __name__ == "__main__":
+    captures = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    if len(sys.argv) > 3:
+        android_screen = AndroidScreen(sys.argv[2], sys.argv[3])
+    else:
+        android_screen = AndroidScreen(FAKE_ADB, "FAKE0001")
+    one_shot = bench(android_screen, captures)
+    android_screen.start()
+    streaming = bench(android_screen, captures)
+    android_screen.stop()
+    print("capture, one adb per frame : {0:.4f}s".format(one_shot))
+    print("capture, persistent session: {0:.4f}s".format(streaming))
+    sys.exit(0)
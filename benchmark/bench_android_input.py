@@ -0,0 +1,61 @@
+"""
+Benchmark of the Android input latency, one adb process per command against the persistent adb shell session.
+Runs against the fake adb of this folder unless an adb executable and device serials are given.
+Usage: python benchmark/bench_android_input.py [number of commands] [adb executable serial...]
+"""
+
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from time import perf_counter
+
+from Pybot.android import AndroidInput, adb_device_command
+
+FAKE_ADB = [sys.executable, path.join(path.dirname(path.abspath(__file__)), "fake_adb.py")]
+
+
+def one_process_per_command(adb, serial, n):
+    """
+    Mean latency of n key events, each one started in a new adb process.
+       :param adb: Path of the adb executable, or list of the command starting adb.
+       :param serial: Serial number of the device.
+       :param n: Number of commands.
+       :return: Mean latency in seconds.
+    """
+    start = perf_counter()
+    for _ in range(n):
+        subprocess.run(adb_device_command(adb, serial, "shell", "input keyevent 0"), stdin=subprocess.DEVNULL,
+                       stdout=subprocess.DEVNULL, check=True)
+    return (perf_counter() - start) / n
+
+
+def pipelined(adb, serial, n):
+    """
+    Mean latency of n key events, pipelined in the persistent session and synchronised at the end.
+       :param adb: Path of the adb executable, or list of the command starting adb.
+       :param serial: Serial number of the device.
+       :param n: Number of commands.
+       :return: Mean latency in seconds.
+    """
+    android_input = AndroidInput(adb, serial)
+    android_input.sync()
+    start = perf_counter()
+    for _ in range(n):
+        android_input.keyevent(0)
+    android_input.sync()
+    elapsed = perf_counter() - start
+    android_input.stop()
+    return elapsed / n
+
+
+if __name__ == "__main__":
+    commands = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    adb = sys.argv[2] if len(sys.argv) > 2 else FAKE_ADB
+    serials = sys.argv[3:] if len(sys.argv) > 3 else ["FAKE0001", "FAKE0002", "FAKE0003"]
+    print("one adb per command    : {0:.5f}s".format(one_process_per_command(adb, serials[0], commands)))
+    print("persistent session     : {0:.5f}s".format(pipelined(adb, serials[0], commands)))
+    with ThreadPoolExecutor(max_workers=len(serials)) as executor:
+        latencies = list(executor.map(lambda serial: pipelined(adb, serial, commands), serials))
+    print("{0} devices concurrently: {1:.5f}s".format(len(serials), max(latencies)))
+    sys.exit(0)
@@ -0,0 +1,58 @@
+"""
+Benchmark of the OCR preprocessing, comparing the time and the accuracy of text() on the raw capture (former path) to
+the preprocessed captures, on synthetic screens with a known text. With the fake tesseract of this folder, the time
+models the number of pixels read and the accuracy is not measured; give the real tesseract command to measure it.
+Usage: python benchmark/bench_ocr_preprocess.py [number of calls] [tesseract command]
+"""
+
+import difflib
+import os
+import sys
+import tempfile
+from os import path
+
+from bench_suite import SCREEN_TEXT, button, synthetic_screen, fake_tesseract, timings, summary
+from Pybot import Pybot as pybot_module
+from Pybot.Pybot import Pybot
+from Pybot.backend import HeadlessBackend
+from Pybot.preprocess import Preprocess
+
+SIZES = ((800, 600), (1920, 1080))
+VARIANTS = (("raw", False), ("otsu", Preprocess()), ("stretch", Preprocess(threshold="stretch")),
+            ("otsu x2", Preprocess(scale=2)))
+
+
+def accuracy(text, height):
+    """
+    Similarity of the text read to the text of the synthetic screen.
+       :param text: Text read.
+       :param height: Height of the screen, giving the number of lines of text.
+       :return: Ratio between 0 and 1.
+    """
+    expected = " ".join([SCREEN_TEXT] * len(range(10, height // 3, 20)))
+    return difflib.SequenceMatcher(None, " ".join(text.split()), expected).ratio()
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    measure_accuracy = len(sys.argv) > 2
+    with tempfile.TemporaryDirectory(prefix="pybot_bench_") as work:
+        os.chdir(work)
+        if measure_accuracy is True:
+            pybot_module.TESSERACT_CMD = sys.argv[2]
+        else:
+            os.environ["FAKE_TESSERACT_TEXT"] = SCREEN_TEXT
+            pybot_module.TESSERACT_CMD = fake_tesseract(work)
+        for width, height in SIZES:
+            frame, _ = synthetic_screen(width, height, button())
+            test_automaton = Pybot(cache=False, backend=HeadlessBackend(frame=frame))
+            for name, preprocess in VARIANTS:
+                result = summary(timings(lambda i: test_automaton.text(preprocess=preprocess), calls))
+                score = "{0:.3f}".format(accuracy(test_automaton.text(preprocess=preprocess), height)) \
+                    if measure_accuracy is True else "n/a"
+                print("{0}x{1} {2:<8}: mean {3:.4f}s p95 {4:.4f}s accuracy {5}".format(
+                    width, height, name, result["mean"], result["p95"], score))
+            test_automaton.close()
+            del test_automaton
+        os.chdir(path.dirname(path.abspath(__file__)))
+    sys.exit(0)
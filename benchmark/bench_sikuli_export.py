@@ -0,0 +1,58 @@
+"""
+Benchmark of the batch export of Sikuli projects: a first export of many generated projects, then a second export of
+the unchanged projects and a third one after a change in a single project.
+Usage: python benchmark/bench_sikuli_export.py [number of projects]
+"""
+
+import sys
+from os import path, makedirs
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from Pybot.sikuli_export import export_projects
+
+SCRIPT = """def login(user):
+    if exists("{0}0.png"):
+        click("{0}0.png")
+        type(user)
+    print "logged in", user
+for user in ["alice", "bob"]:
+    login(user)
+    wait("{0}1.png", 10)
+"""
+IMAGES = 5
+
+
+def generate(sikuli_folder, projects):
+    """
+    Generate Sikuli projects with a Jython script and images.
+       :param sikuli_folder: Folder of the projects.
+       :param projects: Number of projects.
+    """
+    for index in range(projects):
+        project = path.join(sikuli_folder, "project{0}.sikuli".format(index))
+        makedirs(project)
+        prefix = str(1529851880000 + index * IMAGES)[:12]
+        with open(path.join(project, "project{0}.py".format(index)), "w") as script:
+            script.write(SCRIPT.format(prefix))
+        for image in range(IMAGES):
+            with open(path.join(project, "{0}{1}.png".format(prefix, image)), "wb") as img:
+                img.write(bytes(4096))
+
+
+if __name__ == "__main__":
+    projects = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with TemporaryDirectory() as folder:
+        kwargs = {"directory": path.join(folder, "script"), "img_folder": path.join(folder, "img"),
+                  "sikuli_folder": path.join(folder, "sikuli_project")}
+        generate(kwargs["sikuli_folder"], projects)
+        for name in ("first export", "unchanged", "one project changed"):
+            if name == "one project changed":
+                with open(path.join(kwargs["sikuli_folder"], "project0.sikuli", "project0.py"), "a") as script:
+                    script.write("print 'changed'\n")
+            start = perf_counter()
+            results = export_projects(**kwargs)
+            exported = sum(result.exported for result in results.values())
+            print("{0:20}: {1:.3f}s, {2} of {3} projects exported".format(name, perf_counter() - start, exported,
+                                                                          projects))
+    sys.exit(0)
@@ -0,0 +1,51 @@
+"""
+Benchmark of the startup of short Pybot scripts: the import of Pybot.Pybot, the construction of a Pybot object and its
+first capture, each measured in a new interpreter like a script run. The headless backend is used so that the
+benchmark runs on any platform, the cache database being created in a temporary folder.
+Usage: python benchmark/bench_startup.py [number of runs]
+"""
+
+import json
+import subprocess
+import sys
+from os import path, environ
+from tempfile import TemporaryDirectory
+
+ROOT_FOLDER = path.dirname(path.dirname(path.abspath(__file__)))
+SCRIPT = """
+import json
+from time import perf_counter
+start = perf_counter()
+from Pybot.Pybot import Pybot
+from Pybot.backend import HeadlessBackend
+imported = perf_counter()
+test_automaton = Pybot(cache={0}, backend=HeadlessBackend())
+constructed = perf_counter()
+test_automaton.capture()
+captured = perf_counter()
+test_automaton.close()
+print(json.dumps([imported - start, constructed - imported, captured - constructed]))
+"""
+
+
+def run(cache):
+    """
+    Time one script run in a new interpreter.
+       :param cache: Cache kwarg of the Pybot object.
+       :return: List of the import, construction and first capture durations in seconds.
+    """
+    with TemporaryDirectory() as folder:
+        env = dict(environ, PYTHONPATH=ROOT_FOLDER)
+        output = subprocess.check_output([sys.executable, "-c", SCRIPT.format(cache)], cwd=folder, env=env)
+    return json.loads(output.decode())
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for cache in (False, True):
+        timings = [run(cache) for _ in range(runs)]
+        for index, name in enumerate(("import", "construction", "first capture")):
+            values = [timing[index] for timing in timings]
+            print("cache={0!s:5} {1:14}: mean {2:.4f}s min {3:.4f}s".format(cache, name, sum(values) / runs,
+                                                                         min(values)))
+    sys.exit(0)
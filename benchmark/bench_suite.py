@@ -0,0 +1,296 @@
+"""
+Offline benchmark suite of Pybot, on any platform without display, tesseract or Android device. Synthetic screens
+with a known text and button are shown by the headless backend, tesseract and adb are replaced by the fake executables
+of this folder. The latency and throughput of screenshot(), text(), incremental text() of a screen whose clock
+changes, template matching, cache writes, adb device listing and Sikuli export are measured at several screen sizes
+and written as JSON, to be compared between versions.
+Usage: python benchmark/bench_suite.py [result file] [baseline file]
+   BENCH_SIZES: screen sizes separated by commas, default is 800x600,1366x768,1920x1080,2560x1440.
+   BENCH_REPEAT: number of calls timed per measure, default is 20.
+"""
+
+import json
+import os
+import platform
+import stat
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from os import path
+from time import perf_counter
+
+import numpy
+from PIL import Image, ImageDraw
+
+import Pybot
+from Pybot import Pybot as pybot_module
+from Pybot.Pybot import Pybot as Automaton
+from Pybot.android import DeviceRegistry
+from Pybot.backend import HeadlessBackend
+from Pybot.database import CacheDatabase
+from Pybot.sikuli_export import export_projects
+
+BENCH_FOLDER = path.dirname(path.abspath(__file__))
+FAKE_ADB = [sys.executable, path.join(BENCH_FOLDER, "fake_adb.py")]
+FAKE_TESSERACT = path.join(BENCH_FOLDER, "fake_tesseract.py")
+SIZES = os.environ.get("BENCH_SIZES", "800x600,1366x768,1920x1080,2560x1440")
+REPEAT = int(os.environ.get("BENCH_REPEAT", "20"))
+SCREEN_TEXT = "Pybot benchmark 0123456789"
+CACHE_ROWS = 5000
+PROJECTS = 20
+PROJECT_IMAGES = 10
+REGRESSION_RATIO = 1.2
+
+
+def timings(function, n):
+    """
+    Time n calls of a function.
+       :param function: Callable taking the index of the call.
+       :param n: Number of calls.
+       :return: List of the latencies in seconds.
+    """
+    samples = []
+    for i in range(n):
+        start = perf_counter()
+        function(i)
+        samples.append(perf_counter() - start)
+    return samples
+
+
+def summary(samples, items=1):
+    """
+    Statistics of latencies.
+       :param samples: List of the latencies in seconds.
+       :param items: Number of items processed by each call, rows or projects for instance.
+       :return: Dictionary of the number of calls, mean, median, 95th percentile and minimum latencies and the
+          throughput in items per second.
+    """
+    ordered = sorted(samples)
+    mean = sum(ordered) / len(ordered)
+    return {"n": len(ordered), "mean": mean, "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], "min": ordered[0],
+            "per_sec": items / mean if mean > 0 else None}
+
+
+def button(width=48, height=24, square=6):
+    """Textured button template, for the matching to be unambiguous."""
+    ys, xs = numpy.indices((height, width))
+    gray = (((ys // square + xs // square) % 2) * 200 + 30).astype(numpy.uint8)
+    return numpy.repeat(gray[:, :, None], 3, axis=2)
+
+
+def synthetic_screen(width, height, template):
+    """
+    Screen with a gradient background, lines of the known text and the button.
+       :param width: Width of the screen.
+       :param height: Height of the screen.
+       :param template: Button image drawn on the screen.
+       :return: Tuple of the array (height, width, 3) of uint8 and the location of the button.
+    """
+    xs = numpy.linspace(40, 90, width, dtype=numpy.float32)
+    ys = numpy.linspace(0, 40, height, dtype=numpy.float32)
+    gray = (xs[None, :] + ys[:, None]).astype(numpy.uint8)
+    img = Image.fromarray(numpy.repeat(gray[:, :, None], 3, axis=2))
+    draw = ImageDraw.Draw(img)
+    for y in range(10, height // 3, 20):
+        draw.text((10, y), SCREEN_TEXT, fill=(255, 255, 255))
+    frame = numpy.array(img)
+    x, y = width * 2 // 3, height // 2
+    frame[y:y + template.shape[0], x:x + template.shape[1]] = template
+    return frame, (x, y)
+
+
+def fake_tesseract(folder):
+    """
+    Executable starting the fake tesseract, pytesseract needing a single command.
+       :param folder: Folder of the executable.
+       :return: Path of the executable.
+    """
+    if platform.system() == "Windows":
+        command = path.join(folder, "tesseract.bat")
+        with open(command, mode="w") as file:
+            file.write('@"{0}" "{1}" %*\n'.format(sys.executable, FAKE_TESSERACT))
+    else:
+        command = path.join(folder, "tesseract")
+        with open(command, mode="w") as file:
+            file.write('#!/bin/sh\nexec "{0}" "{1}" "$@"\n'.format(sys.executable, FAKE_TESSERACT))
+        os.chmod(command, os.stat(command).st_mode | stat.S_IEXEC)
+    return command
+
+
+def bench_screen(width, height, repeat):
+    """
+    Benchmark the capture, screenshot, OCR and template matching at a screen size, in the working directory.
+       :param width: Width of the screen.
+       :param height: Height of the screen.
+       :param repeat: Number of calls timed per measure.
+       :return: Dictionary of the measures.
+    """
+    template = button()
+    frame, (x, y) = synthetic_screen(width, height, template)
+    os.makedirs("img", exist_ok=True)
+    img = path.join("img", "button.png")
+    Image.fromarray(template).save(img)
+    absent = path.join("img", "absent.png")
+    Image.fromarray(255 - template[:, ::-1]).save(absent)
+    backend = HeadlessBackend(frame=frame)
+    automaton = Automaton(cache=True, backend=backend)
+    uncached = Automaton(cache=False, backend=backend)
+    results = {"capture": summary(timings(lambda i: automaton.capture(), repeat))}
+
+    def new_screenshot(i):
+        backend.frame[0, 0, 0] = i % 256  # A new frame each time, written to the store
+        automaton.screenshot()
+
+    results["screenshot"] = summary(timings(new_screenshot, repeat))
+    results["screenshot_dedup"] = summary(timings(lambda i: automaton.screenshot(), repeat))
+    text = uncached.text()
+    if text.strip() != os.environ["FAKE_TESSERACT_TEXT"]:
+        raise RuntimeError("Unexpected text read: {0!r}".format(text))
+    results["text"] = summary(timings(lambda i: uncached.text(), repeat))
+    automaton.text()
+    results["text_cached"] = summary(timings(lambda i: automaton.text(), repeat))
+
+    def clock(i):
+        backend.frame[10:30, 10:60] = (i * 37) % 256  # A clock changing in one tile of the screen
+        uncached.text(incremental=True)
+
+    if uncached.text(incremental=True) != text:
+        raise RuntimeError("Unexpected incremental text read: {0!r}".format(uncached.text(incremental=True)))
+    results["text_incremental"] = summary(timings(clock, repeat))
+    match = automaton.find(img)
+    if match is None or (match.x, match.y) != (x, y):
+        raise RuntimeError("Button not found at {0}: {1}".format((x, y), match))
+    bounds = (0, 0, width, height)
+    results["find"] = summary(timings(lambda i: automaton.find(img, bounds=bounds), repeat))
+    results["find_hinted"] = summary(timings(lambda i: automaton.find(img), repeat))
+    results["find_any"] = summary(timings(lambda i: automaton.find_any([absent, img], bounds=bounds), repeat))
+    automaton.close()
+    uncached.close()
+    return results
+
+
+def bench_cache(rows):
+    """
+    Benchmark the queued writes of the cache database, committed by batches.
+       :param rows: Number of rows inserted.
+       :return: Dictionary of the measure, throughput in rows per second.
+    """
+    database = CacheDatabase(path.join("sqlite3", "bench.sqlite3"))
+    start = perf_counter()
+    for i in range(rows):
+        database.execute("INSERT INTO screen VALUES(?, ?, ?, DATETIME('now', 'localtime'));", ("bench", i, i))
+    database.flush()
+    elapsed = perf_counter() - start
+    database.close()
+    return {"cache_write": summary([elapsed], items=rows)}
+
+
+def bench_adb(repeat):
+    """
+    Benchmark the adb device listing with the fake adb, a process per listing.
+       :param repeat: Number of listings.
+       :return: Dictionary of the measure.
+    """
+    registry = DeviceRegistry(FAKE_ADB)
+    if len(registry.refresh()) != 4:
+        raise RuntimeError("Unexpected device list of the fake adb.")
+    return {"adb_devices": summary(timings(lambda i: registry.refresh(), repeat))}
+
+
+def bench_export(projects, images):
+    """
+    Benchmark the export of synthetic Sikuli projects, all of them, none and one changed.
+       :param projects: Number of projects.
+       :param images: Number of images per project.
+       :return: Dictionary of the measures, throughput in projects per second.
+    """
+    template = Image.fromarray(button())
+    names = ["project{0:03d}".format(i) for i in range(projects)]
+    for name in names:
+        folder = path.join("sikuli_project", name + ".sikuli")
+        os.makedirs(folder, exist_ok=True)
+        lines = []
+        for i in range(images):
+            image = "{0}{1:03d}{2:03d}.png".format(1529851880, names.index(name), i)
+            template.save(path.join(folder, image))
+            lines.append('click("{0}")\nprint "step {1}"\n'.format(image, i))
+        with open(path.join(folder, name + ".py"), mode="w") as file:
+            file.write("".join(lines))
+
+    def export(i):
+        export_projects(directory="script", img_folder="img_export", sikuli_folder="sikuli_project")
+
+    results = {"export_cold": summary(timings(export, 1), items=projects),
+               "export_unchanged": summary(timings(export, 1), items=projects)}
+    with open(path.join("sikuli_project", names[0] + ".sikuli", names[0] + ".py"), mode="a") as file:
+        file.write('print "changed"\n')
+    results["export_one_changed"] = summary(timings(export, 1), items=projects)
+    return results
+
+
+def git_version():
+    """Git description of the working tree, None if unavailable."""
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], cwd=BENCH_FOLDER,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """
+    Compare the mean latencies to a baseline.
+       :param results: Results of this run.
+       :param baseline: Results of a previous run.
+       :return: List of the text lines, regressions flagged.
+    """
+    lines = []
+    for group, measures in results["results"].items():
+        for name, measure in measures.items():
+            previous = baseline["results"].get(group, {}).get(name)
+            if previous is not None and previous["mean"] > 0:
+                ratio = measure["mean"] / previous["mean"]
+                lines.append("{0:>10} {1:<20} {2:>6.2f}x{3}".format(
+                    group, name, ratio, "  REGRESSION" if ratio > REGRESSION_RATIO else ""))
+    return lines
+
+
+if __name__ == "__main__":
+    result_file = path.abspath(sys.argv[1]) if len(sys.argv) > 1 else \
+        path.join(BENCH_FOLDER, "results", "bench_{0}.json".format(git_version() or Pybot.__version__))
+    baseline_file = path.abspath(sys.argv[2]) if len(sys.argv) > 2 else None
+    results = {"version": Pybot.__version__, "git": git_version(), "python": platform.python_version(),
+               "platform": platform.platform(), "date": datetime.now().isoformat(timespec="seconds"),
+               "repeat": REPEAT, "results": {}}
+    with tempfile.TemporaryDirectory(prefix="pybot_bench_") as work:
+        os.chdir(work)
+        os.environ["FAKE_TESSERACT_TEXT"] = SCREEN_TEXT
+        os.environ["FAKE_ADB_DEVICES"] = "FAKE0001,FAKE0002,FAKE0003,FAKE0004"
+        pybot_module.TESSERACT_CMD = fake_tesseract(work)
+        for size in SIZES.split(","):
+            width, height = (int(value) for value in size.split("x"))
+            os.makedirs(size)
+            os.chdir(size)
+            results["results"][size] = bench_screen(width, height, REPEAT)
+            os.chdir(work)
+            print("{0}: done".format(size))
+        os.makedirs("sqlite3")
+        results["results"]["global"] = dict(bench_cache(CACHE_ROWS), **bench_adb(REPEAT))
+        results["results"]["global"].update(bench_export(PROJECTS, PROJECT_IMAGES))
+        os.chdir(BENCH_FOLDER)
+    for group, measures in results["results"].items():
+        for name, measure in measures.items():
+            print("{0:>10} {1:<20} mean {2:.4f}s p95 {3:.4f}s {4:>10.1f}/s".format(
+                group, name, measure["mean"], measure["p95"], measure["per_sec"]))
+    os.makedirs(path.dirname(result_file), exist_ok=True)
+    with open(result_file, mode="w", encoding="utf-8") as file:
+        json.dump(results, file, indent=1)
+    print("Results written to {0}".format(result_file))
+    if baseline_file is not None:
+        with open(baseline_file, mode="r", encoding="utf-8") as file:
+            lines = compare(results, json.load(file))
+        print("\n".join(lines))
+        sys.exit(1 if any(line.endswith("REGRESSION") for line in lines) else 0)
+    sys.exit(0)
@@ -0,0 +1,52 @@
+"""
+Benchmark of the latency of Pybot.text(), comparing the in-memory path (default) to the former path saving the
+screenshot as a PNG file before reading it again for tesseract. One pixel of each screenshot saved is changed, so the
+screenshot store writes it instead of finding the identical frame already stored.
+Usage: python benchmark/bench_text.py [number of calls]
+"""
+
+import sys
+from itertools import count
+from os import remove
+from time import perf_counter
+
+from Pybot.Pybot import Pybot
+
+FRAMES = count()
+
+
+def bench(function, n):
+    """
+    Time n calls of a function.
+       :param function: Callable without argument to time.
+       :param n: Number of calls.
+       :return: Tuple of the mean and the minimum latency in seconds.
+    """
+    timings = []
+    for _ in range(n):
+        start = perf_counter()
+        function()
+        timings.append(perf_counter() - start)
+    return sum(timings) / n, min(timings)
+
+
+def text_on_disk(automaton):
+    """Former text() path: screenshot saved, read from the disk by tesseract, then deleted."""
+    data = automaton.capture()
+    data[0, 0, 0] = next(FRAMES) % 256  # A new frame each time, written to the store
+    img_file = automaton.screenshots.put(data)
+    text = automaton.get_text_img(img_file)
+    remove(img_file)
+    return text
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    test_automaton = Pybot(cache=False)
+    disk_mean, disk_min = bench(lambda: text_on_disk(test_automaton), calls)
+    memory_mean, memory_min = bench(lambda: test_automaton.text(), calls)
+    print("text() on disk   : mean {0:.4f}s min {1:.4f}s".format(disk_mean, disk_min))
+    print("text() in memory : mean {0:.4f}s min {1:.4f}s".format(memory_mean, memory_min))
+    print("latency drop per call: {0:.4f}s ({1:.1%})".format(disk_mean - memory_mean,
+                                                             1 - memory_mean / disk_mean))
+    sys.exit(0)
@@ -0,0 +1,52 @@
+"""
+Fake adb serving canned outputs, to benchmark Pybot without any Android device.
+   devices, track-devices: FAKE_ADB_DEVICES serial numbers separated by commas, default is one device.
+   exec-out screencap, exec-out sh: canned RGBA frames of FAKE_ADB_SIZE pixels (width x height), default 1080x1920.
+   shell: reads commands on stdin, echoing only the echo commands.
+"""
+
+import os
+import struct
+import sys
+
+SERIALS = os.environ.get("FAKE_ADB_DEVICES", "FAKE0001").split(",")
+WIDTH, HEIGHT = (int(size) for size in os.environ.get("FAKE_ADB_SIZE", "1080x1920").split("x"))
+
+
+def frame():
+    """Raw screencap frame, with the 16 bytes header of Android 9 and more."""
+    return struct.pack("<4I", WIDTH, HEIGHT, 1, 0) + bytes(WIDTH * HEIGHT * 4)
+
+
+def devices():
+    """Device list as printed by adb devices."""
+    return "".join("{0}\tdevice\n".format(serial) for serial in SERIALS if serial)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["-s"]:
+        args = args[2:]
+    out = sys.stdout.buffer
+    if args == ["devices"]:
+        out.write("List of devices attached\r\n{0}\r\n".format(devices().replace("\n", "\r\n")).encode())
+    elif args == ["track-devices"]:
+        payload = devices()
+        out.write("{0:04x}{1}".format(len(payload), payload).encode())
+        out.flush()
+        sys.stdin.read()
+    elif args == ["exec-out", "screencap"]:
+        out.write(frame())
+    elif args == ["exec-out", "sh"]:
+        canned = frame()
+        for line in sys.stdin.buffer:
+            if line.strip() == b"screencap":
+                out.write(canned)
+                out.flush()
+    elif args == ["shell"]:
+        for line in sys.stdin:
+            for command in line.split(";"):
+                if command.strip().startswith("echo "):
+                    out.write(command.strip()[5:].encode() + b"\n")
+                    out.flush()
+    sys.exit(0)
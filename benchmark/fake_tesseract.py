@@ -0,0 +1,48 @@
+"""
+Fake tesseract writing a canned text, to benchmark Pybot without tesseract installed. Called like tesseract by
+pytesseract: fake_tesseract.py <image> <output base> [-l lang] [config ...] txt
+   FAKE_TESSERACT_TEXT: text written to <output base>.txt like tesseract 4.1 does, a blank line between paragraphs
+   and a form feed at the end, default is Pybot. With -c tessedit_create_tsv=1, the words of the text are written to
+   <output base>.tsv with their block, paragraph and line, from the top left corner of the image.
+   FAKE_TESSERACT_MPIXEL_SEC: seconds spent per million pixels of the image, to model the cost of the recognition,
+   default is 0.05.
+"""
+
+import os
+import sys
+import time
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--version"]:
+        print("tesseract 4.1.1")
+        sys.exit(0)
+    image, output_base = sys.argv[1:3]
+    with open(image, "rb") as file:
+        header = file.read(24)
+    # Size of the PNG saved by pytesseract, from its IHDR chunk
+    pixels = int.from_bytes(header[16:20], "big") * int.from_bytes(header[20:24], "big") \
+        if header[:8] == b"\x89PNG\r\n\x1a\n" else 0
+    time.sleep(pixels / 1e6 * float(os.environ.get("FAKE_TESSERACT_MPIXEL_SEC", "0.05")))
+    text = os.environ.get("FAKE_TESSERACT_TEXT", "Pybot")
+    paragraphs = [[line.split() for line in paragraph.splitlines() if line.split()]
+                  for paragraph in text.split("\n\n")]
+    paragraphs = [paragraph for paragraph in paragraphs if len(paragraph) != 0]
+    if "tessedit_create_tsv=1" in sys.argv:
+        rows = ["level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"]
+        top = 8
+        for par_num, paragraph in enumerate(paragraphs, 1):
+            for line_num, line in enumerate(paragraph, 1):
+                left = 8
+                for word_num, word in enumerate(line, 1):
+                    rows.append("5\t1\t1\t{0}\t{1}\t{2}\t{3}\t{4}\t{5}\t10\t95\t{6}".format(
+                        par_num, line_num, word_num, left, top, 6 * len(word), word))
+                    left += 6 * len(word) + 6
+                top += 14
+            top += 14
+        with open(output_base + ".tsv", mode="w", encoding="utf-8") as file:
+            file.write("\n".join(rows) + "\n")
+    else:
+        with open(output_base + ".txt", mode="w", encoding="utf-8") as file:
+            file.write("\n".join("".join(" ".join(line) + "\n" for line in paragraph) for paragraph in paragraphs)
+                       + "\f")
+    sys.exit(0)
@@ -0,0 +1,20 @@
+"""
+Script exporting many sikuli projects, to the script library ./script or the Pybot package.
+Usage: python export_sikuli_batch.py <script|class> [project ...]
+The projects are all the projects of ./sikuli_project if none is given, the unchanged ones are skipped.
+"""
+
+import sys
+
+from Pybot.sikuli_export import export_projects
+
+if __name__ == "__main__":
+    directory = "Pybot" if sys.argv[1] == "class" else "script"
+    results = export_projects(sys.argv[2:] or None, directory=directory)
+    for result in results.values():
+        if result.error is not None:
+            print("{0}: {1}".format(result.project, result.error))
+    exported = sum(result.exported for result in results.values())
+    failed = sum(result.error is not None for result in results.values())
+    print("{0} projects, {1} exported, {2} failed".format(len(results), exported, failed))
+    sys.exit(1 if failed != 0 else 0)
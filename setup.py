@@ -24,5 +24,5 @@ setup(name=name,
       python_requires=">=3.6",
       zip_safe=False,
       install_requires=['pytest', 'pytest-html', 'lackey', 'wheel', 'easygui', 'pytesseract',
-                        'pillow'],
+                        'pillow', 'numpy', 'opencv-python'],
       )
@@ -0,0 +1,25 @@
+"""
+Script running an exported sikuli script with its actions traced, to know which line of the script is slow.
+Usage: python trace_sikuli_script.py <script> [trace file] [script argument ...]
+The timeline is written in the Chrome trace format, trace.json by default, to be opened with chrome://tracing or
+ui.perfetto.dev, and the time spent per line of the script is printed.
+"""
+
+import sys
+
+from Pybot.trace import Tracer, trace_script
+
+if __name__ == "__main__":
+    trace_file = sys.argv[2] if len(sys.argv) > 2 else "trace.json"
+    tracer = Tracer(sys.argv[1])
+    return_code = 0
+    try:
+        trace_script(sys.argv[1], trace_file=trace_file, argv=sys.argv[3:], tracer=tracer)
+    except SystemExit as error:
+        return_code = error.code if isinstance(error.code, int) else 0 if error.code is None else 1
+    except Exception as error:
+        print("{0}: {1}".format(type(error).__name__, error))
+        return_code = 1
+    print(tracer.report())
+    print("Timeline written to {0}".format(trace_file))
+    sys.exit(return_code)